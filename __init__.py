@@ -10,72 +10,149 @@ bl_info = {
 
 # Глобальные переменные
 modules_loaded = False
-import os
 
-# Получаем путь к папке аддона
-ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
-MODEL_PATH = os.path.join(ADDON_DIR, "models", "pose_landmarker.task")
+from . import log_utils
 
-def get_model_path():
-    """Возвращает путь к файлу модели"""
-    return MODEL_PATH
+log = log_utils.get_logger(__name__)
+
+# Прогревать модель MediaPipe в фоне сразу после регистрации
+PREWARM_ON_REGISTER = True
+
+# Как часто закрывать простаивающие детекторы MediaPipe (секунды)
+EVICT_IDLE_INTERVAL = 60.0
+
+def get_model_path(variant=None):
+    """Возвращает путь к файлу модели (поиск и кэш - в model_registry)"""
+    from . import model_registry
+    return model_registry.resolve(variant)
+
+def _evict_idle_detectors():
+    """
+    Таймер bpy.app.timers: закрывает детекторы, простаивающие дольше
+    detector_registry.IDLE_TIMEOUT. Без него детекторы в Blender закрывались
+    бы только при следующей детекции.
+    """
+    import sys
+
+    registry = sys.modules.get(f"{__name__}.detector_registry")
+    if registry is not None:
+        registry.evict_idle()
+    return EVICT_IDLE_INTERVAL
 
 def register():
     """Регистрация аддона"""
     import bpy
     import traceback
 
-    print("\n" + "=" * 60)
-    print("📦 Photo Tool Pro: Начало регистрации...")
-    print("=" * 60)
+    # Обработчики журнала снимаются в unregister(): при повторном включении подключаем заново
+    log_utils.setup()
+
+    log.info("📦 Начало регистрации...")
+
+    # Пакеты пользователя Python - один раз при регистрации, а не при импорте модулей
+    from . import deps_utils
+    deps_utils.setup_user_site()
 
-    # Список модулей для импорта
+    # Для регистрации нужны только операторы и панель: остальные модули
+    # (model_utils, pose_from_photo, cv2, mediapipe) импортируются при первом запуске
     modules_to_import = [
+        "skeleton_registry",
         "operators",
         "ui_panels",
-        "model_utils",
-        "skeleton_utils",
-        "screenshot_utils",
-        "deps_utils",
-        "pose_from_photo"
     ]
 
-    # Загружаем все модули
+    # Загружаем модули регистрации
     loaded_modules = {}
 
     for module_name in modules_to_import:
         try:
-            print(f"  🔄 Импорт модуля: {module_name}")
+            log.debug("  🔄 Импорт модуля: %s", module_name)
             module = __import__(f"{__name__}.{module_name}", fromlist=[module_name])
             loaded_modules[module_name] = module
-            print(f"    ✅ {module_name} загружен")
+            log.debug("    ✅ %s загружен", module_name)
         except ImportError as e:
-            print(f"    ❌ Ошибка импорта {module_name}: {e}")
+            log.error(f"    ❌ Ошибка импорта {module_name}: {e}")
             continue
 
+    # Реестр скелетов: обработчики загрузки, undo и depsgraph
+    if "skeleton_registry" in loaded_modules:
+        loaded_modules["skeleton_registry"].register()
+
     # Регистрируем операторы
     if "operators" in loaded_modules:
         try:
-            print("\n🔧 Регистрация операторов...")
+            log.info("🔧 Регистрация операторов...")
             loaded_modules["operators"].register()
-            print("✅ Операторы зарегистрированы")
+            log.info("✅ Операторы зарегистрированы")
         except Exception as e:
-            print(f"❌ Ошибка регистрации операторов: {e}")
+            log.error(f"❌ Ошибка регистрации операторов: {e}")
 
     # Регистрируем панель
     if "ui_panels" in loaded_modules:
         try:
-            print("\n🎨 Регистрация панели...")
+            log.info("🎨 Регистрация панели...")
             loaded_modules["ui_panels"].register()
-            print("✅ Панель зарегистрирована")
+            log.info("✅ Панель зарегистрирована")
+        except Exception as e:
+            log.error(f"❌ Ошибка регистрации панели: {e}")
+
+    # Закрытие простаивающих детекторов (сам модуль реестра импортируется при детекции)
+    if not bpy.app.timers.is_registered(_evict_idle_detectors):
+        bpy.app.timers.register(_evict_idle_detectors, first_interval=EVICT_IDLE_INTERVAL,
+                                persistent=True)
+
+    # Запускаем фоновый прогрев модели
+    if PREWARM_ON_REGISTER:
+        try:
+            from . import prewarm
+            prewarm.start()
+        except Exception as e:
+            log.warning(f"⚠️ Не удалось запустить прогрев модели: {e}")
+
+    log.info("✅ Photo Tool Pro успешно зарегистрирован!")
+    log.info("📍 Панель: 3D Viewport -> N -> вкладка 'Tool'")
+
+def unregister():
+    """Отмена регистрации аддона"""
+    import sys
+
+    for module_name in ("ui_panels", "operators", "skeleton_registry"):
+        module = sys.modules.get(f"{__name__}.{module_name}")
+        if module is None:
+            continue
+        try:
+            module.unregister()
         except Exception as e:
-            print(f"❌ Ошибка регистрации панели: {e}")
-
-    print("\n" + "=" * 60)
-    print("✅ Photo Tool Pro успешно зарегистрирован!")
-    print("\n📍 Расположение панели:")
-    print("   1. Откройте 3D Viewport")
-    print("   2. Нажмите N для открытия боковой панели")
-    print("   3. Перейдите на вкладку 'Tool'")
-    print("\n📢 Проверьте консоль для подробных сообщений")
-    print("=" * 60 + "\n")
\ No newline at end of file
+            log.warning(f"⚠️ Ошибка отмены регистрации {module_name}: {e}")
+
+    import bpy
+    if bpy.app.timers.is_registered(_evict_idle_detectors):
+        bpy.app.timers.unregister(_evict_idle_detectors)
+
+    # Останавливаем живой поток позы
+    stream = sys.modules.get(f"{__name__}.stream_ingest")
+    if stream is not None:
+        stream.stop()
+
+    # Останавливаем фоновые задачи детекции
+    pool = sys.modules.get(f"{__name__}.worker_pool")
+    if pool is not None:
+        pool.shutdown()
+
+    processes = sys.modules.get(f"{__name__}.process_pool")
+    if processes is not None:
+        processes.shutdown()
+
+    # Останавливаем прогрев до закрытия детекторов: иначе его поток
+    # вернул бы или создал детектор уже после close_all()
+    prewarm = sys.modules.get(f"{__name__}.prewarm")
+    if prewarm is not None:
+        prewarm.reset()
+
+    # Закрываем прогретые детекторы MediaPipe
+    registry = sys.modules.get(f"{__name__}.detector_registry")
+    if registry is not None:
+        registry.close_all()
+
+    log.info("👋 Photo Tool Pro отключен")
+    log_utils.shutdown()
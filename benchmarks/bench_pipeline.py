@@ -0,0 +1,299 @@
+"""
+Микро-бенчмарки конвейера точки -> поза (без Blender)
+
+Меряет стадии на синтетических фикстурах (benchmarks/fixtures.py) для
+1, 100 и 10 000 кадров и сохраняет результат в JSON, чтобы сравнивать
+коммиты между собой:
+
+  extract          - разбор результата детектора (FakeDetector) в PoseDetection
+  to_blender       - нормализованные точки -> координаты Blender, по кадру
+  to_blender_batch - то же одним вызовом на все кадры
+  fusion           - объединение FRONT и SIDE
+  solve_2d         - углы 2D метода (_calculate_2d_pose_angles)
+  solve_3d         - решатель поворотов (_align_skeleton_to_pose), по кадру
+  solve_3d_batch   - тот же решатель на все кадры (импорт последовательности)
+  draw             - рисование 2D скелета поверх кадра (нужен opencv)
+
+Запуск (Python с numpy, для draw еще opencv-python):
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --sizes 1,100 --stages solve_3d,fusion
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/abc1234.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+import fixtures
+
+DEFAULT_SIZES = (1, 100, 10000)
+DEFAULT_REPEATS = 5
+
+# Сколько кадров всего прогонять на размер: большие размеры повторяются реже
+REPEAT_FRAME_BUDGET = 20000
+
+# Минимальная длительность одного замера (короткие стадии гоняются в цикле)
+MIN_MEASURE_TIME = 0.05
+
+# Размер холста для стадии draw
+CANVAS_SIZE = (1280, 720)
+
+# Во сколько раз стадия может замедлиться, прежде чем считаться регрессией
+REGRESSION_THRESHOLD = 1.25
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+class Fixture:
+    """Данные на N кадров, подготовленные вне замеров"""
+
+    def __init__(self, frames, seed=0):
+        pose_core = fixtures.import_addon_module("pose_core")
+        model_utils = fixtures.import_addon_module("model_utils")
+
+        self.frames = frames
+        self.width, self.height = CANVAS_SIZE
+        self.shape = (self.height, self.width, 3)
+        self.front = fixtures.synthetic_landmarks(frames, seed=seed)
+        self.side = fixtures.synthetic_landmarks(frames, seed=seed + 1)
+        self.detector = fixtures.FakeDetector(self.front)
+
+        self.front_3d = model_utils._extract_3d_coordinates(self.front, self.shape, is_front_view=True)
+        self.side_3d = model_utils._extract_3d_coordinates(self.side, self.shape, is_front_view=False)
+        self.plane_points = pose_core.apply_affine(
+            pose_core.gather_key_points(self.front), pose_core.photo_plane_affine(True)
+        )
+        self.key_points = pose_core.gather_key_points(self.front)[..., :3].astype(np.float64)
+        self.pixels = pose_core.landmarks_to_pixels(self.front, self.width, self.height)
+        self.rest = fixtures.synthetic_rest()
+        self.canvas = np.zeros(self.shape, dtype=np.uint8)
+
+
+# --- Стадии ---------------------------------------------------------------
+
+def stage_extract(fx):
+    detection = fixtures.import_addon_module("detection")
+    pose_core = fixtures.import_addon_module("pose_core")
+
+    fx.detector.rewind()
+    for _ in range(fx.frames):
+        result = detection.PoseDetection.from_mediapipe(fx.detector.detect())
+        pose_core.gather_key_points(result.normalized[0])
+
+
+def stage_to_blender(fx):
+    model_utils = fixtures.import_addon_module("model_utils")
+    for landmarks in fx.front:
+        model_utils._extract_3d_coordinates(landmarks, fx.shape, is_front_view=True)
+
+
+def stage_to_blender_batch(fx):
+    model_utils = fixtures.import_addon_module("model_utils")
+    model_utils._extract_3d_coordinates(fx.front, fx.shape, is_front_view=True)
+
+
+def stage_fusion(fx):
+    pose_core = fixtures.import_addon_module("pose_core")
+    for front_3d, side_3d in zip(fx.front_3d, fx.side_3d):
+        pose_core.fuse_views(front_3d, side_3d)
+
+
+def stage_solve_2d(fx):
+    pose_core = fixtures.import_addon_module("pose_core")
+    for points_2d in fx.plane_points:
+        pose_core.photo_pose_angles(points_2d, True)
+
+
+def _solve_3d(fx, key_points):
+    pose_core = fixtures.import_addon_module("pose_core")
+    rest = fx.rest
+    points = pose_core.mediapipe_to_pose_space(key_points)
+    directions = pose_core.segment_directions(points, rest["names"])
+    return pose_core.solve_pose_quaternions(rest["rest"], rest["parents"], directions)
+
+
+def stage_solve_3d(fx):
+    for key_points in fx.key_points:
+        _solve_3d(fx, key_points)
+
+
+def stage_solve_3d_batch(fx):
+    _solve_3d(fx, fx.key_points)
+
+
+def stage_draw(fx):
+    screenshot_utils = fixtures.import_addon_module("screenshot_utils")
+    for pixels in fx.pixels:
+        screenshot_utils.render_2d_pose(fx.canvas, pixels, 'FRONT')
+
+
+STAGES = {
+    "extract": stage_extract,
+    "to_blender": stage_to_blender,
+    "to_blender_batch": stage_to_blender_batch,
+    "fusion": stage_fusion,
+    "solve_2d": stage_solve_2d,
+    "solve_3d": stage_solve_3d,
+    "solve_3d_batch": stage_solve_3d_batch,
+    "draw": stage_draw,
+}
+
+
+def _stage_available(name):
+    if name == "draw":
+        try:
+            import cv2  # noqa: F401
+        except ImportError:
+            return False
+    return True
+
+
+# --- Замеры ---------------------------------------------------------------
+
+def _calibrate(stage, fx):
+    """Сколько прогонов подряд нужно, чтобы один замер длился MIN_MEASURE_TIME"""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            stage(fx)
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_MEASURE_TIME:
+            return loops
+        loops *= 2 if elapsed <= 0 else max(2, min(10, int(MIN_MEASURE_TIME / elapsed) + 1))
+
+
+def time_stage(stage, fx, repeats):
+    """
+    Прогоняет стадию repeats раз. Короткие стадии повторяются в цикле, чтобы
+    замер не тонул в шуме таймера; GC собирается заранее и не мешает замеру.
+    """
+    loops = _calibrate(stage, fx)  # заодно прогрев: импорты, кэши NumPy
+
+    timings = []
+    for _ in range(repeats):
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            for _ in range(loops):
+                stage(fx)
+            timings.append((time.perf_counter() - started) / loops)
+        finally:
+            gc.enable()
+
+    best = min(timings)
+    return {
+        "repeats": repeats,
+        "loops": loops,
+        "min_s": best,
+        "median_s": float(np.median(timings)),
+        "per_frame_us": best / fx.frames * 1e6,
+    }
+
+
+def _environment():
+    commit, dirty = fixtures.git_commit()
+    try:
+        import cv2
+        opencv = cv2.__version__
+    except ImportError:
+        opencv = None
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": opencv,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def run(sizes, stage_names, repeats):
+    results = {}
+    for frames in sizes:
+        fx = Fixture(frames)
+        size_repeats = max(1, min(repeats, REPEAT_FRAME_BUDGET // frames))
+
+        for name in stage_names:
+            if not _stage_available(name):
+                print(f"⏭️ {name}: пропущено (нет opencv)")
+                continue
+            timing = time_stage(STAGES[name], fx, size_repeats)
+            results.setdefault(name, {})[str(frames)] = timing
+            print(f"⏱️ {name:<17} {frames:>6} кадров: {timing['min_s'] * 1000:10.3f} мс "
+                  f"({timing['per_frame_us']:9.2f} мкс/кадр)")
+    return results
+
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """Печатает сравнение с прошлым прогоном. Возвращает число регрессий."""
+    regressions = 0
+    print(f"\n📊 Сравнение с {baseline['environment'].get('commit') or 'baseline'}:")
+    for name, sizes in current["results"].items():
+        for frames, timing in sizes.items():
+            old = baseline["results"].get(name, {}).get(frames)
+            if not old:
+                continue
+            ratio = timing["min_s"] / old["min_s"] if old["min_s"] > 0 else float("inf")
+            mark = "⚠️" if ratio > threshold else "  "
+            regressions += ratio > threshold
+            print(f"{mark} {name:<17} {frames:>6}: {old['per_frame_us']:9.2f} -> "
+                  f"{timing['per_frame_us']:9.2f} мкс/кадр (x{ratio:.2f})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Photo Tool Pro pipeline benchmarks")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="число кадров через запятую")
+    parser.add_argument("--stages", default=",".join(STAGES), help="стадии через запятую")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--output", default=None,
+                        help="JSON с результатами (по умолчанию results/<коммит>.json)")
+    parser.add_argument("--compare", default=None, help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="замедление, после которого стадия считается регрессией")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    stage_names = [name for name in args.stages.split(",") if name]
+    unknown = [name for name in stage_names if name not in STAGES]
+    if unknown:
+        parser.error(f"неизвестные стадии: {', '.join(unknown)}")
+
+    environment = _environment()
+    report = {
+        "environment": environment,
+        "sizes": sizes,
+        "results": run(sizes, stage_names, args.repeats),
+    }
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        name = environment["commit"] or "local"
+        if environment["dirty"]:
+            name += "-dirty"
+        output = os.path.join(RESULTS_DIR, f"{name}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"💾 Результаты: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Синтетические фикстуры для бенчмарков (без bpy, mediapipe и файлов моделей)
+
+- synthetic_landmarks - последовательность поз MediaPipe (F, 33, 4): человек
+  стоит и машет руками, с небольшим шумом, как у настоящего детектора
+- FakeDetector        - подменяет PoseLandmarker: detect()/detect_for_video()
+  отдают результаты в формате MediaPipe (pose_landmarks с .x/.y/.z/...)
+- synthetic_rest      - данные покоя Pose_Skeleton, как get_rest_data()
+- import_addon_module - импорт модулей аддона вне Blender
+- git_commit          - коммит, к которому относятся замеры
+"""
+import importlib
+import os
+import subprocess
+import sys
+import time
+import types
+
+import numpy as np
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Имя, под которым папка аддона импортируется как пакет (относительные импорты)
+ADDON_PACKAGE = "photo_tool_pro"
+
+FIXTURE_FPS = 30.0
+
+# Поза покоя: 13 ключевых точек в долях кадра (x, y, z)
+BASE_KEY_POINTS = np.array([
+    (0.50, 0.15, -0.05),  # нос
+    (0.42, 0.28, 0.00),   # левое плечо
+    (0.58, 0.28, 0.00),   # правое плечо
+    (0.36, 0.42, 0.02),   # левый локоть
+    (0.64, 0.42, 0.02),   # правый локоть
+    (0.33, 0.55, 0.00),   # левое запястье
+    (0.67, 0.55, 0.00),   # правое запястье
+    (0.45, 0.55, 0.00),   # левое бедро
+    (0.55, 0.55, 0.00),   # правое бедро
+    (0.45, 0.72, 0.02),   # левое колено
+    (0.55, 0.72, 0.02),   # правое колено
+    (0.45, 0.90, 0.00),   # левая лодыжка
+    (0.55, 0.90, 0.00),   # правая лодыжка
+])
+
+# Индекс MediaPipe -> индекс ключевой точки, чье положение он повторяет
+# (лицо - нос, кисти - запястья, стопы - лодыжки)
+_LANDMARK_SOURCE = np.array([
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,  # 0-10: нос и лицо
+    1, 2, 3, 4, 5, 6,                 # 11-16: руки
+    5, 6, 5, 6, 5, 6,                 # 17-22: кисти
+    7, 8, 9, 10, 11, 12,              # 23-28: ноги
+    11, 12, 11, 12,                   # 29-32: стопы
+], dtype=np.intp)
+
+
+def import_addon_module(name):
+    """
+    Импортирует модуль аддона (например "pose_core") без его регистрации
+    в Blender и без самого Blender. Папка аддона регистрируется как пакет без выполнения __init__.py,
+    поэтому относительные импорты внутри модулей работают.
+    """
+    if ADDON_PACKAGE not in sys.modules:
+        package = types.ModuleType(ADDON_PACKAGE)
+        package.__path__ = [ADDON_DIR]
+        sys.modules[ADDON_PACKAGE] = package
+    return importlib.import_module(f"{ADDON_PACKAGE}.{name}")
+
+
+def git_commit():
+    """(короткий хэш HEAD, есть ли незакоммиченные изменения); (None, False) вне git"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ADDON_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=ADDON_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return commit, bool(dirty)
+
+
+def synthetic_landmarks(frames, seed=0, noise=0.002):
+    """(F, 33, 4) float32: x, y, z, visibility; руки и колени двигаются по синусу"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(frames, dtype=np.float64) / FIXTURE_FPS
+    swing = np.sin(2.0 * np.pi * 0.5 * t)[:, np.newaxis]
+    bend = np.sin(2.0 * np.pi * 0.25 * t)[:, np.newaxis]
+
+    key_points = np.broadcast_to(BASE_KEY_POINTS, (frames, 13, 3)).copy()
+
+    # Руки поднимаются и опускаются (локти вдвое меньше запястий)
+    key_points[:, [3, 4], 1] -= 0.06 * swing
+    key_points[:, [5, 6], 1] -= 0.12 * swing
+    key_points[:, [5, 6], 0] += np.array((-0.04, 0.04)) * swing
+    # Колени сгибаются вперед
+    key_points[:, [9, 10], 2] -= 0.05 * np.abs(bend)
+
+    key_points += rng.normal(0.0, noise, key_points.shape)
+
+    landmarks = np.empty((frames, 33, 4), dtype=np.float32)
+    landmarks[..., :3] = key_points[:, _LANDMARK_SOURCE]
+    landmarks[..., 3] = rng.uniform(0.85, 1.0, (frames, 33))
+    return landmarks
+
+
+def synthetic_world(landmarks):
+    """Мировые точки (F, 33, 4) в метрах: центр между бедрами, рост ~1.7 м"""
+    world = np.array(landmarks, dtype=np.float32, copy=True)
+    hips = world[:, [23, 24], :3].mean(axis=1, keepdims=True)
+    world[..., :3] = (world[..., :3] - hips) * 1.7
+    return world
+
+
+class _FakeResult:
+    """Результат в формате PoseLandmarkerResult"""
+
+    __slots__ = ("pose_landmarks", "pose_world_landmarks")
+
+    def __init__(self, pose_landmarks, pose_world_landmarks):
+        self.pose_landmarks = pose_landmarks
+        self.pose_world_landmarks = pose_world_landmarks
+
+
+class FakeDetector:
+    """
+    Детектор-заглушка: по очереди отдает кадры фикстуры.
+    Результаты строятся заранее, чтобы бенчмарк мерил разбор результата,
+    а не сборку фикстуры. latency - имитация времени инференса (с).
+    """
+
+    def __init__(self, landmarks, latency=0.0):
+        from types import SimpleNamespace
+
+        world = synthetic_world(landmarks)
+        self.latency = latency
+        self._results = []
+        for frame, frame_world in zip(landmarks, world):
+            pose = [SimpleNamespace(x=float(x), y=float(y), z=float(z), visibility=float(v), presence=1.0)
+                    for x, y, z, v in frame]
+            pose_world = [SimpleNamespace(x=float(x), y=float(y), z=float(z), visibility=float(v), presence=1.0)
+                          for x, y, z, v in frame_world]
+            self._results.append(_FakeResult([pose], [pose_world]))
+        self._next = 0
+
+    def __len__(self):
+        return len(self._results)
+
+    def rewind(self):
+        self._next = 0
+
+    def detect(self, _mp_image=None):
+        if self.latency:
+            time.sleep(self.latency)
+        result = self._results[self._next % len(self._results)]
+        self._next += 1
+        return result
+
+    def detect_for_video(self, mp_image, _timestamp_ms):
+        return self.detect(mp_image)
+
+    def close(self):
+        self._results = []
+
+
+def synthetic_rest():
+    """
+    Данные покоя Pose_Skeleton в формате get_rest_data(): имена костей,
+    матрицы покоя (B, 3, 3) с осью Y вдоль кости и индексы родителей.
+    """
+    pose_core = import_addon_module("pose_core")
+
+    _center, heads, tails = pose_core.skeleton_bone_layout(
+        pose_core.mediapipe_to_pose_space(BASE_KEY_POINTS)
+    )
+    names = [bone[0] for bone in pose_core.SKELETON_BONES]
+    name_to_index = {name: i for i, name in enumerate(names)}
+    parents = np.array(
+        [name_to_index[parent] if parent else -1 for _n, _h, _t, parent, _c in pose_core.SKELETON_BONES],
+        dtype=np.intp
+    )
+
+    axes = tails - heads
+    axes /= np.linalg.norm(axes, axis=1, keepdims=True)
+    rest = pose_core.quaternion_to_matrix(pose_core.quaternion_from_y_axis(axes))
+
+    return {"names": names, "rest": rest, "parents": parents}
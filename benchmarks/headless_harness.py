@@ -0,0 +1,319 @@
+"""
+Сквозной headless прогон аддона в Blender (blender -b)
+
+В отличие от bench_pipeline.py меряет то, что стоит дороже всего на практике:
+bpy.ops и смены режимов, создание арматуры, обновления depsgraph и undo.
+Детекция подменяется воспроизведением точек (detection.REPLAY_PROVIDER),
+захват viewport - синтетическими кадрами (screenshot_utils 'STUB'), поэтому
+ни окно, ни MediaPipe, ни файл модели не нужны. Нужен opencv в Python Blender.
+
+Стадии:
+  create_skeleton    - model_utils.create_skeleton_from_viewport
+  apply_pose         - код оператора view3d.apply_pose_from_photo (2D метод
+                       PhotoPoseMixin с визуализацией, --repeats раз)
+  sequence_detect    - pose_from_photo.detect_pose_sequence на --frames кадрах
+  sequence_keyframes - pose_from_photo.apply_pose_sequence
+Для каждой: время, отдельно обновление depsgraph и undo push, пиковый RSS,
+число объектов/блоков данных до и после и разбивка по стадиям аддона (timing).
+
+Запуск:
+    blender -b --python benchmarks/headless_harness.py -- --frames 100
+    blender -b scene.blend --python benchmarks/headless_harness.py -- --output run.json
+    blender -b --python benchmarks/headless_harness.py -- --landmarks recorded.npy
+
+Без .blend строится фикстурная сцена (пустая сцена + манекен из примитивов).
+--landmarks - записанные точки (F, 33, 4) в формате .npy; иначе синтетические.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fixtures  # noqa: E402
+
+# Коллекции bpy.data, которые считаются в отчете
+DATABLOCK_COLLECTIONS = (
+    "objects", "meshes", "armatures", "actions", "images",
+    "materials", "collections", "cameras", "lights",
+)
+
+DEFAULT_FRAMES = 100
+DEFAULT_REPEATS = 10
+DEFAULT_IMAGE_SIZE = (640, 480)
+
+
+class ReplayDetector:
+    """
+    Подмена детекции для detection.REPLAY_PROVIDER: отдает записанные точки.
+    Кадр с известным путем получает свой номер, остальные - следующий по кругу.
+    """
+
+    def __init__(self, landmarks):
+        detection = fixtures.import_addon_module("detection")
+
+        self._detection = detection
+        self.landmarks = np.asarray(landmarks, dtype=np.float32)
+        self.world = fixtures.synthetic_world(self.landmarks)
+        self.presence = np.ones(self.landmarks.shape[:2], dtype=np.float32)
+        self.frame_by_path = {}
+        self.calls = 0
+        self._next = 0
+
+    def __call__(self, frame):
+        self.calls += 1
+        index = self.frame_by_path.get(frame.path) if frame.path else None
+        if index is None:
+            index = self._next % len(self.landmarks)
+            self._next += 1
+        return self._detection.PoseDetection.from_arrays({
+            "normalized": self.landmarks[index][np.newaxis],
+            "world": self.world[index][np.newaxis],
+            "presence": self.presence[index][np.newaxis],
+        })
+
+
+def _photo_pose_runner_class():
+    operators = fixtures.import_addon_module("operators")
+
+    class PhotoPoseRunner(operators.PhotoPoseMixin):
+        """
+        Код оператора view3d.apply_pose_from_photo без самого оператора:
+        в blender -b нет 3D viewport, и poll() оператора через bpy.ops не пройдет.
+        Меряется то же, что выполняет execute() после выбора файла.
+        """
+        model_variant = 'AUTO'
+
+    return PhotoPoseRunner
+
+
+def _peak_rss_mb():
+    """Пиковый RSS процесса в МБ (None, если платформа не отдает)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux отдает КБ, macOS - байты
+        return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024.0 * 1024.0)
+    except ImportError:
+        return None
+
+
+def _count_datablocks():
+    counts = {name: len(getattr(bpy.data, name)) for name in DATABLOCK_COLLECTIONS}
+    counts["pose_bones"] = sum(len(obj.pose.bones) for obj in bpy.data.objects if obj.pose)
+    return counts
+
+
+def _update_depsgraph():
+    started = time.perf_counter()
+    bpy.context.view_layer.update()
+    return time.perf_counter() - started
+
+
+def _undo_push(message):
+    """Undo push, как после оператора с флагом UNDO (None, если в фоне недоступен)"""
+    started = time.perf_counter()
+    try:
+        bpy.ops.ed.undo_push(message=message)
+    except RuntimeError:
+        return None
+    return time.perf_counter() - started
+
+
+class StageRecorder:
+    """Меряет стадии и собирает отчет"""
+
+    def __init__(self):
+        self.stages = []
+
+    def run(self, name, fn, *args):
+        timing = fixtures.import_addon_module("timing")
+
+        before = _count_datablocks()
+        started = time.perf_counter()
+        with timing.run(name):
+            result = fn(*args)
+        wall = time.perf_counter() - started
+
+        stage = {
+            "name": name,
+            "wall_s": wall,
+            "depsgraph_s": _update_depsgraph(),
+            "undo_push_s": _undo_push(name),
+            "peak_rss_mb": _peak_rss_mb(),
+            "datablocks_before": before,
+            "datablocks_after": _count_datablocks(),
+            # Разбивка по стадиям аддона (timing.span) внутри этой стадии
+            "spans_ms": dict(timing.get_last_run()["stages"]),
+        }
+        stage["datablocks_delta"] = {
+            key: stage["datablocks_after"][key] - before[key]
+            for key in before if stage["datablocks_after"][key] != before[key]
+        }
+        self.stages.append(stage)
+
+        undo = stage["undo_push_s"]
+        print(f"⏱️ {name:<19} {wall * 1000:10.1f} мс | depsgraph {stage['depsgraph_s'] * 1000:7.2f} мс"
+              f" | undo {'-' if undo is None else f'{undo * 1000:7.2f} мс'}"
+              f" | RSS {stage['peak_rss_mb'] or 0:7.1f} МБ | {stage['datablocks_delta'] or ''}")
+        return result
+
+
+def build_fixture_scene():
+    """Пустая сцена с манекеном из примитивов (объекты, которые видит viewport)"""
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+
+    parts = (
+        ("torso", (0.0, 0.0, 1.25), (0.18, 0.1, 0.3)),
+        ("head", (0.0, 0.0, 1.7), (0.1, 0.1, 0.12)),
+        ("leg.L", (0.1, 0.0, 0.5), (0.07, 0.07, 0.45)),
+        ("leg.R", (-0.1, 0.0, 0.5), (0.07, 0.07, 0.45)),
+        ("arm.L", (0.35, 0.0, 1.3), (0.2, 0.05, 0.05)),
+        ("arm.R", (-0.35, 0.0, 1.3), (0.2, 0.05, 0.05)),
+    )
+    for name, location, scale in parts:
+        bpy.ops.mesh.primitive_cube_add(location=location, scale=scale)
+        bpy.context.active_object.name = f"Mannequin_{name}"
+
+
+def write_fixture_images(directory, count, size):
+    """Кадры последовательности на диске (детекцию заменяет воспроизведение)"""
+    import cv2
+
+    width, height = size
+    rng = np.random.default_rng(0)
+    paths = []
+    for index in range(count):
+        image = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+        path = os.path.join(directory, f"frame_{index:05d}.png")
+        cv2.imwrite(path, image)
+        paths.append(path)
+    return paths
+
+
+def _parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Photo Tool Pro headless harness",
+                                     prog="blender -b --python headless_harness.py --")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES,
+                        help="кадров в пакетном импорте")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS,
+                        help="сколько раз применять позу по фото")
+    parser.add_argument("--image-size", default=f"{DEFAULT_IMAGE_SIZE[0]}x{DEFAULT_IMAGE_SIZE[1]}",
+                        help="размер синтетических кадров, ШxВ")
+    parser.add_argument("--landmarks", default=None, help="записанные точки (F, 33, 4) .npy")
+    parser.add_argument("--output", default=None, help="JSON с отчетом")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = _parse_args()
+    width, height = (int(value) for value in args.image_size.lower().split("x"))
+
+    detection = fixtures.import_addon_module("detection")
+    screenshot_utils = fixtures.import_addon_module("screenshot_utils")
+    model_utils = fixtures.import_addon_module("model_utils")
+    pose_from_photo = fixtures.import_addon_module("pose_from_photo")
+    worker_pool = fixtures.import_addon_module("worker_pool")
+
+    if bpy.data.filepath:
+        print(f"🎬 Сцена: {bpy.data.filepath}")
+    else:
+        build_fixture_scene()
+        print("🎬 Фикстурная сцена")
+
+    if args.landmarks:
+        landmarks = np.load(args.landmarks)
+    else:
+        landmarks = fixtures.synthetic_landmarks(max(args.frames, 1))
+    replay = ReplayDetector(landmarks)
+
+    detection.REPLAY_PROVIDER = replay
+    screenshot_utils.CAPTURE_BACKEND = 'STUB'
+    screenshot_utils.STUB_FRAME_SIZE = (width, height)
+
+    recorder = StageRecorder()
+    temp_dir = tempfile.mkdtemp(prefix="photo_tool_pro_harness_")
+    failed = None
+    try:
+        paths = write_fixture_images(temp_dir, args.frames, (width, height))
+        replay.frame_by_path = {path: i % len(landmarks) for i, path in enumerate(paths)}
+
+        skeleton, _debug_images, error = recorder.run(
+            "create_skeleton", model_utils.create_skeleton_from_viewport, bpy.context
+        )
+        if error or skeleton is None:
+            raise RuntimeError(f"create_skeleton_from_viewport: {error}")
+
+        photo_pose = _photo_pose_runner_class()()
+
+        def apply_pose():
+            for path in paths[:args.repeats] or paths[:1]:
+                success, message = photo_pose._apply_pose_with_relative_rotation(path, skeleton, True)
+                if not success:
+                    raise RuntimeError(message)
+
+        if paths:
+            recorder.run("apply_pose", apply_pose)
+
+        sequence = recorder.run("sequence_detect", pose_from_photo.detect_pose_sequence, paths)
+        keyed = recorder.run("sequence_keyframes", pose_from_photo.apply_pose_sequence,
+                             skeleton, sequence)
+        print(f"🔑 Ключей: {keyed}")
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        failed = str(e)
+    finally:
+        detection.REPLAY_PROVIDER = None
+        worker_pool.shutdown()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    commit, dirty = fixtures.git_commit()
+    report = {
+        "environment": {
+            "commit": commit,
+            "dirty": dirty,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "blender": bpy.app.version_string,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "background": bpy.app.background,
+        },
+        "config": {
+            "frames": args.frames,
+            "repeats": args.repeats,
+            "image_size": [width, height],
+            "landmarks": args.landmarks or "synthetic",
+            "scene": bpy.data.filepath or "fixture",
+        },
+        "replayed_detections": replay.calls,
+        "stages": recorder.stages,
+        "error": failed,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Отчет: {args.output}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
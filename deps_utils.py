@@ -1,32 +1,130 @@
 """
 Утилиты для проверки зависимостей
+
+Наличие пакетов проверяется через importlib.util.find_spec, без импорта:
+импорт mediapipe занимает секунды, а проверка нужна при каждом запуске
+оператора. Результат кэшируется вместе с отметкой версии окружения
+(sys.path и время изменения его папок), поэтому после pip install
+кэш сбрасывается сам.
 """
-import sys
+import importlib.util
 import os
+import site
+import sys
 
-# Автоматическая настройка путей для Blender
-user_site = os.path.expanduser("~\\AppData\\Roaming\\Python\\Python311\\site-packages")
-if user_site not in sys.path:
-    sys.path.insert(0, user_site)
+# Пакеты pip, которые дают модуль (первый - тот, что предлагаем установить)
+PACKAGE_DISTRIBUTIONS = {
+    'cv2': ('opencv-python', 'opencv-contrib-python',
+            'opencv-python-headless', 'opencv-contrib-python-headless'),
+    'mediapipe': ('mediapipe',),
+}
 
 
-def check_deps_quick():
-    """Быстрая проверка зависимостей - возвращает список отсутствующих пакетов"""
+def _user_site():
+    """
+    Папка pip install --user для версии Python, встроенной в Blender
+    (Windows: %APPDATA%\\Python\\PythonXY\\site-packages, Linux/macOS - ~/.local/...).
+    None, если ее не удалось определить.
+    """
+    try:
+        return site.getusersitepackages()
+    except Exception:
+        return None
+
+
+# Пакеты пользователя Python (pip install --user)
+USER_SITE = _user_site()
+
+_spec_cache = {}
+_spec_cache_stamp = None
+
+
+def setup_user_site():
+    """
+    Добавляет USER_SITE в sys.path. Вызывается один раз из register(),
+    а не при импорте модулей. Возвращает True, если путь добавлен.
+    """
+    if not USER_SITE or USER_SITE in sys.path or not os.path.isdir(USER_SITE):
+        return False
+    sys.path.insert(0, USER_SITE)
+    return True
+
+
+def _environment_stamp():
+    """Отметка версии окружения: меняется при правке sys.path и установке пакетов"""
+    stamp = []
+    for path in sys.path:
+        try:
+            stamp.append((path, os.stat(path or os.curdir).st_mtime_ns))
+        except OSError:
+            stamp.append((path, None))
+    return tuple(stamp)
+
+
+def is_available(module_name):
+    """Есть ли модуль в окружении (без импорта, результат кэшируется)"""
+    global _spec_cache_stamp
+
+    stamp = _environment_stamp()
+    if stamp != _spec_cache_stamp:
+        _spec_cache.clear()
+        _spec_cache_stamp = stamp
+        importlib.invalidate_caches()
+
+    available = _spec_cache.get(module_name)
+    if available is None:
+        if module_name in sys.modules:
+            available = True
+        else:
+            try:
+                available = importlib.util.find_spec(module_name) is not None
+            except (ImportError, ValueError):
+                available = False
+        _spec_cache[module_name] = available
+    return available
+
+
+def package_version(module_name):
+    """Версия установленного пакета по метаданным pip (без импорта модуля) или None"""
+    module = sys.modules.get(module_name)
+    if module is not None and hasattr(module, '__version__'):
+        return module.__version__
+
+    from importlib import metadata
+    for distribution in PACKAGE_DISTRIBUTIONS.get(module_name, (module_name,)):
+        try:
+            return metadata.version(distribution)
+        except metadata.PackageNotFoundError:
+            continue
+    return None
+
+
+def check_deps_quick(local_detection=False):
+    """
+    Быстрая проверка зависимостей - возвращает список отсутствующих пакетов.
+    local_detection=True - операция всегда детектирует в процессе Blender
+    (видео с трекингом, пул процессов), сервер детекции ее не заменяет.
+    """
     missing = []
 
-    try:
-        import cv2
-    except ImportError:
+    if not is_available('cv2'):
         missing.append('opencv-python')
 
-    try:
-        import mediapipe
-    except ImportError:
+    # С сервером детекции (или воспроизведением точек) mediapipe не нужен
+    if _mediapipe_needed(local_detection) and not is_available('mediapipe'):
         missing.append('mediapipe')
 
     return missing
 
 
+def _mediapipe_needed(local=False):
+    try:
+        from . import detection
+        return detection.needs_mediapipe(local)
+    except ImportError:
+        return True
+
+
 def check_deps_detailed():
     """Детальная проверка зависимостей - возвращает (отчет, список_отсутствующих)"""
     missing = []
@@ -38,26 +136,22 @@ def check_deps_detailed():
     report_lines.append("")
 
     # Проверяем OpenCV
-    try:
-        import cv2
+    if is_available('cv2'):
         report_lines.append("OpenCV (opencv-python): ✅ INSTALLED")
-        # Некоторые версии OpenCV не имеют __version__
-        if hasattr(cv2, '__version__'):
-            report_lines.append(f"  Version: {cv2.__version__}")
-        else:
-            report_lines.append("  Version: available (no __version__ attribute)")
-    except ImportError:
+        # Версия из метаданных pip; у сборок без них ее нет
+        version = package_version('cv2')
+        report_lines.append(f"  Version: {version or 'available (no package metadata)'}")
+    else:
         report_lines.append("OpenCV (opencv-python): ❌ MISSING")
         missing.append('opencv-python')
 
     report_lines.append("")
 
     # Проверяем MediaPipe
-    try:
-        import mediapipe
+    if is_available('mediapipe'):
         report_lines.append("MediaPipe: ✅ INSTALLED")
-        report_lines.append(f"  Version: {mediapipe.__version__}")
-    except ImportError:
+        report_lines.append(f"  Version: {package_version('mediapipe') or 'unknown'}")
+    else:
         report_lines.append("MediaPipe: ❌ MISSING")
         missing.append('mediapipe')
 
@@ -0,0 +1,301 @@
+"""
+Единая точка детекции позы: кэш точек -> пул прогретых детекторов
+(или внешний сервер детекции, см. BACKEND)
+
+Все операторы аддона вызывают detect_pose() вместо прямой работы с MediaPipe.
+Результат - PoseDetection с массивами NumPy, который сохраняется в
+landmark_cache и повторно используется без обращения к детектору.
+
+Большие кадры перед детекцией готовятся (prepare_frame): быстрая модель
+ищет человека на миниатюре, детектор получает только область вокруг него,
+уменьшенную до INPUT_MAX_SIDE, а точки пересчитываются в доли всего кадра.
+"""
+from collections import namedtuple
+
+from . import detector_registry
+from . import landmark_cache
+from . import log_utils
+from . import model_registry
+from . import timing
+
+log = log_utils.get_logger(__name__)
+
+# Число точек в модели MediaPipe Pose
+NUM_LANDMARKS = 33
+
+# Где выполняется детекция:
+# 'LOCAL'  - MediaPipe в процессе Blender
+# 'SERVER' - только внешний сервер детекции (detection_server.py)
+# 'AUTO'   - сервер, если он запущен, иначе локально
+BACKEND = 'AUTO'
+
+# Воспроизведение записанных точек вместо детекции (headless прогоны, бенчмарки):
+# функция(DecodedFrame) -> PoseDetection. Пока задана, детектор, сервер и кэш
+# не используются, а файл модели и mediapipe не нужны.
+REPLAY_PROVIDER = None
+
+# Подготовка кадра: большая сторона входа детектора не больше INPUT_MAX_SIDE
+INPUT_MAX_SIDE = 1280
+# Вырезать область человека, найденного на миниатюре (только для кадров
+# больше INPUT_MAX_SIDE и одной позы)
+ROI_ENABLED = True
+ROI_PROBE_MAX_SIDE = 320
+# Запас вокруг найденного человека, доля большей стороны его рамки
+ROI_MARGIN = 0.25
+
+# Каскад моделей (model_variant = CASCADE): сначала быстрая LITE, повтор на
+# CASCADE_ESCALATE_TO только для кадров, где ключевые точки неуверенны
+CASCADE = 'CASCADE'
+CASCADE_ESCALATE_TO = 'HEAVY'
+# Порог уверенности ключевой точки: min(visibility, presence)
+CASCADE_MIN_CONFIDENCE = 0.5
+# Сколько из 13 ключевых точек может быть ниже порога без повтора
+CASCADE_MAX_WEAK_POINTS = 1
+
+# Точка в формате, совместимом с результатом MediaPipe (landmark.x, landmark.y, ...)
+Landmark = namedtuple("Landmark", ["x", "y", "z", "visibility", "presence"])
+
+
+class PoseDetection:
+    """
+    Результат детекции.
+    normalized - (P, 33, 4) float32: x, y (доли кадра), z, visibility
+    world      - (P, 33, 4) float32: x, y, z в метрах, visibility
+    presence   - (P, 33) float32
+    где P - число найденных людей (0, если поза не найдена).
+    """
+
+    def __init__(self, normalized, world, presence):
+        self.normalized = normalized
+        self.world = world
+        self.presence = presence
+        self._pose_landmarks = None
+        self._pose_world_landmarks = None
+
+    @classmethod
+    def from_mediapipe(cls, result):
+        from . import detection_protocol
+        return cls(*detection_protocol.result_arrays(result))
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays["normalized"], arrays["world"], arrays["presence"])
+
+    def to_arrays(self):
+        return {"normalized": self.normalized, "world": self.world, "presence": self.presence}
+
+    @staticmethod
+    def _as_landmarks(array, presence):
+        return [
+            [Landmark(float(x), float(y), float(z), float(v), float(pr))
+             for (x, y, z, v), pr in zip(pose, pose_presence)]
+            for pose, pose_presence in zip(array, presence)
+        ]
+
+    @property
+    def pose_landmarks(self):
+        """Список поз в виде точек с .x/.y/.z/.visibility (как в MediaPipe)"""
+        if self._pose_landmarks is None:
+            self._pose_landmarks = self._as_landmarks(self.normalized, self.presence)
+        return self._pose_landmarks
+
+    @property
+    def pose_world_landmarks(self):
+        if self._pose_world_landmarks is None:
+            self._pose_world_landmarks = self._as_landmarks(self.world, self.presence)
+        return self._pose_world_landmarks
+
+
+def use_server():
+    """Выполнять ли детекцию на внешнем сервере"""
+    if BACKEND == 'LOCAL':
+        return False
+    if BACKEND == 'SERVER':
+        return True
+
+    from . import detection_client
+    return detection_client.is_available()
+
+
+def replay_active():
+    """Подменена ли детекция воспроизведением (REPLAY_PROVIDER)"""
+    return REPLAY_PROVIDER is not None
+
+
+def needs_mediapipe(local=False):
+    """
+    Нужен ли mediapipe в процессе Blender.
+    local=True - путь, который всегда детектирует сам (видео с трекингом,
+    живой поток, пул процессов): сервер и воспроизведение его не заменяют.
+    """
+    if local:
+        return True
+    return not replay_active() and not use_server()
+
+
+def _frame_hash(frame):
+    """Хэш содержимого кадра: по файлу, если он есть, иначе по пикселям"""
+    if frame.path:
+        return landmark_cache.hash_file(frame.path)
+    rgb = frame.rgb
+    return landmark_cache.hash_bytes(str(rgb.shape).encode(), rgb.tobytes())
+
+
+def _use_roi(frame, num_poses):
+    return ROI_ENABLED and num_poses == 1 and max(frame.height, frame.width) > INPUT_MAX_SIDE
+
+
+def preprocess_options(frame, num_poses=1):
+    """Параметры подготовки кадра для ключа кэша: от них зависят точки"""
+    roi = (ROI_PROBE_MAX_SIDE, ROI_MARGIN) if _use_roi(frame, num_poses) else None
+    return (frame.shape[:2], INPUT_MAX_SIDE, roi)
+
+
+def person_box(frame, min_confidence=0.5, use_cache=True):
+    """
+    Рамка человека (x0, y0, x1, y1) в долях исходного фото с запасом ROI_MARGIN:
+    быстрая модель на миниатюре ROI_PROBE_MAX_SIDE. None, если никого нет.
+    """
+    probe_path = model_registry.resolve('LITE')
+    if probe_path is None:
+        return None
+
+    probe = frame.downscaled(ROI_PROBE_MAX_SIDE)
+    with timing.span("roi.probe"):
+        result = detect_pose(probe, probe_path, min_confidence, 1, use_cache, preprocess=False)
+    if len(result.normalized) == 0:
+        return None
+
+    # Все 33 точки: MediaPipe дает положение и невидимых частей тела
+    points = probe.map_to_source(result.normalized[0])
+    x0, y0 = points[:, 0].min(), points[:, 1].min()
+    x1, y1 = points[:, 0].max(), points[:, 1].max()
+    margin = ROI_MARGIN * max(x1 - x0, y1 - y0)
+    box = (max(0.0, x0 - margin), max(0.0, y0 - margin),
+           min(1.0, x1 + margin), min(1.0, y1 + margin))
+    if box[2] <= box[0] or box[3] <= box[1]:
+        return None
+    return tuple(float(value) for value in box)
+
+
+def prepare_frame(frame, min_confidence=0.5, num_poses=1, use_cache=True):
+    """
+    Кадр для детектора: область человека (если кадр большой) не больше
+    INPUT_MAX_SIDE. Точки с него переводятся в доли всего фото через map_to_source.
+    """
+    box = person_box(frame, min_confidence, use_cache) if _use_roi(frame, num_poses) else None
+    with timing.span("preprocess"):
+        if box is not None:
+            frame = frame.crop(box)
+        return frame.downscaled(INPUT_MAX_SIDE)
+
+
+def cache_key(frame, model_path, min_confidence=0.5, num_poses=1, preprocess=True):
+    """Ключ кэша точек для кадра: хэш изображения, хэш модели, параметры детектора и подготовки"""
+    options = detector_registry.make_key(model_path, 'IMAGE', min_confidence, num_poses)
+    return landmark_cache.make_key(
+        _frame_hash(frame),
+        model_registry.model_hash(model_path),
+        # Путь к модели заменен ее хэшем
+        options[1:] + (preprocess_options(frame, num_poses) if preprocess else (None,),),
+    )
+
+
+def detect_pose(frame, model_path, min_confidence=0.5, num_poses=1, use_cache=True,
+                preprocess=True):
+    """
+    Детекция позы на декодированном кадре (image_frame.DecodedFrame).
+    Сначала проверяется дисковый кэш, при промахе используется прогретый детектор.
+    preprocess - готовить кадр (prepare_frame); False - детектор получает кадр как есть.
+    Возвращает PoseDetection (pose_landmarks пустой, если поза не найдена),
+    точки - в долях всего исходного фото.
+    """
+    if REPLAY_PROVIDER is not None:
+        return REPLAY_PROVIDER(frame)
+
+    def run_detector():
+        work = prepare_frame(frame, min_confidence, num_poses, use_cache) if preprocess else frame
+
+        if use_server():
+            # Сервер держит свой прогретый детектор, mediapipe здесь не импортируется
+            from . import detection_client
+            with timing.span("inference", backend="server"):
+                arrays = detection_client.detect(work.rgb, model_path, min_confidence, num_poses)
+        else:
+            with detector_registry.acquire(model_path, min_confidence=min_confidence,
+                                           num_poses=num_poses) as detector:
+                mp_image = work.mp_image()
+                with timing.span("inference", backend="local"):
+                    result = detector.detect(mp_image)
+            arrays = PoseDetection.from_mediapipe(result).to_arrays()
+
+        arrays["normalized"] = work.map_to_source(arrays["normalized"])
+        return arrays
+
+    if not use_cache:
+        return PoseDetection.from_arrays(run_detector())
+
+    key = cache_key(frame, model_path, min_confidence, num_poses, preprocess)
+    arrays, cached = landmark_cache.get_or_compute(key, run_detector)
+    if cached:
+        log.debug("⚡ Точки взяты из кэша, детекция пропущена")
+
+    return PoseDetection.from_arrays(arrays)
+
+
+# --- Каскад моделей -----------------------------------------------------------
+
+def key_point_confidence(result):
+    """
+    Уверенность 13 ключевых точек первой позы: min(visibility, presence), (13,).
+    None, если поза не найдена.
+    """
+    import numpy as np
+    from . import pose_core
+
+    if len(result.normalized) == 0:
+        return None
+    indices = pose_core.KEY_POINT_INDICES
+    return np.minimum(result.normalized[0, indices, 3], result.presence[0, indices])
+
+
+def needs_escalation(confidence):
+    """
+    Нужен ли повтор на точной модели: поза не найдена или больше
+    CASCADE_MAX_WEAK_POINTS ключевых точек ниже CASCADE_MIN_CONFIDENCE.
+    confidence - (13,) из key_point_confidence (или visibility), None - позы нет.
+    """
+    import numpy as np
+
+    if confidence is None:
+        return True
+    confidence = np.nan_to_num(confidence, nan=0.0)
+    return int((confidence < CASCADE_MIN_CONFIDENCE).sum()) > CASCADE_MAX_WEAK_POINTS
+
+
+def cascade_models():
+    """(путь быстрой модели, путь точной модели); пути совпадают, если есть только одна модель"""
+    return (model_registry.resolve('LITE'),
+            model_registry.resolve(CASCADE_ESCALATE_TO))
+
+
+def detect_pose_cascade(frame, min_confidence=0.5, num_poses=1, use_cache=True):
+    """
+    Детекция каскадом: LITE, а для неуверенных кадров - CASCADE_ESCALATE_TO.
+    Возвращает (PoseDetection, escalated).
+    """
+    if REPLAY_PROVIDER is not None:
+        return REPLAY_PROVIDER(frame), False
+
+    fast_path, accurate_path = cascade_models()
+    if fast_path == accurate_path:
+        return detect_pose(frame, accurate_path, min_confidence, num_poses, use_cache), False
+
+    result = detect_pose(frame, fast_path, min_confidence, num_poses, use_cache)
+    if not needs_escalation(key_point_confidence(result)):
+        return result, False
+
+    with timing.span("cascade.escalate"):
+        accurate = detect_pose(frame, accurate_path, min_confidence, num_poses, use_cache)
+    # Точная модель позу не нашла - остается результат быстрой
+    return (accurate if len(accurate.normalized) else result), True
@@ -0,0 +1,156 @@
+"""
+Клиент сервера детекции (detection_server.py)
+
+Кадр отправляется сырыми RGB байтами, в ответ приходят массивы точек в том
+же формате, что PoseDetection.to_arrays(). Соединение держится открытым
+отдельно для каждого потока и переоткрывается после разрыва.
+"""
+import os
+import socket
+import threading
+import time
+
+from . import detection_protocol as protocol
+
+# Адрес сервера: "host:port" или "unix:/путь/к/сокету"
+SERVER_ADDRESS = os.environ.get("PHOTO_TOOL_PRO_SERVER", "127.0.0.1:8765")
+
+# Таймауты: подключение к локальному серверу мгновенное, детекция - нет
+CONNECT_TIMEOUT = 0.2
+REQUEST_TIMEOUT = 30.0
+
+# Как долго доверять результату проверки доступности сервера
+AVAILABILITY_TTL = 5.0
+
+_local = threading.local()
+_availability = {"value": False, "checked": 0.0}
+_availability_lock = threading.Lock()
+_server_process = None
+
+
+def _connect():
+    if SERVER_ADDRESS.startswith("unix:"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        address = SERVER_ADDRESS[len("unix:"):]
+    else:
+        host, _, port = SERVER_ADDRESS.rpartition(":")
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        address = (host, int(port))
+
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    sock.settimeout(REQUEST_TIMEOUT)
+    return sock
+
+
+def _get_socket():
+    sock = getattr(_local, "sock", None)
+    if sock is None:
+        sock = _connect()
+        _local.sock = sock
+    return sock
+
+
+def _drop_socket():
+    sock = getattr(_local, "sock", None)
+    _local.sock = None
+    if sock is not None:
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+
+def _request(message_type, *chunks):
+    """Запрос с одной повторной попыткой, если сервер закрыл старое соединение"""
+    for attempt in range(2):
+        try:
+            sock = _get_socket()
+            protocol.send_message(sock, message_type, *chunks)
+            return protocol.recv_message(sock)
+        except (OSError, protocol.ProtocolError):
+            _drop_socket()
+            if attempt:
+                raise
+
+
+def ping():
+    """True, если сервер отвечает на PING совместимой версией протокола"""
+    try:
+        message_type, payload = _request(protocol.MSG_PING)
+    except (OSError, protocol.ProtocolError):
+        return False
+
+    if message_type != protocol.MSG_PONG:
+        return False
+    (version,) = protocol.PONG_PAYLOAD.unpack_from(payload, 0)
+    return version == protocol.PROTOCOL_VERSION
+
+
+def is_available(force=False):
+    """Доступен ли сервер (результат кэшируется на AVAILABILITY_TTL секунд)"""
+    now = time.monotonic()
+    with _availability_lock:
+        if not force and now - _availability["checked"] < AVAILABILITY_TTL:
+            return _availability["value"]
+
+    value = ping()
+    with _availability_lock:
+        _availability["value"] = value
+        _availability["checked"] = time.monotonic()
+    return value
+
+
+def detect(rgb, model_path, min_confidence=0.5, num_poses=1):
+    """
+    Детекция на сервере. rgb - (H, W, 3) uint8.
+    Возвращает словарь массивов normalized, world, presence.
+    """
+    message_type, payload = _request(
+        protocol.MSG_DETECT,
+        *protocol.encode_detect_request(rgb, model_path, min_confidence, num_poses)
+    )
+
+    if message_type == protocol.MSG_ERROR:
+        raise RuntimeError(f"Сервер детекции: {bytes(payload).decode('utf-8', 'replace')}")
+    if message_type != protocol.MSG_RESULT:
+        raise protocol.ProtocolError(f"Неожиданный ответ сервера: {message_type}")
+
+    return protocol.decode_result(payload)
+
+
+def start_server(python_executable, idle_exit=0.0):
+    """
+    Запускает detection_server.py в отдельном Python (с установленным mediapipe).
+    Сервер переживает Blender и может обслуживать несколько его экземпляров.
+    """
+    import subprocess
+
+    global _server_process
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "detection_server.py")
+    command = [python_executable, script]
+
+    if SERVER_ADDRESS.startswith("unix:"):
+        command += ["--unix", SERVER_ADDRESS[len("unix:"):]]
+    else:
+        host, _, port = SERVER_ADDRESS.rpartition(":")
+        command += ["--host", host, "--port", port]
+    if idle_exit:
+        command += ["--idle-exit", str(idle_exit)]
+
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS
+    else:
+        kwargs["start_new_session"] = True
+
+    _server_process = subprocess.Popen(command, **kwargs)
+    with _availability_lock:
+        _availability["checked"] = 0.0
+    return _server_process
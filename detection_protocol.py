@@ -0,0 +1,196 @@
+"""
+Бинарный протокол между аддоном и сервером детекции (detection_server.py)
+
+Модуль не зависит от bpy и от остальных модулей аддона, поэтому его
+импортирует и аддон, и сервер, запущенный в отдельном Python.
+
+Сообщение: заголовок !4sBI (MAGIC, тип, длина данных) + данные.
+  PING    - пусто
+  PONG    - версия протокола (!H)
+  DETECT  - !HHBfBH (ширина, высота, каналы, порог, num_poses, длина пути)
+            + путь к модели (utf-8) + сырые RGB пиксели (uint8)
+  RESULT  - !B число поз P + normalized (P, 33, 4) + world (P, 33, 4)
+            + presence (P, 33), все float32 little-endian
+  ERROR   - текст ошибки (utf-8)
+
+Потоковый ввод (stream_ingest.py), ответа не требует:
+  STREAM_FRAME     - !dHHB (время захвата, ширина, высота, каналы) + RGB пиксели
+  STREAM_LANDMARKS - !dB (время захвата, число поз P) + normalized (P, 33, 4) float32
+"""
+import struct
+
+import numpy as np
+
+MAGIC = b"PTP1"
+PROTOCOL_VERSION = 1
+
+HEADER = struct.Struct("!4sBI")
+DETECT_HEADER = struct.Struct("!HHBfBH")
+RESULT_HEADER = struct.Struct("!B")
+PONG_PAYLOAD = struct.Struct("!H")
+
+MSG_PING = 1
+MSG_PONG = 2
+MSG_DETECT = 3
+MSG_RESULT = 4
+MSG_ERROR = 5
+MSG_STREAM_FRAME = 6
+MSG_STREAM_LANDMARKS = 7
+
+STREAM_FRAME_HEADER = struct.Struct("!dHHB")
+STREAM_LANDMARKS_HEADER = struct.Struct("!dB")
+
+# Защита от мусора в сокете: кадр 8K RGB с запасом
+MAX_PAYLOAD = 256 * 1024 * 1024
+
+NUM_LANDMARKS = 33
+_FLOAT = np.dtype("<f4")
+
+
+class ProtocolError(Exception):
+    """Нарушение формата сообщения или разрыв соединения"""
+
+
+def send_message(sock, message_type, *chunks):
+    """Отправляет сообщение; большие буферы (пиксели) уходят без склейки"""
+    size = sum(len(memoryview(chunk).cast("B")) for chunk in chunks)
+    sock.sendall(HEADER.pack(MAGIC, message_type, size))
+    for chunk in chunks:
+        sock.sendall(chunk)
+
+
+def recv_exact(sock, size):
+    """Читает ровно size байт в один буфер"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            raise ProtocolError("Соединение закрыто")
+        received += count
+    return buffer
+
+
+def recv_message(sock):
+    """Читает сообщение. Возвращает (тип, данные)."""
+    magic, message_type, size = HEADER.unpack(recv_exact(sock, HEADER.size))
+    if magic != MAGIC:
+        raise ProtocolError("Неверная сигнатура сообщения")
+    if size > MAX_PAYLOAD:
+        raise ProtocolError(f"Слишком большое сообщение: {size} байт")
+    return message_type, recv_exact(sock, size)
+
+
+def encode_detect_request(rgb, model_path, min_confidence, num_poses):
+    """Части сообщения DETECT для send_message (пиксели не копируются)"""
+    rgb = np.ascontiguousarray(rgb, dtype=np.uint8)
+    height, width = rgb.shape[:2]
+    channels = rgb.shape[2] if rgb.ndim == 3 else 1
+    path = model_path.encode("utf-8")
+    header = DETECT_HEADER.pack(width, height, channels, float(min_confidence), int(num_poses), len(path))
+    return header, path, memoryview(rgb).cast("B")
+
+
+def decode_detect_request(payload):
+    """DETECT -> (rgb (H, W, C) uint8 без копирования, model_path, min_confidence, num_poses)"""
+    width, height, channels, min_confidence, num_poses, path_size = \
+        DETECT_HEADER.unpack_from(payload, 0)
+    offset = DETECT_HEADER.size
+    model_path = bytes(payload[offset:offset + path_size]).decode("utf-8")
+    offset += path_size
+
+    expected = width * height * channels
+    if len(payload) - offset != expected:
+        raise ProtocolError("Размер кадра не совпадает с заголовком")
+
+    rgb = np.frombuffer(payload, dtype=np.uint8, count=expected, offset=offset)
+    return rgb.reshape(height, width, channels), model_path, min_confidence, num_poses
+
+
+def result_arrays(result):
+    """
+    Результат MediaPipe PoseLandmarker -> (normalized (P, 33, 4), world (P, 33, 4),
+    presence (P, 33)) float32 - общий формат аддона, сервера и пула процессов
+    """
+    poses = len(result.pose_landmarks)
+    normalized = np.zeros((poses, NUM_LANDMARKS, 4), dtype=np.float32)
+    world = np.zeros((poses, NUM_LANDMARKS, 4), dtype=np.float32)
+    presence = np.zeros((poses, NUM_LANDMARKS), dtype=np.float32)
+
+    for p, landmarks in enumerate(result.pose_landmarks):
+        for i, lm in enumerate(landmarks[:NUM_LANDMARKS]):
+            normalized[p, i] = (lm.x, lm.y, lm.z, lm.visibility or 0.0)
+            presence[p, i] = lm.presence or 0.0
+
+    for p, landmarks in enumerate(result.pose_world_landmarks or []):
+        for i, lm in enumerate(landmarks[:NUM_LANDMARKS]):
+            world[p, i] = (lm.x, lm.y, lm.z, lm.visibility or 0.0)
+
+    return normalized, world, presence
+
+
+def encode_result(normalized, world, presence):
+    """Части сообщения RESULT"""
+    poses = len(normalized)
+    return (
+        RESULT_HEADER.pack(poses),
+        np.ascontiguousarray(normalized, dtype=_FLOAT).tobytes(),
+        np.ascontiguousarray(world, dtype=_FLOAT).tobytes(),
+        np.ascontiguousarray(presence, dtype=_FLOAT).tobytes(),
+    )
+
+
+def decode_result(payload):
+    """RESULT -> словарь массивов normalized, world, presence (как PoseDetection.to_arrays)"""
+    (poses,) = RESULT_HEADER.unpack_from(payload, 0)
+    offset = RESULT_HEADER.size
+    points = poses * NUM_LANDMARKS
+
+    def take(count, shape):
+        nonlocal offset
+        array = np.frombuffer(payload, dtype=_FLOAT, count=count, offset=offset).reshape(shape)
+        offset += count * _FLOAT.itemsize
+        return array.astype(np.float32)
+
+    normalized = take(points * 4, (poses, NUM_LANDMARKS, 4))
+    world = take(points * 4, (poses, NUM_LANDMARKS, 4))
+    presence = take(points, (poses, NUM_LANDMARKS))
+    return {"normalized": normalized, "world": world, "presence": presence}
+
+
+def encode_stream_frame(rgb, capture_time):
+    """Части сообщения STREAM_FRAME (capture_time - time.time() отправителя)"""
+    rgb = np.ascontiguousarray(rgb, dtype=np.uint8)
+    height, width = rgb.shape[:2]
+    channels = rgb.shape[2] if rgb.ndim == 3 else 1
+    return (STREAM_FRAME_HEADER.pack(float(capture_time), width, height, channels),
+            memoryview(rgb).cast("B"))
+
+
+def decode_stream_frame(payload):
+    """STREAM_FRAME -> (rgb (H, W, C) uint8, capture_time)"""
+    capture_time, width, height, channels = STREAM_FRAME_HEADER.unpack_from(payload, 0)
+    expected = width * height * channels
+    if len(payload) - STREAM_FRAME_HEADER.size != expected:
+        raise ProtocolError("Размер кадра не совпадает с заголовком")
+    rgb = np.frombuffer(payload, dtype=np.uint8, count=expected, offset=STREAM_FRAME_HEADER.size)
+    return rgb.reshape(height, width, channels), capture_time
+
+
+def encode_stream_landmarks(normalized, capture_time):
+    """Части сообщения STREAM_LANDMARKS; normalized - (P, 33, 4) или (33, 4)"""
+    normalized = np.ascontiguousarray(normalized, dtype=_FLOAT).reshape(-1, NUM_LANDMARKS, 4)
+    return (STREAM_LANDMARKS_HEADER.pack(float(capture_time), len(normalized)),
+            normalized.tobytes())
+
+
+def decode_stream_landmarks(payload):
+    """STREAM_LANDMARKS -> (normalized (P, 33, 4) float32, capture_time)"""
+    capture_time, poses = STREAM_LANDMARKS_HEADER.unpack_from(payload, 0)
+    count = poses * NUM_LANDMARKS * 4
+    if len(payload) - STREAM_LANDMARKS_HEADER.size != count * _FLOAT.itemsize:
+        raise ProtocolError("Размер пакета точек не совпадает с заголовком")
+    normalized = np.frombuffer(payload, dtype=_FLOAT, count=count,
+                               offset=STREAM_LANDMARKS_HEADER.size)
+    return normalized.reshape(poses, NUM_LANDMARKS, 4).astype(np.float32), capture_time
@@ -0,0 +1,193 @@
+"""
+Сервер детекции позы Photo Tool Pro (отдельный процесс)
+
+Запускается в своем Python с установленными mediapipe и numpy, держит
+детекторы прогретыми между сессиями Blender и обслуживает несколько
+экземпляров Blender одновременно. Аддон в этом режиме не импортирует
+mediapipe вовсе.
+
+Запуск:
+    python detection_server.py                       # 127.0.0.1:8765
+    python detection_server.py --port 9000
+    python detection_server.py --unix /tmp/photo_tool_pro.sock
+    python detection_server.py --models-dir D:/models
+
+Клиент передает путь к своей модели, но сервер открывает только файл
+.task с тем же именем из своих папок моделей (--models-dir, переменная
+PHOTO_TOOL_PRO_MODELS, папка models рядом со скриптом и сама эта папка).
+
+Протокол - detection_protocol.py.
+"""
+import argparse
+import os
+import socketserver
+import sys
+import threading
+import time
+
+try:
+    from . import detection_protocol as protocol
+    from . import detector_registry
+except ImportError:
+    # Запуск как отдельного скрипта из папки аддона
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import detection_protocol as protocol
+    import detector_registry
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Переменная окружения с папкой моделей (как model_registry.MODELS_DIR_ENV)
+MODELS_DIR_ENV = "PHOTO_TOOL_PRO_MODELS"
+MODEL_EXTENSION = ".task"
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Папки, из которых сервер открывает модели (main() дополняет --models-dir)
+MODEL_DIRS = [
+    path for path in (os.environ.get(MODELS_DIR_ENV), os.path.join(SERVER_DIR, "models"), SERVER_DIR)
+    if path
+]
+
+# Время последнего запроса (для --idle-exit)
+_last_request = time.monotonic()
+_stats = {"requests": 0, "errors": 0}
+_stats_lock = threading.Lock()
+
+
+def resolve_model(requested):
+    """
+    Файл модели на сервере по имени из запроса. Путь клиента не открывается:
+    берется только имя файла .task, и оно ищется в MODEL_DIRS.
+    """
+    name = os.path.basename(requested.replace("\\", "/"))
+    if not name.lower().endswith(MODEL_EXTENSION) or name.startswith("."):
+        raise ValueError(f"Недопустимое имя модели: {name!r}")
+
+    for directory in MODEL_DIRS:
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            return path
+    raise FileNotFoundError(f"Модель {name} не найдена в папках моделей сервера")
+
+
+def _detect(rgb, requested_model, min_confidence, num_poses):
+    """Детекция прогретым детектором из пула сервера"""
+    import mediapipe as mp
+    import numpy as np
+
+    model_path = resolve_model(requested_model)
+
+    mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(rgb))
+    with detector_registry.acquire(model_path, min_confidence=min_confidence,
+                                   num_poses=num_poses) as detector:
+        result = detector.detect(mp_image)
+
+    return protocol.result_arrays(result)
+
+
+class DetectionHandler(socketserver.BaseRequestHandler):
+    """Одно соединение = один клиент; запросы обрабатываются по очереди"""
+
+    def handle(self):
+        global _last_request
+
+        sock = self.request
+        while True:
+            try:
+                message_type, payload = protocol.recv_message(sock)
+            except (protocol.ProtocolError, ConnectionError, OSError):
+                return
+
+            _last_request = time.monotonic()
+
+            if message_type == protocol.MSG_PING:
+                protocol.send_message(sock, protocol.MSG_PONG,
+                                      protocol.PONG_PAYLOAD.pack(protocol.PROTOCOL_VERSION))
+                continue
+
+            if message_type != protocol.MSG_DETECT:
+                protocol.send_message(sock, protocol.MSG_ERROR, b"Unknown message type")
+                continue
+
+            try:
+                rgb, model_path, min_confidence, num_poses = protocol.decode_detect_request(payload)
+                arrays = _detect(rgb, model_path, min_confidence, num_poses)
+                protocol.send_message(sock, protocol.MSG_RESULT, *protocol.encode_result(*arrays))
+                with _stats_lock:
+                    _stats["requests"] += 1
+            except Exception as e:
+                with _stats_lock:
+                    _stats["errors"] += 1
+                protocol.send_message(sock, protocol.MSG_ERROR, str(e).encode("utf-8"))
+
+
+class ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def _make_server(args):
+    if args.unix:
+        if not hasattr(socketserver, "UnixStreamServer"):
+            raise SystemExit("Unix сокеты недоступны на этой платформе")
+
+        class ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        if os.path.exists(args.unix):
+            os.remove(args.unix)
+        return ThreadingUnixServer(args.unix, DetectionHandler), args.unix
+
+    server = ThreadingTCPServer((args.host, args.port), DetectionHandler)
+    return server, f"{args.host}:{args.port}"
+
+
+def _watch_idle(server, idle_exit):
+    """Останавливает сервер после idle_exit секунд без запросов"""
+    while True:
+        time.sleep(min(idle_exit, 5.0))
+        detector_registry.evict_idle()
+        if time.monotonic() - _last_request > idle_exit:
+            print(f"💤 Нет запросов {idle_exit:.0f} с, сервер останавливается")
+            server.shutdown()
+            return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Photo Tool Pro detection server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None, help="путь Unix сокета вместо TCP")
+    parser.add_argument("--idle-exit", type=float, default=0.0,
+                        help="остановиться после N секунд без запросов (0 - никогда)")
+    parser.add_argument("--models-dir", action="append", default=[],
+                        help="папка с файлами .task (можно указать несколько раз)")
+    args = parser.parse_args(argv)
+
+    MODEL_DIRS[:0] = [os.path.abspath(path) for path in args.models_dir]
+
+    # Импорт mediapipe заранее, чтобы первый запрос не ждал
+    import mediapipe  # noqa: F401
+
+    server, address = _make_server(args)
+    print(f"🚀 Сервер детекции Photo Tool Pro: {address}")
+    print(f"📁 Папки моделей: {', '.join(MODEL_DIRS)}")
+
+    if args.idle_exit > 0:
+        threading.Thread(target=_watch_idle, args=(server, args.idle_exit), daemon=True).start()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        detector_registry.close_all()
+        if args.unix and os.path.exists(args.unix):
+            os.remove(args.unix)
+        print(f"👋 Сервер остановлен (запросов: {_stats['requests']}, ошибок: {_stats['errors']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Общий реестр прогретых детекторов MediaPipe PoseLandmarker
+
+Загрузка модели стоит дороже, чем сам вызов detect(), поэтому детекторы
+не закрываются после каждого кадра, а возвращаются в пул и переиспользуются
+всеми операторами аддона. Пул разделен по ключу
+(путь к модели, режим работы, пороги уверенности, num_poses).
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    from . import log_utils
+    from . import timing
+except ImportError:
+    # Запуск вне пакета аддона (detection_server.py как скрипт)
+    import log_utils
+    import timing
+
+log = log_utils.get_logger(__name__)
+
+# Сколько свободных детекторов держим в памяти одновременно (LRU)
+MAX_IDLE_DETECTORS = 4
+
+# Через сколько секунд простоя детектор закрывается
+IDLE_TIMEOUT = 300.0
+
+# Ключ -> список свободных записей [(landmarker, время последнего использования)]
+_idle = OrderedDict()
+# Количество выданных, но еще не возвращенных детекторов
+_in_use = 0
+# Последняя метка времени VIDEO детектора: id(landmarker) -> мс.
+# MediaPipe требует строго возрастающих меток на всем времени жизни детектора,
+# а детектор из пула переиспользуется разными клипами
+_last_timestamps = {}
+_lock = threading.Lock()
+
+
+def make_key(model_path, running_mode='IMAGE', min_confidence=0.5, num_poses=1,
+             min_detection_confidence=None, min_presence_confidence=None,
+             min_tracking_confidence=None):
+    """
+    Формирует ключ пула. Если отдельные пороги не заданы,
+    все три берутся из min_confidence (как это делалось в аддоне раньше).
+    """
+    detection = min_confidence if min_detection_confidence is None else min_detection_confidence
+    presence = min_confidence if min_presence_confidence is None else min_presence_confidence
+    tracking = min_confidence if min_tracking_confidence is None else min_tracking_confidence
+
+    return (
+        os.path.normpath(model_path),
+        running_mode,
+        round(float(detection), 4),
+        round(float(presence), 4),
+        round(float(tracking), 4),
+        int(num_poses),
+    )
+
+
+def _create_landmarker(key):
+    """Создает новый PoseLandmarker для ключа пула"""
+    from mediapipe.tasks import python
+    from mediapipe.tasks.python import vision
+
+    model_path, running_mode, detection, presence, tracking, num_poses = key
+
+    base_options = python.BaseOptions(model_asset_path=model_path)
+    options = vision.PoseLandmarkerOptions(
+        base_options=base_options,
+        running_mode=getattr(vision.RunningMode, running_mode),
+        output_segmentation_masks=False,
+        num_poses=num_poses,
+        min_pose_detection_confidence=detection,
+        min_pose_presence_confidence=presence,
+        min_tracking_confidence=tracking
+    )
+    with timing.span("model_load", model=os.path.basename(model_path)):
+        return vision.PoseLandmarker.create_from_options(options)
+
+
+def _close_quietly(landmarker):
+    with _lock:
+        _last_timestamps.pop(id(landmarker), None)
+    try:
+        landmarker.close()
+    except Exception as e:
+        log.warning(f"⚠️ Ошибка при закрытии детектора: {e}")
+
+
+def _pop_expired_locked(now):
+    """Убирает из пула просроченные и лишние детекторы. Вызывается под _lock."""
+    expired = []
+
+    for key in list(_idle.keys()):
+        entries = _idle[key]
+        alive = []
+        for landmarker, last_used in entries:
+            if now - last_used > IDLE_TIMEOUT:
+                expired.append(landmarker)
+            else:
+                alive.append((landmarker, last_used))
+        if alive:
+            _idle[key] = alive
+        else:
+            del _idle[key]
+
+    # LRU: ключи в _idle упорядочены от давно использованных к недавним
+    while sum(len(entries) for entries in _idle.values()) > MAX_IDLE_DETECTORS:
+        key, entries = next(iter(_idle.items()))
+        landmarker, _ = entries.pop(0)
+        expired.append(landmarker)
+        if not entries:
+            del _idle[key]
+
+    return expired
+
+
+def checkout(key):
+    """Берет свободный детектор из пула или создает новый"""
+    global _in_use
+
+    with _lock:
+        expired = _pop_expired_locked(time.monotonic())
+        landmarker = None
+        entries = _idle.get(key)
+        if entries:
+            landmarker, _ = entries.pop()
+            if not entries:
+                del _idle[key]
+        _in_use += 1
+
+    for old in expired:
+        _close_quietly(old)
+
+    if landmarker is not None:
+        return landmarker
+
+    try:
+        log.info(f"🔄 Загружаем модель: {os.path.basename(key[0])} ({key[1]})")
+        return _create_landmarker(key)
+    except Exception:
+        with _lock:
+            _in_use -= 1
+        raise
+
+
+def checkin(key, landmarker):
+    """Возвращает детектор в пул"""
+    global _in_use
+
+    with _lock:
+        _in_use -= 1
+        entries = _idle.pop(key, [])
+        entries.append((landmarker, time.monotonic()))
+        _idle[key] = entries
+        expired = _pop_expired_locked(time.monotonic())
+
+    for old in expired:
+        _close_quietly(old)
+
+
+def timeline_offset(landmarker, first_timestamp_ms=0):
+    """
+    Сдвиг меток времени клипа для VIDEO детектора: first_timestamp_ms + сдвиг
+    строго больше последней метки, которую этот детектор уже видел.
+    """
+    with _lock:
+        last = _last_timestamps.get(id(landmarker))
+    if last is None or first_timestamp_ms > last:
+        return 0
+    return last + 1 - first_timestamp_ms
+
+
+def record_timestamp(landmarker, timestamp_ms):
+    """Запоминает последнюю метку времени, переданную в detect_for_video"""
+    with _lock:
+        _last_timestamps[id(landmarker)] = timestamp_ms
+
+
+@contextmanager
+def acquire(model_path, running_mode='IMAGE', min_confidence=0.5, num_poses=1, **thresholds):
+    """
+    Выдает прогретый детектор на время блока with.
+
+    Пример:
+        with detector_registry.acquire(model_path, min_confidence=0.3) as detector:
+            result = detector.detect(mp_image)
+
+    Если detect() выбросил исключение, детектор закрывается, а не возвращается в пул.
+    """
+    global _in_use
+
+    key = make_key(model_path, running_mode, min_confidence, num_poses, **thresholds)
+    landmarker = checkout(key)
+    try:
+        yield landmarker
+    except BaseException:
+        with _lock:
+            _in_use -= 1
+        _close_quietly(landmarker)
+        raise
+    else:
+        checkin(key, landmarker)
+
+
+def evict_idle():
+    """Закрывает детекторы, простаивающие дольше IDLE_TIMEOUT"""
+    with _lock:
+        expired = _pop_expired_locked(time.monotonic())
+
+    for landmarker in expired:
+        _close_quietly(landmarker)
+
+    if expired:
+        log.info(f"💤 Закрыто простаивающих детекторов: {len(expired)}")
+    return len(expired)
+
+
+def close_all():
+    """Закрывает все свободные детекторы (вызывается при отключении аддона)"""
+    with _lock:
+        landmarkers = [landmarker for entries in _idle.values() for landmarker, _ in entries]
+        _idle.clear()
+
+    for landmarker in landmarkers:
+        _close_quietly(landmarker)
+
+    if landmarkers:
+        log.info(f"🗑️ Закрыто детекторов: {len(landmarkers)}")
+
+    return len(landmarkers)
+
+
+def get_stats():
+    """Возвращает число свободных и занятых детекторов"""
+    with _lock:
+        idle = sum(len(entries) for entries in _idle.values())
+        return {"idle": idle, "in_use": _in_use, "keys": len(_idle)}
@@ -0,0 +1,243 @@
+"""
+Однократное декодирование изображения для всего конвейера
+
+Раньше один и тот же PNG читался до четырех раз: cv2.imread ради размеров,
+mp.Image.create_from_file для детекции, еще раз для координат и еще раз
+для отрисовки 2D скелета. DecodedFrame декодирует файл один раз в буфер
+NumPy и отдает этот же буфер детектору, извлечению координат и визуализации.
+
+Фото с зеркальных камер (24-45 Мп) декодируются уменьшенными: для JPEG
+размер берется из заголовка и файл читается сразу в 1/2, 1/4 или 1/8
+(IMREAD_REDUCED_*), пока большая сторона не меньше DECODE_MAX_SIDE.
+Ориентация из EXIF учитывается OpenCV при чтении. Исходный размер
+сохраняется в source_shape, а вырезанная область - в roi, поэтому точки
+пересчитываются в координаты всего фото (map_to_source).
+"""
+import os
+import struct
+
+# Нижняя граница большей стороны при уменьшенном декодировании JPEG (пиксели)
+DECODE_MAX_SIDE = 2048
+
+JPEG_EXTENSIONS = (".jpg", ".jpeg", ".jpe", ".jfif")
+
+# Во сколько раз уменьшать при чтении -> флаг OpenCV (от большего к меньшему)
+_REDUCED_FLAGS = (
+    (8, "IMREAD_REDUCED_COLOR_8"),
+    (4, "IMREAD_REDUCED_COLOR_4"),
+    (2, "IMREAD_REDUCED_COLOR_2"),
+)
+
+# Маркеры SOF (начало кадра) с размером изображения: C0-CF, кроме DHT, JPG и DAC
+_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# Вся область исходного фото: (x0, y0, x1, y1) в долях
+FULL_ROI = (0.0, 0.0, 1.0, 1.0)
+
+
+def _jpeg_size(path):
+    """(ширина, высота) из заголовка JPEG без декодирования; None, если не JPEG"""
+    try:
+        with open(path, "rb") as f:
+            if f.read(2) != b"\xff\xd8":
+                return None
+            while True:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[0] != 0xFF:
+                    return None
+                code = marker[1]
+                if code == 0xFF:
+                    # Байт заполнения перед маркером
+                    f.seek(-1, os.SEEK_CUR)
+                    continue
+                if code == 0x01 or 0xD0 <= code <= 0xD8:
+                    # Маркеры без длины
+                    continue
+                length = struct.unpack(">H", f.read(2))[0]
+                if code in _SOF_MARKERS:
+                    _precision, height, width = struct.unpack(">BHH", f.read(5))
+                    return width, height
+                if code == 0xDA:
+                    # Начались данные изображения, а SOF так и не встретился
+                    return None
+                f.seek(length - 2, os.SEEK_CUR)
+    except (OSError, struct.error):
+        return None
+
+
+def _reduced_factor(size, max_side):
+    """Наибольшее уменьшение при чтении, после которого сторона не меньше max_side"""
+    if not max_side or size is None:
+        return 1
+    longest = max(size)
+    for factor, _flag in _REDUCED_FLAGS:
+        if longest / factor >= max_side:
+            return factor
+    return 1
+
+
+class DecodedFrame:
+    """Декодированный кадр: BGR буфер OpenCV + ленивые RGB и mp.Image поверх него"""
+
+    def __init__(self, bgr, path=None, source_shape=None, roi=FULL_ROI):
+        self.bgr = bgr
+        self.path = path
+        # Размер кадра до уменьшения: по нему считаются координаты Blender,
+        # чтобы масштаб скелета не зависел от разрешения детекции
+        self.source_shape = tuple(source_shape or bgr.shape)
+        # Какую часть исходного фото покрывает буфер: (x0, y0, x1, y1) в долях
+        self.roi = tuple(roi)
+        self._rgb = None
+        self._mp_image = None
+
+    @classmethod
+    def from_file(cls, image_path, max_side=None):
+        """
+        Декодирует файл. Возвращает None, если изображение не читается.
+        max_side - нижняя граница большей стороны для уменьшенного чтения
+        JPEG (None - DECODE_MAX_SIDE, 0 - всегда полный размер).
+        """
+        import cv2
+        from . import timing
+
+        if max_side is None:
+            max_side = DECODE_MAX_SIDE
+
+        size = None
+        if os.path.splitext(image_path)[1].lower() in JPEG_EXTENSIONS:
+            size = _jpeg_size(image_path)
+        factor = _reduced_factor(size, max_side)
+
+        with timing.span("decode", reduced=factor):
+            if factor > 1:
+                flag = getattr(cv2, dict(_REDUCED_FLAGS)[factor])
+                image = cv2.imread(image_path, flag)
+            else:
+                image = cv2.imread(image_path)
+        if image is None:
+            return None
+        if factor == 1:
+            return cls(image, path=image_path)
+
+        # Размер из заголовка - до поворота по EXIF: сверяем с ориентацией буфера
+        width, height = size
+        h, w = image.shape[:2]
+        if (w > h) != (width > height):
+            width, height = height, width
+        return cls(image, path=image_path, source_shape=(height, width) + image.shape[2:])
+
+    @classmethod
+    def from_rgb(cls, rgb, path=None, source_shape=None):
+        """Оборачивает уже готовый RGB буфер (например, захват viewport)"""
+        import cv2
+        import numpy as np
+
+        rgb = np.ascontiguousarray(rgb)
+        frame = cls(cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR), path=path, source_shape=source_shape)
+        frame._rgb = rgb
+        return frame
+
+    def downscaled(self, max_side):
+        """
+        Кадр, уменьшенный так, чтобы большая сторона не превышала max_side.
+        Исходный размер сохраняется в source_shape. Если уменьшать не нужно,
+        возвращается этот же кадр.
+        """
+        import cv2
+
+        h, w = self.bgr.shape[:2]
+        if not max_side or max(h, w) <= max_side:
+            return self
+
+        factor = max_side / float(max(h, w))
+        size = (max(1, int(round(w * factor))), max(1, int(round(h * factor))))
+        bgr = cv2.resize(self.bgr, size, interpolation=cv2.INTER_AREA)
+        return DecodedFrame(bgr, path=self.path, source_shape=self.source_shape, roi=self.roi)
+
+    def crop(self, box):
+        """
+        Кадр с областью box = (x0, y0, x1, y1) в долях исходного фото
+        (как roi). Буфер - представление без копирования.
+        """
+        x0, y0, x1, y1 = self.roi
+        roi_w, roi_h = x1 - x0, y1 - y0
+        h, w = self.bgr.shape[:2]
+
+        left = max(0, int((box[0] - x0) / roi_w * w))
+        top = max(0, int((box[1] - y0) / roi_h * h))
+        right = min(w, max(left + 1, int(round((box[2] - x0) / roi_w * w))))
+        bottom = min(h, max(top + 1, int(round((box[3] - y0) / roi_h * h))))
+
+        roi = (
+            x0 + left / w * roi_w,
+            y0 + top / h * roi_h,
+            x0 + right / w * roi_w,
+            y0 + bottom / h * roi_h,
+        )
+        return DecodedFrame(self.bgr[top:bottom, left:right], path=self.path,
+                            source_shape=self.source_shape, roi=roi)
+
+    def map_to_source(self, normalized):
+        """
+        Точки (..., 4) в долях этого буфера -> в доли всего исходного фото.
+        z масштабируется как x (в MediaPipe z - в масштабе ширины кадра).
+        """
+        x0, y0, x1, y1 = self.roi
+        if self.roi == FULL_ROI:
+            return normalized
+
+        mapped = normalized.copy()
+        mapped[..., 0] = x0 + normalized[..., 0] * (x1 - x0)
+        mapped[..., 1] = y0 + normalized[..., 1] * (y1 - y0)
+        mapped[..., 2] = normalized[..., 2] * (x1 - x0)
+        return mapped
+
+    @property
+    def shape(self):
+        return self.bgr.shape
+
+    @property
+    def width(self):
+        return self.bgr.shape[1]
+
+    @property
+    def height(self):
+        return self.bgr.shape[0]
+
+    @property
+    def rgb(self):
+        """RGB буфер для MediaPipe (конвертируется один раз и кэшируется)"""
+        if self._rgb is None:
+            import cv2
+            self._rgb = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB)
+        return self._rgb
+
+    def mp_image(self):
+        """mp.Image(SRGB), построенный поверх того же RGB буфера без повторного чтения файла"""
+        if self._mp_image is None:
+            import mediapipe as mp
+            self._mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=self.rgb)
+        return self._mp_image
+
+    def release(self):
+        """Освобождает производные буферы (исходный BGR остается)"""
+        self._rgb = None
+        self._mp_image = None
+
+
+def load_frame(source):
+    """
+    Принимает путь к файлу или уже готовый DecodedFrame.
+    Возвращает (frame, error).
+    """
+    if isinstance(source, DecodedFrame):
+        return source, None
+
+    if not os.path.exists(source):
+        return None, f"Файл не существует: {source}"
+
+    frame = DecodedFrame.from_file(source)
+    if frame is None:
+        return None, f"Не удалось загрузить изображение: {source}"
+
+    return frame, None
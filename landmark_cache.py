@@ -0,0 +1,247 @@
+"""
+Дисковый кэш результатов MediaPipe Pose
+
+Художники многократно запускают "Загрузить позу из фото" на одних и тех же
+референсах. Результат детекции (все 33 точки: нормализованные, мировые,
+visibility/presence) сохраняется в компактный .npz, ключ которого строится из
+хэша содержимого изображения, хэша файла модели и опций PoseLandmarkerOptions.
+Повторный запуск на том же фото вообще не обращается к детектору.
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from . import log_utils
+
+log = log_utils.get_logger(__name__)
+
+# Версия формата записей (меняется при изменении структуры .npz)
+CACHE_FORMAT_VERSION = 1
+
+# Максимальный размер кэша на диске
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# Кэш можно полностью отключить
+CACHE_ENABLED = True
+
+# Сколько хэшей файлов держать в памяти (LRU, по одному на путь)
+MAX_FILE_HASHES = 4096
+
+
+def _default_cache_dir():
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "photo_tool_pro", "landmarks")
+
+
+CACHE_DIR = _default_cache_dir()
+
+# Индекс записей: ключ -> размер файла, упорядочен от давно использованных к недавним
+_index = None
+_index_bytes = 0
+# Ключи, которые сейчас вычисляются (single-flight)
+_inflight = {}
+# путь -> ((размер, mtime), хэш файла), от давно использованных к недавним
+_file_hashes = OrderedDict()
+_lock = threading.Lock()
+
+
+def hash_bytes(*chunks):
+    """Хэш содержимого (blake2b, 128 бит)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_file(path):
+    """Хэш содержимого файла, кэшируется по (путь, размер, mtime)"""
+    stat = os.stat(path)
+    path = os.path.normpath(path)
+    stamp = (stat.st_size, stat.st_mtime_ns)
+
+    with _lock:
+        cached = _file_hashes.get(path)
+        if cached is not None and cached[0] == stamp:
+            _file_hashes.move_to_end(path)
+            return cached[1]
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()
+
+    with _lock:
+        _file_hashes[path] = (stamp, value)
+        _file_hashes.move_to_end(path)
+        while len(_file_hashes) > MAX_FILE_HASHES:
+            _file_hashes.popitem(last=False)
+    return value
+
+
+def make_key(image_hash, model_hash, options):
+    """Ключ записи: содержимое изображения + модель + опции детектора"""
+    return hash_bytes(
+        f"v{CACHE_FORMAT_VERSION}".encode(),
+        image_hash.encode(),
+        model_hash.encode(),
+        repr(options).encode(),
+    )
+
+
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, key[:2], f"{key}.npz")
+
+
+def _load_index_locked():
+    """Один раз сканирует папку кэша и строит LRU индекс по mtime"""
+    global _index, _index_bytes
+
+    if _index is not None:
+        return
+
+    entries = []
+    if os.path.isdir(CACHE_DIR):
+        for root, _dirs, files in os.walk(CACHE_DIR):
+            for name in files:
+                if not name.endswith(".npz"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+
+    entries.sort()
+    _index = OrderedDict((key, size) for _mtime, key, size in entries)
+    _index_bytes = sum(_index.values())
+
+
+def _evict_locked():
+    """Удаляет самые старые записи, пока кэш больше MAX_CACHE_BYTES"""
+    global _index_bytes
+
+    while _index and _index_bytes > MAX_CACHE_BYTES:
+        key, size = _index.popitem(last=False)
+        _index_bytes -= size
+        try:
+            os.remove(_entry_path(key))
+        except OSError:
+            pass
+
+
+def load(key):
+    """Читает запись. Возвращает dict массивов или None."""
+    import numpy as np
+    global _index_bytes
+
+    with _lock:
+        _load_index_locked()
+        if key not in _index:
+            return None
+        _index.move_to_end(key)
+
+    path = _entry_path(key)
+    try:
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+        # Обновляем mtime, чтобы LRU переживал перезапуск Blender
+        os.utime(path, None)
+        return arrays
+    except Exception:
+        with _lock:
+            size = _index.pop(key, None)
+            if size is not None:
+                _index_bytes -= size
+        return None
+
+
+def store(key, **arrays):
+    """Атомарно записывает запись и при необходимости вытесняет старые"""
+    import numpy as np
+    global _index_bytes
+
+    path = _entry_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp_path, path)
+    size = os.path.getsize(path)
+
+    with _lock:
+        _load_index_locked()
+        _index_bytes -= _index.pop(key, 0)
+        _index[key] = size
+        _index_bytes += size
+        _evict_locked()
+
+
+def get_or_compute(key, compute):
+    """
+    Возвращает запись из кэша или вычисляет ее через compute() -> dict массивов.
+    Одновременные запросы одного ключа ждут первый вычисляющий поток (single-flight).
+    Второе значение - True, если результат взят из кэша.
+    """
+    if not CACHE_ENABLED:
+        return compute(), False
+
+    while True:
+        arrays = load(key)
+        if arrays is not None:
+            return arrays, True
+
+        with _lock:
+            event = _inflight.get(key)
+            if event is None:
+                event = threading.Event()
+                _inflight[key] = event
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            # Кто-то уже считает этот ключ - ждем и читаем результат с диска
+            event.wait()
+            continue
+
+        try:
+            arrays = compute()
+            try:
+                store(key, **arrays)
+            except Exception as e:
+                log.warning(f"⚠️ Не удалось записать кэш точек: {e}")
+            return arrays, False
+        finally:
+            with _lock:
+                _inflight.pop(key, None)
+            event.set()
+
+
+def clear():
+    """Удаляет все записи кэша"""
+    global _index, _index_bytes
+
+    with _lock:
+        _load_index_locked()
+        keys = list(_index.keys())
+        _index = OrderedDict()
+        _index_bytes = 0
+
+    for key in keys:
+        try:
+            os.remove(_entry_path(key))
+        except OSError:
+            pass
+
+    return len(keys)
+
+
+def get_stats():
+    """Количество записей и размер кэша"""
+    with _lock:
+        _load_index_locked()
+        return {"entries": len(_index), "bytes": _index_bytes}
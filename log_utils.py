@@ -0,0 +1,167 @@
+"""
+Журнал аддона с уровнями вместо print()
+
+Все модули пишут через get_logger(__name__) в логгер "photo_tool_pro".
+По умолчанию в консоль Blender попадают только предупреждения и ошибки
+(CONSOLE_LEVEL), а последние RING_SIZE сообщений от INFO и выше хранятся
+в памяти и показываются в панели. Отладочные дампы (координаты точек,
+иерархия костей) пишутся только при уровне DEBUG и проверяются через
+debug_enabled(), чтобы в обычном режиме не тратить время даже на форматирование.
+
+Модуль не зависит от bpy.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+LOGGER_NAME = "photo_tool_pro"
+
+# Уровень вывода в консоль: тихий режим по умолчанию
+CONSOLE_LEVEL = logging.WARNING
+
+# Уровень сообщений, которые попадают в кольцевой буфер панели
+RING_LEVEL = logging.INFO
+
+# Сколько последних сообщений хранить для панели
+RING_SIZE = 200
+
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+
+
+# Имена обработчиков: по ним (а не по классу) находятся обработчики,
+# добавленные до перезагрузки аддона, когда классы модуля уже другие
+CONSOLE_HANDLER_NAME = "photo_tool_pro.console"
+RING_HANDLER_NAME = "photo_tool_pro.ring"
+
+
+class RingBufferHandler(logging.Handler):
+    """Хранит последние сообщения в памяти: (время, уровень, текст)"""
+
+    def __init__(self, capacity=RING_SIZE, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = deque(maxlen=capacity)
+        self._records_lock = threading.Lock()
+
+    def emit(self, record):
+        try:
+            message = record.getMessage()
+        except Exception:
+            self.handleError(record)
+            return
+        with self._records_lock:
+            self.records.append((record.created, record.levelname, message))
+
+    def snapshot(self, limit=None):
+        with self._records_lock:
+            records = list(self.records)
+        return records[-limit:] if limit else records
+
+    def clear(self):
+        with self._records_lock:
+            self.records.clear()
+
+
+_logger = logging.getLogger(LOGGER_NAME)
+_console_handler = None
+_ring_handler = None
+
+
+def _configure():
+    """
+    Подключает обработчики. Обработчики прежней загрузки модуля (после
+    перезагрузки аддона) находятся по имени и заменяются; сообщения из
+    старого буфера переносятся в новый.
+    """
+    global _console_handler, _ring_handler
+
+    previous = []
+    for handler in list(_logger.handlers):
+        if handler.get_name() in (CONSOLE_HANDLER_NAME, RING_HANDLER_NAME):
+            if handler.get_name() == RING_HANDLER_NAME:
+                previous = list(getattr(handler, "records", ()))
+            _logger.removeHandler(handler)
+
+    _console_handler = logging.StreamHandler()
+    _console_handler.set_name(CONSOLE_HANDLER_NAME)
+    _console_handler.setFormatter(logging.Formatter("Photo Tool Pro: %(message)s"))
+    _logger.addHandler(_console_handler)
+
+    _ring_handler = RingBufferHandler()
+    _ring_handler.set_name(RING_HANDLER_NAME)
+    _ring_handler.records.extend(previous)
+    _logger.addHandler(_ring_handler)
+
+    # Сообщения аддона не дублируются корневым логгером Blender/Python
+    _logger.propagate = False
+    _apply_levels()
+
+
+def setup():
+    """
+    Подключает обработчики, если их нет (повторный вызов ничего не делает).
+    Вызывается при импорте и в начале register(): shutdown() при отключении
+    аддона снимает обработчики, а модуль при повторном включении не импортируется заново.
+    """
+    if _console_handler in _logger.handlers and _ring_handler in _logger.handlers:
+        return
+    _configure()
+
+
+def _apply_levels():
+    _console_handler.setLevel(CONSOLE_LEVEL)
+    _ring_handler.setLevel(RING_LEVEL)
+    # Сам логгер отсекает все, что не нужно ни консоли, ни буферу
+    _logger.setLevel(min(CONSOLE_LEVEL, RING_LEVEL))
+
+
+def get_logger(name=None):
+    """Логгер модуля: get_logger(__name__)"""
+    if name:
+        name = name.rpartition(".")[2]
+        return _logger.getChild(name)
+    return _logger
+
+
+def set_level(level):
+    """Уровень консоли: 'DEBUG', 'INFO', 'WARNING' или 'ERROR'"""
+    global CONSOLE_LEVEL, RING_LEVEL
+
+    CONSOLE_LEVEL = logging.getLevelName(level) if isinstance(level, str) else level
+    # В режиме отладки буфер панели тоже получает дампы
+    RING_LEVEL = min(logging.INFO, CONSOLE_LEVEL)
+    _apply_levels()
+
+
+def get_level():
+    return logging.getLevelName(CONSOLE_LEVEL)
+
+
+def debug_enabled():
+    """Стоит ли собирать отладочный дамп (проверка до форматирования)"""
+    return _logger.isEnabledFor(logging.DEBUG)
+
+
+def get_records(limit=None):
+    """Последние сообщения: [(время, уровень, текст)], старые первыми"""
+    return _ring_handler.snapshot(limit)
+
+
+def format_record(record):
+    created, level, message = record
+    return f"{time.strftime('%H:%M:%S', time.localtime(created))} {level[0]} {message}"
+
+
+def clear():
+    _ring_handler.clear()
+
+
+def shutdown():
+    """Отключает обработчики аддона (вызывается при отключении аддона)"""
+    for handler in list(_logger.handlers):
+        if handler.get_name() in (CONSOLE_HANDLER_NAME, RING_HANDLER_NAME):
+            _logger.removeHandler(handler)
+            handler.close()
+
+
+setup()
@@ -0,0 +1,217 @@
+"""
+Реестр файлов моделей MediaPipe Pose
+
+Один раз сканирует папки поиска и запоминает найденные варианты модели:
+  LITE  - pose_landmarker_lite.task  (быстрая, для превью и живого потока)
+  FULL  - pose_landmarker_full.task
+  HEAVY - pose_landmarker_heavy.task (самая точная, для итоговых поз)
+Файл pose_landmarker.task без указания варианта (как в старой инструкции)
+подходит для любого варианта, если нужного файла нет.
+
+Вариант выбирается для каждой операции: явно ('LITE', 'FULL', 'HEAVY') или
+'AUTO' - по назначению (PURPOSE_VARIANTS). Если выбранного варианта нет,
+берется ближайший из найденных. Если не найдено ничего, этот результат тоже
+запоминается: панель спрашивает модель на каждой перерисовке, а папки
+сканируются заново только через rescan() или когда меняется mtime одной из
+просканированных папок (файл положили или удалили). Хэши файлов моделей (для
+ключа кэша точек) считаются один раз на файл и кэшируются по (путь, размер, mtime).
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from . import log_utils
+
+log = log_utils.get_logger(__name__)
+
+VARIANTS = ('LITE', 'FULL', 'HEAVY')
+
+VARIANT_FILENAMES = {
+    'LITE': "pose_landmarker_lite.task",
+    'FULL': "pose_landmarker_full.task",
+    'HEAVY': "pose_landmarker_heavy.task",
+}
+
+# Модель без указания варианта
+DEFAULT_FILENAME = "pose_landmarker.task"
+
+# Вариант для 'AUTO' по назначению операции
+PURPOSE_VARIANTS = {
+    'PREVIEW': 'LITE',  # живой поток позы
+    'FINAL': 'HEAVY',   # скелет, поза по фото, последовательности и видео
+}
+
+# Если выбранного варианта нет: сначала файл без варианта, затем ближайшие по точности
+_FALLBACKS = {
+    'LITE': ('DEFAULT', 'FULL', 'HEAVY'),
+    'FULL': ('DEFAULT', 'HEAVY', 'LITE'),
+    'HEAVY': ('DEFAULT', 'FULL', 'LITE'),
+}
+
+# Папка с моделями вне аддона (например общая с сервером детекции)
+MODELS_DIR_ENV = "PHOTO_TOOL_PRO_MODELS"
+
+# Имена папок аддона в scripts/addons, где тоже ищутся модели
+ADDON_FOLDER_NAMES = ("photo_tool_pro", "photo_tool_pro_3_3_5", "photo_tool")
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Сколько хэшей файлов моделей держать в памяти (LRU, по одному на путь)
+MAX_MODEL_HASHES = 16
+
+_lock = threading.Lock()
+# {'LITE' | 'FULL' | 'HEAVY' | 'DEFAULT': путь}; None - еще не сканировали
+_found = None
+# ((папка, mtime или None), ...) просканированных папок - по ним видно новые файлы
+_dirs_stamp = ()
+# путь -> ((размер, mtime), хэш файла модели), от давно использованных к недавним
+_hashes = OrderedDict()
+
+
+def search_dirs():
+    """Папки поиска моделей в порядке приоритета"""
+    dirs = []
+    env_dir = os.environ.get(MODELS_DIR_ENV)
+    if env_dir:
+        dirs.append(env_dir)
+    dirs.append(os.path.join(ADDON_DIR, "models"))
+    dirs.append(ADDON_DIR)
+
+    from . import deps_utils
+    if deps_utils.USER_SITE:
+        dirs.append(os.path.join(deps_utils.USER_SITE, "models"))
+
+    try:
+        import bpy
+        for script_dir in bpy.utils.script_paths():
+            for folder_name in ADDON_FOLDER_NAMES:
+                dirs.append(os.path.join(script_dir, "addons", folder_name, "models"))
+    except (ImportError, AttributeError):
+        pass
+
+    unique = []
+    for directory in dirs:
+        directory = os.path.normpath(directory)
+        if directory not in unique:
+            unique.append(directory)
+    return unique
+
+
+def _stamp(directories):
+    """mtime папок: меняется, когда в папке создают, удаляют или переименовывают файл"""
+    stamp = []
+    for directory in directories:
+        try:
+            stamp.append((directory, os.stat(directory).st_mtime_ns))
+        except OSError:
+            stamp.append((directory, None))
+    return tuple(stamp)
+
+
+def _dirs_changed():
+    return _stamp(directory for directory, _mtime in _dirs_stamp) != _dirs_stamp
+
+
+def rescan():
+    """Сканирует папки поиска заново. Возвращает {вариант: путь}."""
+    global _found, _dirs_stamp
+
+    filenames = dict(VARIANT_FILENAMES, DEFAULT=DEFAULT_FILENAME)
+    directories = search_dirs()
+    stamp = _stamp(directories)
+    found = {}
+    for directory, mtime in stamp:
+        if mtime is None or not os.path.isdir(directory):
+            continue
+        for variant, filename in filenames.items():
+            path = os.path.join(directory, filename)
+            if variant not in found and os.path.isfile(path):
+                found[variant] = path
+
+    with _lock:
+        _found = found
+        _dirs_stamp = stamp
+
+    for variant, path in found.items():
+        log.info(f"✅ Модель {variant}: {path}")
+    return dict(found)
+
+
+def _get_found():
+    found = _found
+    if found is None:
+        found = rescan()
+    return found
+
+
+def _normalize_variant(variant, purpose):
+    variant = (variant or 'AUTO').upper()
+    if variant == 'AUTO':
+        variant = PURPOSE_VARIANTS.get(purpose, 'FULL')
+    if variant not in VARIANTS:
+        raise ValueError(f"Неизвестный вариант модели: {variant}")
+    return variant
+
+
+def _pick(found, variant):
+    for candidate in (variant,) + _FALLBACKS[variant]:
+        path = found.get(candidate)
+        if path is not None:
+            return path
+    return None
+
+
+def resolve(variant=None, purpose='FINAL'):
+    """
+    Путь к модели для операции или None, если ни одного файла нет.
+    variant - 'LITE', 'FULL', 'HEAVY' или 'AUTO'/None (по purpose)
+    purpose - 'PREVIEW' или 'FINAL'
+    """
+    variant = _normalize_variant(variant, purpose)
+
+    path = _pick(_get_found(), variant)
+    # Найденный файл удалили - сканируем заново. Если не было найдено ничего,
+    # папки сканируются снова, только когда в них что-то изменилось
+    if path is not None and not os.path.isfile(path):
+        path = _pick(rescan(), variant)
+    elif path is None and _dirs_changed():
+        path = _pick(rescan(), variant)
+    return path
+
+
+def available_variants():
+    """{вариант: путь} найденных файлов (включая 'DEFAULT')"""
+    return dict(_get_found())
+
+
+def missing_message():
+    """Текст ошибки, когда модель не найдена"""
+    names = ", ".join([VARIANT_FILENAMES[variant] for variant in VARIANTS] + [DEFAULT_FILENAME])
+    return f"Файл модели не найден. Поместите один из файлов ({names}) в папку 'models' аддона"
+
+
+def model_hash(path):
+    """Хэш содержимого файла модели (blake2b, 128 бит), один раз на версию файла"""
+    stat = os.stat(path)
+    path = os.path.normpath(path)
+    stamp = (stat.st_size, stat.st_mtime_ns)
+
+    with _lock:
+        cached = _hashes.get(path)
+        if cached is not None and cached[0] == stamp:
+            _hashes.move_to_end(path)
+            return cached[1]
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()
+
+    with _lock:
+        _hashes[path] = (stamp, value)
+        _hashes.move_to_end(path)
+        while len(_hashes) > MAX_MODEL_HASHES:
+            _hashes.popitem(last=False)
+    return value
@@ -3,11 +3,31 @@
 """
 
 import os
+import math
+import time
 import bpy
 from bpy.types import Operator
-from bpy.props import StringProperty, EnumProperty
-from mathutils import Quaternion, Vector, Euler
-import numpy as np
+from bpy.props import StringProperty, EnumProperty, BoolProperty, IntProperty, CollectionProperty
+
+from . import log_utils
+from . import skeleton_registry
+from . import timing
+
+log = log_utils.get_logger(__name__)
+
+# Варианты модели для операторов детекции (см. model_registry)
+MODEL_VARIANT_ITEMS = [
+    ('AUTO', "Авто", "Lite для превью, Heavy для итоговой позы"),
+    ('LITE', "Lite", "Быстрая модель pose_landmarker_lite.task"),
+    ('FULL', "Full", "Модель pose_landmarker_full.task"),
+    ('HEAVY', "Heavy", "Самая точная модель pose_landmarker_heavy.task"),
+]
+
+# Для фото и последовательностей еще и каскад (см. detection.detect_pose_cascade);
+# видео трекается одной моделью, поэтому там каскада нет
+MODEL_CASCADE_ITEMS = MODEL_VARIANT_ITEMS + [
+    ('CASCADE', "Каскад", "Lite, повтор на Heavy только для неуверенных кадров"),
+]
 
 
 class VIEW3D_OT_edit_skeleton(Operator):
@@ -18,24 +38,14 @@ class VIEW3D_OT_edit_skeleton(Operator):
 
     @classmethod
     def poll(cls, context):
-        skeletons = [
-            obj for obj in bpy.data.objects
-            if obj.type == 'ARMATURE' and obj.name.startswith("Pose_Skeleton")
-        ]
-        return len(skeletons) > 0 and context.area and context.area.type == 'VIEW_3D'
+        return skeleton_registry.has_skeleton() and context.area and context.area.type == 'VIEW_3D'
 
     def execute(self, context):
-        skeletons = [
-            obj for obj in bpy.data.objects
-            if obj.type == 'ARMATURE' and obj.name.startswith("Pose_Skeleton")
-        ]
-
-        if not skeletons:
+        skeleton = skeleton_registry.get_active(context)
+        if skeleton is None:
             self.report({'ERROR'}, "Скелет не найден")
             return {'CANCELLED'}
 
-        skeleton = skeletons[0]
-
         if context.mode == 'EDIT_ARMATURE':
             bpy.ops.object.mode_set(mode='OBJECT')
             self.report({'INFO'}, "Переключено в Object Mode")
@@ -57,24 +67,14 @@ class VIEW3D_OT_pose_skeleton(Operator):
 
     @classmethod
     def poll(cls, context):
-        skeletons = [
-            obj for obj in bpy.data.objects
-            if obj.type == 'ARMATURE' and obj.name.startswith("Pose_Skeleton")
-        ]
-        return len(skeletons) > 0 and context.area and context.area.type == 'VIEW_3D'
+        return skeleton_registry.has_skeleton() and context.area and context.area.type == 'VIEW_3D'
 
     def execute(self, context):
-        skeletons = [
-            obj for obj in bpy.data.objects
-            if obj.type == 'ARMATURE' and obj.name.startswith("Pose_Skeleton")
-        ]
-
-        if not skeletons:
+        skeleton = skeleton_registry.get_active(context)
+        if skeleton is None:
             self.report({'ERROR'}, "Скелет не найден")
             return {'CANCELLED'}
 
-        skeleton = skeletons[0]
-
         if context.mode == 'POSE':
             bpy.ops.object.mode_set(mode='OBJECT')
             self.report({'INFO'}, "Переключено в Object Mode")
@@ -101,11 +101,10 @@ class VIEW3D_OT_create_skeleton(Operator):
     def execute(self, context):
         from . import model_utils
 
-        print("\n" + "=" * 60)
-        print("🎯 Photo Tool Pro: Создание скелета...")
-        print("=" * 60)
+        log.info("🎯 Создание скелета...")
 
-        skeleton, debug_images, error = model_utils.create_skeleton_from_viewport(context, make_screenshot=False)
+        with timing.run("create_skeleton"):
+            skeleton, debug_images, error = model_utils.create_skeleton_from_viewport(context, make_screenshot=False)
 
         if error:
             self.report({'ERROR'}, error)
@@ -128,11 +127,10 @@ class VIEW3D_OT_create_skeleton_with_screenshot(Operator):
     def execute(self, context):
         from . import model_utils
 
-        print("\n" + "=" * 60)
-        print("🎯 Photo Tool Pro: Создание скелета + 2D скриншоты...")
-        print("=" * 60)
+        log.info("🎯 Создание скелета + 2D скриншоты...")
 
-        skeleton, debug_images, error = model_utils.create_skeleton_from_viewport(context, make_screenshot=True)
+        with timing.run("create_skeleton_with_screenshot"):
+            skeleton, debug_images, error = model_utils.create_skeleton_from_viewport(context, make_screenshot=True)
 
         if error:
             self.report({'ERROR'}, error)
@@ -155,25 +153,15 @@ class VIEW3D_OT_attach_skeleton(Operator):
 
     @classmethod
     def poll(cls, context):
-        skeletons = [
-            obj for obj in bpy.data.objects
-            if obj.type == 'ARMATURE' and obj.name.startswith("Pose_Skeleton")
-        ]
         meshes = [obj for obj in context.selected_objects if obj.type == 'MESH']
-        return len(skeletons) > 0 and len(meshes) > 0 and context.area and context.area.type == 'VIEW_3D'
+        return skeleton_registry.has_skeleton() and len(meshes) > 0 and context.area and context.area.type == 'VIEW_3D'
 
     def execute(self, context):
-        skeletons = [
-            obj for obj in bpy.data.objects
-            if obj.type == 'ARMATURE' and obj.name.startswith("Pose_Skeleton")
-        ]
-
-        if not skeletons:
+        skeleton = skeleton_registry.get_active(context)
+        if skeleton is None:
             self.report({'ERROR'}, "Не найден скелет")
             return {'CANCELLED'}
 
-        skeleton = skeletons[0]
-
         meshes = [obj for obj in context.selected_objects if obj.type == 'MESH']
         if not meshes:
             self.report({'ERROR'}, "Не выбран меш. Сначала выберите объект меша.")
@@ -207,10 +195,7 @@ class VIEW3D_OT_clear_skeletons(Operator):
 
     def execute(self, context):
         try:
-            skeletons = [
-                obj for obj in bpy.data.objects
-                if obj.type == 'ARMATURE' and obj.name.startswith("Pose_Skeleton")
-            ]
+            skeletons = list(skeleton_registry.get_skeletons())
 
             debug_objects = [
                 obj for obj in bpy.data.objects
@@ -222,6 +207,7 @@ class VIEW3D_OT_clear_skeletons(Operator):
 
             for obj in debug_objects:
                 bpy.data.objects.remove(obj, do_unlink=True)
+            skeleton_registry.invalidate()
 
             count_skeletons = len(skeletons)
             count_objects = len(debug_objects)
@@ -249,12 +235,209 @@ class VIEW3D_OT_check_dependencies(Operator):
         return {'FINISHED'}
 
 
-class VIEW3D_OT_apply_pose_from_photo(Operator):
-    """Apply pose from selected photo to active skeleton"""
-    bl_idname = "view3d.apply_pose_from_photo"
-    bl_label = "Выставить позу по фото"
+class BackgroundJobMixin:
+    """
+    Модальный запуск тяжелой работы (декодирование, детекция) в фоновом потоке.
+    Интерфейс не блокируется, прогресс показывается в строке состояния,
+    ESC отменяет операцию. Результат применяется к сцене в главном потоке.
+    """
+
+    # Идентификаторы операторов, у которых сейчас идет фоновая задача
+    _running_jobs = set()
+
+    _future = None
+    _job_error = None
+    # Запуск timing этой задачи (у каждой задачи свой)
+    _run = None
+    # Необязательно: {"done": n, "total": m} - реальный прогресс задачи
+    _progress = None
+    # Необязательно: threading.Event, по которому задача прекращает работу при ESC
+    _cancel_event = None
+
+    @classmethod
+    def _is_running(cls):
+        return cls.bl_idname in BackgroundJobMixin._running_jobs
+
+    def _start_job(self, context, status, fn=None, *args):
+        """
+        Запускает модальное ожидание. Если fn не передана, задачу отправляют
+        позже через _submit_job() (например, после захвата viewport по таймеру).
+        """
+        self._begin_run()
+        if fn is not None:
+            self._submit_job(fn, *args)
+        self._status = status
+        self._started = time.perf_counter()
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, 100)
+
+        BackgroundJobMixin._running_jobs.add(self.bl_idname)
+        self._update_status(context)
+        return {'RUNNING_MODAL'}
+
+    def _begin_run(self):
+        """Разбивка по стадиям для панели: запуск назван по оператору"""
+        if self._run is None:
+            self._run = timing.begin_run(self.bl_idname.split(".")[-1])
+        return self._run
+
+    def _submit_job(self, fn, *args):
+        from . import worker_pool
+
+        self._future = worker_pool.submit(timing.bind(self._run, fn), *args)
+
+    def _update_status(self, context):
+        elapsed = time.perf_counter() - self._started
+        if self._progress and self._progress.get("total"):
+            done, total = self._progress["done"], self._progress["total"]
+            progress = 100.0 * done / total
+            status = f"{self._status} {done}/{total}"
+        else:
+            # Длительность детекции заранее неизвестна - прогресс асимптотически растет к 90%
+            progress = 90.0 * (1.0 - math.exp(-elapsed / 2.0))
+            status = self._status
+        context.window_manager.progress_update(progress)
+        if context.workspace:
+            context.workspace.status_text_set(f"⏳ {status} {elapsed:.1f} с (ESC - отмена)")
+
+    def _end_job(self, context):
+        wm = context.window_manager
+        if self._timer is not None:
+            wm.event_timer_remove(self._timer)
+            self._timer = None
+        wm.progress_end()
+        if context.workspace:
+            context.workspace.status_text_set(None)
+        BackgroundJobMixin._running_jobs.discard(self.bl_idname)
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            if self._cancel_event is not None:
+                self._cancel_event.set()
+            if self._future is not None:
+                self._future.cancel()
+            self._end_job(context)
+            timing.end_run(self._run)
+            self._on_cancel(context)
+            self.report({'WARNING'}, "Операция отменена")
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        if self._job_error:
+            self._end_job(context)
+            timing.end_run(self._run)
+            self._on_cancel(context)
+            self.report({'ERROR'}, self._job_error)
+            return {'CANCELLED'}
+
+        if self._future is None or not self._future.done():
+            self._update_status(context)
+            return {'PASS_THROUGH'}
+
+        self._end_job(context)
+        try:
+            result = self._future.result()
+        except Exception as e:
+            timing.end_run(self._run)
+            self.report({'ERROR'}, f"Ошибка фоновой задачи: {str(e)}")
+            return {'CANCELLED'}
+
+        # Применение результата к сцене тоже входит в запуск
+        try:
+            with timing.activate(self._run):
+                return self._finish_job(context, result)
+        finally:
+            timing.end_run(self._run)
+
+    def _finish_job(self, context, result):
+        """Вызывается в главном потоке с результатом фоновой задачи"""
+        return {'FINISHED'}
+
+    def _on_cancel(self, context):
+        """Вызывается при отмене по ESC"""
+        pass
+
+
+class VIEW3D_OT_create_skeleton_async(BackgroundJobMixin, Operator):
+    """Create skeleton from viewport without blocking the interface"""
+    bl_idname = "view3d.create_skeleton_async"
+    bl_label = "Создать скелет (в фоне)"
     bl_options = {'REGISTER', 'UNDO'}
 
+    make_screenshot: BoolProperty(
+        name="2D скриншоты",
+        description="Сохранить отладочные 2D скриншоты",
+        default=False
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.area and context.area.type == 'VIEW_3D' and not cls._is_running()
+
+    def execute(self, context):
+        from . import model_utils, screenshot_utils
+
+        log.info("🎯 Создание скелета в фоне...")
+
+        error = model_utils.check_requirements()
+        if error:
+            self.report({'ERROR'}, error)
+            return {'CANCELLED'}
+
+        # Кадры захватываются по таймеру в главном потоке сразу в память,
+        # детекция - в фоновом
+        def on_captured(frames, error):
+            if error:
+                self._job_error = error
+                return
+            self._submit_job(
+                model_utils.detect_skeleton_coordinates,
+                frames['FRONT'], frames['SIDE'], self.make_screenshot
+            )
+
+        # Колбэк захвата вызывается таймером уже после входа в модальный режим;
+        # захват тоже входит в запуск этой задачи
+        with timing.activate(self._begin_run()):
+            self._capture, error = screenshot_utils.capture_views_async(context, on_captured)
+        if error:
+            self.report({'ERROR'}, error)
+            return {'CANCELLED'}
+
+        return self._start_job(context, "Захват viewport и детекция позы...")
+
+    def _finish_job(self, context, result):
+        from . import model_utils
+
+        coordinates_3d, debug_images, error = result
+        if error:
+            self.report({'ERROR'}, error)
+            return {'CANCELLED'}
+
+        skeleton, error = model_utils.build_skeleton(coordinates_3d)
+        if error:
+            self.report({'ERROR'}, error)
+            return {'CANCELLED'}
+
+        if debug_images:
+            paths_text = "\n".join([os.path.basename(p) for p in debug_images])
+            self.report({'INFO'}, f"✅ Скелет создан! 2D скриншоты сохранены:\n{paths_text}")
+        else:
+            self.report({'INFO'}, "✅ Скелет успешно создан!")
+        return {'FINISHED'}
+
+    def _on_cancel(self, context):
+        # Детекцию в фоновом потоке не прервать - ее результат просто не применяется
+        self._capture.cancel()
+
+
+class PhotoPoseMixin:
+    """Общие свойства и методы операторов выставления позы по фото"""
+
     filepath: StringProperty(
         name="Путь к файлу",
         description="Путь к файлу фотографии",
@@ -272,167 +455,128 @@ class VIEW3D_OT_apply_pose_from_photo(Operator):
         default='FRONT'
     )
 
+    model_variant: EnumProperty(
+        name="Модель",
+        description="Вариант модели MediaPipe Pose",
+        items=MODEL_CASCADE_ITEMS,
+        default='AUTO'
+    )
+
     filter_glob: StringProperty(
         default="*.jpg;*.jpeg;*.png;*.bmp",
         options={'HIDDEN'}
     )
 
-    @classmethod
-    def poll(cls, context):
-        skeletons = [
-            obj for obj in bpy.data.objects
-            if obj.type == 'ARMATURE' and obj.name.startswith("Pose_Skeleton")
-        ]
-        return len(skeletons) > 0 and context.area and context.area.type == 'VIEW_3D'
-
-    def invoke(self, context, event):
-        context.window_manager.fileselect_add(self)
-        return {'RUNNING_MODAL'}
-
-    def execute(self, context):
-        print("\n" + "=" * 60)
-        print("📸 Photo Tool Pro: Выставление позы по фото...")
-        print("=" * 60)
-
+    def _prepare_skeleton(self, context):
+        """Находит скелет, переключает его в Pose Mode и проверяет зависимости"""
         if not self.filepath:
             self.report({'ERROR'}, "Файл не выбран")
-            return {'CANCELLED'}
-
-        skeletons = [
-            obj for obj in bpy.data.objects
-            if obj.type == 'ARMATURE' and obj.name.startswith("Pose_Skeleton")
-        ]
+            return None
 
-        if not skeletons:
+        skeleton = skeleton_registry.get_active(context)
+        if skeleton is None:
             self.report({'ERROR'}, "Не найден скелет Pose_Skeleton")
-            return {'CANCELLED'}
-
-        skeleton = skeletons[0]
+            return None
 
         if context.mode != 'POSE':
             bpy.ops.object.select_all(action='DESELECT')
             skeleton.select_set(True)
             context.view_layer.objects.active = skeleton
             bpy.ops.object.mode_set(mode='POSE')
-            print("✅ Автоматически переключились в Pose Mode")
+            log.info("✅ Автоматически переключились в Pose Mode")
 
         try:
             from . import deps_utils
             missing = deps_utils.check_deps_quick()
             if missing:
                 self.report({'ERROR'}, f"Установите зависимости: {', '.join(missing)}")
-                return {'CANCELLED'}
+                return None
         except ImportError:
             self.report({'ERROR'}, "Не удалось проверить зависимости")
-            return {'CANCELLED'}
+            return None
 
-        is_front_view = (self.view_type == 'FRONT')
-        success, message = self._apply_pose_with_relative_rotation(image_path=self.filepath,
-                                                                   armature=skeleton,
-                                                                   is_front_view=is_front_view)
+        return skeleton
 
-        if success:
-            self.report({'INFO'}, f"✅ {message}")
-            return {'FINISHED'}
-        else:
-            self.report({'ERROR'}, f"❌ {message}")
-            return {'CANCELLED'}
+    @staticmethod
+    def _detect_photo_points(image_path, is_front_view=True, model_variant=None):
+        """
+        Декодирование, детекция и расчет 2D точек (13, 3) по фото.
+        Не обращается к bpy, поэтому может выполняться в фоновом потоке.
+        Возвращает (points_2d, error).
+        """
+        try:
+            from . import detection
+            from . import image_frame
+            from . import model_registry
+            from . import pose_core
+            from . import pose_from_photo
+
+            log.info("🔄 Используем 2D метод (без учета глубины)...")
+
+            # Декодируем фото один раз: этот же буфер пойдет в детектор и визуализацию
+            frame, error = image_frame.load_frame(image_path)
+            if error:
+                return None, error
+
+            h, w = frame.height, frame.width
+
+            cascade = model_variant == detection.CASCADE
+            model_path = model_registry.resolve('LITE' if cascade else model_variant, purpose='FINAL')
+            if model_path is None and not detection.replay_active():
+                return None, model_registry.missing_message()
+
+            log.info(f"✅ Используем модель: {model_path}")
+
+            # Кэш точек или прогретый детектор из общего пула
+            if cascade:
+                detection_result, _escalated = detection.detect_pose_cascade(frame, min_confidence=0.3)
+            else:
+                detection_result = detection.detect_pose(frame, model_path, min_confidence=0.3)
+
+            if len(detection_result.normalized) == 0:
+                return None, "Поза не обнаружена на изображении"
+
+            # Сохраняем визуализацию (общий рисунок screenshot_utils.render_2d_pose)
+            with timing.span("visualization"):
+                pose_from_photo.save_pose_visualization(
+                    frame,
+                    pose_core.landmarks_to_pixels(detection_result.normalized[0], w, h),
+                    'FRONT' if is_front_view else 'SIDE'
+                )
+
+            # Получаем 2D координаты (используем только x, y, z игнорируем):
+            # 13 ключевых точек одной выборкой и одно умножение на матрицу вида.
+            # Фронтальный вид: X фото -> X Blender, Y фото -> Z Blender, Y Blender = 0
+            # Боковой вид: X фото -> Y Blender, Y фото -> Z Blender, X Blender = 0
+            points_2d = pose_core.apply_affine(
+                pose_core.gather_key_points(detection_result.normalized[0]),
+                pose_core.photo_plane_affine(is_front_view)
+            )
+
+            # Дамп координат только в режиме отладки
+            if log_utils.debug_enabled():
+                log.debug(f"=== ОТЛАДКА: Координаты точек ({'Фронтальный' if is_front_view else 'Боковой'} вид) ===")
+                for i, (point, name) in enumerate(zip(points_2d, pose_core.KEY_POINT_NAMES)):
+                    log.debug(f"  {i:2d} {name:15s}: X={point[0]:6.3f}, Y={point[1]:6.3f}, Z={point[2]:6.3f}")
+
+            return points_2d, None
+
+        except Exception as e:
+            import traceback
+            error_details = traceback.format_exc()
+            log.error(f"❌ Ошибка в 2D методе: {error_details}")
+            return None, f"Ошибка: {str(e)}"
 
     def _apply_pose_with_relative_rotation(self, image_path, armature, is_front_view=True):
         """Метод, использующий только 2D координаты MediaPipe для вычисления позы."""
         try:
-            import cv2
-            import mediapipe as mp
-            import numpy as np
-            from mediapipe.tasks import python
-            from mediapipe.tasks.python import vision
-
-            print("🔄 Используем 2D метод (без учета глубины)...")
-
-            image = cv2.imread(image_path)
-            if image is None:
-                return False, f"Не удалось загрузить изображение: {image_path}"
-
-            h, w = image.shape[:2]
-
-            # Поиск модели
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            model_path = os.path.join(current_dir, "models", "pose_landmarker.task")
-
-            if not os.path.exists(model_path):
-                model_path = os.path.join(current_dir, "..", "models", "pose_landmarker.task")
-                if not os.path.exists(model_path):
-                    return False, "Файл модели pose_landmarker.task не найден"
-
-            print(f"✅ Используем модель: {model_path}")
-
-            base_options = python.BaseOptions(model_asset_path=model_path)
-            options = vision.PoseLandmarkerOptions(
-                base_options=base_options,
-                output_segmentation_masks=False,
-                num_poses=1,
-                min_pose_detection_confidence=0.3,
-                min_pose_presence_confidence=0.3,
-                min_tracking_confidence=0.3
-            )
-            detector = vision.PoseLandmarker.create_from_options(options)
-
-            mp_image = mp.Image.create_from_file(image_path)
-            detection_result = detector.detect(mp_image)
-
-            if not detection_result.pose_landmarks:
-                detector.close()
-                return False, "Поза не обнаружена на изображении"
-
-            # Сохраняем визуализацию
-            self._save_pose_visualization(image_path, detection_result, is_front_view)
-
-            # Получаем 2D координаты (используем только x, y, z игнорируем)
-            # MediaPipe индексы: 0=нос, 11=левое плечо, 12=правое плечо, 13=левый локоть,
-            # 14=правый локоть, 15=левое запястье, 16=правое запястье,
-            # 23=левое бедро, 24=правое бедро, 25=левое колено, 26=правое колено,
-            # 27=левая лодыжка, 28=правая лодыжка
-            key_point_indices = [0, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
-            points_2d = []
-
-            for landmark_idx in key_point_indices:
-                if landmark_idx < len(detection_result.pose_landmarks[0]):
-                    landmark = detection_result.pose_landmarks[0][landmark_idx]
-                    # Берем только x, y. Игнорируем z.
-                    x, y = landmark.x, landmark.y
-                    # Нормализуем 2D координаты (X, Y) в диапазон [-1, 1]
-                    norm_x = (x - 0.5) * 2.0  # -1.0 до 1.0
-                    norm_y = (0.5 - y) * 2.0  # -1.0 до 1.0 (инвертируем Y)
-
-                    if is_front_view:
-                        # Для фронтального вида:
-                        # - X фото -> X Blender (влево/вправо)
-                        # - Y фото -> Z Blender (вверх/вниз)
-                        # - Y Blender = 0 (нет глубины)
-                        point = Vector((norm_x * 0.5, 0.0, norm_y * 0.5))
-                    else:
-                        # Для бокового вида:
-                        # - X фото -> Y Blender (глубина вперед/назад)
-                        # - Y фото -> Z Blender (вверх/вниз)
-                        # - X Blender = 0 (нет бокового смещения)
-                        point = Vector((0.0, norm_x * 0.5, norm_y * 0.5))
-
-                    points_2d.append(point)
-                else:
-                    points_2d.append(Vector((0, 0, 0)))
-
-            detector.close()
-
-            print(f"\n=== ОТЛАДКА: Координаты точек ({'Фронтальный' if is_front_view else 'Боковой'} вид) ===")
-            point_names = ['Нос', 'Левое_плечо', 'Правое_плечо', 'Левый_локоть', 'Правый_локоть',
-                           'Левое_запястье', 'Правое_запястье', 'Левое_бедро', 'Правое_бедро',
-                           'Левое_колено', 'Правое_колено', 'Левая_лодыжка', 'Правая_лодыжка']
-            for i, (point, name) in enumerate(zip(points_2d, point_names)):
-                print(f"  {i:2d} {name:15s}: X={point.x:6.3f}, Y={point.y:6.3f}, Z={point.z:6.3f}")
-            print("=" * 60)
+            points_2d, error = self._detect_photo_points(image_path, is_front_view, self.model_variant)
+            if error:
+                return False, error
 
             # Вычисляем и применяем позу на основе 2D точек
-            success = self._calculate_2d_pose_angles(armature, points_2d, is_front_view)
+            with timing.span("solve"):
+                success = self._calculate_2d_pose_angles(armature, points_2d, is_front_view)
 
             if not success:
                 return False, "Не удалось вычислить позу по 2D точкам"
@@ -442,181 +586,440 @@ class VIEW3D_OT_apply_pose_from_photo(Operator):
         except Exception as e:
             import traceback
             error_details = traceback.format_exc()
-            print(f"❌ Ошибка в 2D методе: {error_details}")
+            log.error(f"❌ Ошибка в 2D методе: {error_details}")
             return False, f"Ошибка: {str(e)}"
 
     def _calculate_2d_pose_angles(self, armature, points_2d, is_front_view):
-        """Вычисляет углы для костей на основе 2D точек."""
+        """Применяет к костям углы 2D метода (сами углы считает pose_core)."""
         try:
-            # Словарь для сопоставления индексов points_2d с именами костей
-            # Индексы points_2d: 0=нос, 1=левое плечо, 2=правое плечо, 3=левый локоть,
-            # 4=правый локоть, 5=левое запястье, 6=правое запястье,
-            # 7=левое бедро, 8=правое бедро, 9=левое колено, 10=правое колено,
-            # 11=левая лодыжка, 12=правая лодыжка
-
-            bone_mapping = {
-                (1, 3): 'upper_arm.L',  # Левое плечо -> локоть
-                (3, 5): 'forearm.L',  # Левый локоть -> запястье
-                (2, 4): 'upper_arm.R',  # Правое плечо -> локоть
-                (4, 6): 'forearm.R',  # Правый локоть -> запястье
-                (7, 9): 'thigh.L',  # Левое бедро -> колено
-                (9, 11): 'shin.L',  # Левое колено -> лодыжка
-                (8, 10): 'thigh.R',  # Правое бедро -> колено
-                (10, 12): 'shin.R',  # Правое колено -> лодыжка
-            }
-
-            # Для позвоночника используем среднюю точку между плечами и бедрами
-            if len(points_2d) > 8:
-                # Средняя точка плеч (индексы 1 и 2)
-                shoulder_center = (points_2d[1] + points_2d[2]) * 0.5
-                # Средняя точка бедер (индексы 7 и 8)
-                hip_center = (points_2d[7] + points_2d[8]) * 0.5
-
-                # Направление позвоночника (от бедер к плечам)
-                spine_dir = (shoulder_center - hip_center)
-                if spine_dir.length > 0.001:
-                    spine_dir = spine_dir.normalized()
-
-                if 'spine' in armature.pose.bones:
-                    spine_bone = armature.pose.bones['spine']
-                    spine_bone.rotation_mode = 'XYZ'
-
-                    if is_front_view:
-                        # Для фронтального вида: наклон вперед/назад (ось X)
-                        angle_x = np.arctan2(spine_dir.z, abs(spine_dir.x)) * 0.5
-                        spine_bone.rotation_euler.x = angle_x
-                    else:
-                        # Для бокового вида: наклон вбок (ось Z)
-                        angle_z = np.arctan2(spine_dir.z, abs(spine_dir.y)) * 0.5
-                        spine_bone.rotation_euler.z = angle_z
-
-            # Применяем углы для конечностей
-            for (start_idx, end_idx), bone_name in bone_mapping.items():
-                if bone_name not in armature.pose.bones:
-                    print(f"⚠️ Кость {bone_name} не найдена в скелете")
-                    continue
-                if start_idx >= len(points_2d) or end_idx >= len(points_2d):
-                    print(f"⚠️ Индексы {start_idx} или {end_idx} вне диапазона (0-{len(points_2d) - 1})")
-                    continue
-
-                start_point = points_2d[start_idx]
-                end_point = points_2d[end_idx]
+            from . import pose_core
 
-                # Вычисляем вектор направления конечности
-                direction = (end_point - start_point)
-                if direction.length < 0.001:
+            for bone_name, axis, angle in pose_core.photo_pose_angles(points_2d, is_front_view):
+                bone = armature.pose.bones.get(bone_name)
+                if bone is None:
+                    log.warning(f"⚠️ Кость {bone_name} не найдена в скелете")
                     continue
-                direction = direction.normalized()
-
-                bone = armature.pose.bones[bone_name]
                 bone.rotation_mode = 'XYZ'
-
-                if is_front_view:
-                    # Для фронтального вида
-                    if 'arm' in bone_name:
-                        # Руки: вращение по оси Z для подъема/опускания
-                        # Используем arctan2(Z, X) для угла в плоскости XZ
-                        angle_z = np.arctan2(direction.z, direction.x) * 1.0
-                        # Для правой руки инвертируем угол
-                        if 'R' in bone_name:
-                            angle_z = -angle_z
-                        bone.rotation_euler.z = angle_z
-                    elif 'thigh' in bone_name or 'shin' in bone_name:
-                        # Ноги: вращение по оси X для движения вперед/назад
-                        # Используем arctan2(Z, X) для угла в плоскости XZ
-                        angle_x = np.arctan2(direction.z, direction.x) * 1.0
-                        bone.rotation_euler.x = angle_x
-                else:
-                    # Для бокового вида
-                    if 'arm' in bone_name:
-                        # Руки: вращение по оси Y для движения вперед/назад
-                        # Используем arctan2(Z, Y) для угла в плоскости YZ
-                        angle_y = np.arctan2(direction.z, direction.y) * 1.0
-                        bone.rotation_euler.y = angle_y
-                    elif 'thigh' in bone_name or 'shin' in bone_name:
-                        # Ноги: вращение по оси X для сгибания
-                        # Используем arctan2(Z, Y) для угла в плоскости YZ
-                        angle_x = np.arctan2(direction.z, direction.y) * 1.0
-                        bone.rotation_euler.x = angle_x
+                bone.rotation_euler[axis] = angle
 
             bpy.context.view_layer.update()
             return True
 
         except Exception as e:
-            print(f"❌ Ошибка при вычислении 2D позы: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception(f"❌ Ошибка при вычислении 2D позы: {e}")
             return False
 
-    def _save_pose_visualization(self, image_path, detection_result, is_front_view):
-        """Сохраняет фото с отмеченными точками"""
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "view_type")
+        layout.prop(self, "model_variant")
+
+
+class VIEW3D_OT_apply_pose_from_photo(PhotoPoseMixin, Operator):
+    """Apply pose from selected photo to active skeleton"""
+    bl_idname = "view3d.apply_pose_from_photo"
+    bl_label = "Выставить позу по фото"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return skeleton_registry.has_skeleton() and context.area and context.area.type == 'VIEW_3D'
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        log.info("📸 Выставление позы по фото...")
+
+        skeleton = self._prepare_skeleton(context)
+        if skeleton is None:
+            return {'CANCELLED'}
+
+        is_front_view = (self.view_type == 'FRONT')
+        with timing.run("apply_pose_from_photo"):
+            success, message = self._apply_pose_with_relative_rotation(image_path=self.filepath,
+                                                                       armature=skeleton,
+                                                                       is_front_view=is_front_view)
+
+        if success:
+            self.report({'INFO'}, f"✅ {message}")
+            return {'FINISHED'}
+        else:
+            self.report({'ERROR'}, f"❌ {message}")
+            return {'CANCELLED'}
+
+
+class VIEW3D_OT_apply_pose_from_photo_async(PhotoPoseMixin, BackgroundJobMixin, Operator):
+    """Apply pose from selected photo without blocking the interface"""
+    bl_idname = "view3d.apply_pose_from_photo_async"
+    bl_label = "Выставить позу по фото (в фоне)"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return (skeleton_registry.has_skeleton() and context.area and context.area.type == 'VIEW_3D'
+                and not cls._is_running())
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        log.info("📸 Выставление позы по фото в фоне...")
+
+        skeleton = self._prepare_skeleton(context)
+        if skeleton is None:
+            return {'CANCELLED'}
+        self._skeleton_name = skeleton.name
+
+        return self._start_job(
+            context, "Детекция позы...",
+            PhotoPoseMixin._detect_photo_points, self.filepath, self.view_type == 'FRONT',
+            self.model_variant
+        )
+
+    def _finish_job(self, context, result):
+        points_2d, error = result
+        if error:
+            self.report({'ERROR'}, f"❌ {error}")
+            return {'CANCELLED'}
+
+        skeleton = bpy.data.objects.get(self._skeleton_name)
+        if skeleton is None:
+            self.report({'ERROR'}, "Скелет был удален во время детекции")
+            return {'CANCELLED'}
+
+        if not self._calculate_2d_pose_angles(skeleton, points_2d, self.view_type == 'FRONT'):
+            self.report({'ERROR'}, "❌ Не удалось вычислить позу по 2D точкам")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, "✅ Поза успешно применена (2D метод, глубина игнорируется)")
+        return {'FINISHED'}
+
+
+class VIEW3D_OT_import_pose_sequence(BackgroundJobMixin, Operator):
+    """Import a folder or selection of photos as pose keyframes"""
+    bl_idname = "view3d.import_pose_sequence"
+    bl_label = "Анимация из папки фото"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    directory: StringProperty(
+        name="Папка",
+        description="Папка с кадрами последовательности",
+        subtype='DIR_PATH'
+    )
+
+    files: CollectionProperty(
+        type=bpy.types.OperatorFileListElement,
+        options={'HIDDEN', 'SKIP_SAVE'}
+    )
+
+    filter_glob: StringProperty(
+        default="*.jpg;*.jpeg;*.png;*.bmp",
+        options={'HIDDEN'}
+    )
+
+    frame_start: IntProperty(
+        name="Начальный кадр",
+        description="Кадр таймлайна для первого фото",
+        default=1
+    )
+
+    frame_step: IntProperty(
+        name="Шаг",
+        description="Сколько кадров таймлайна между соседними фото",
+        default=1,
+        min=1
+    )
+
+    model_variant: EnumProperty(
+        name="Модель",
+        description="Вариант модели MediaPipe Pose",
+        items=MODEL_CASCADE_ITEMS,
+        default='AUTO'
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return (skeleton_registry.has_skeleton() and context.area and context.area.type == 'VIEW_3D'
+                and not cls._is_running())
+
+    def invoke(self, context, event):
+        self.frame_start = context.scene.frame_current
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        import threading
+        from . import pose_from_photo
+
+        log.info("🎞️ Импорт последовательности фото...")
+
+        # Если файлы не выделены - берется вся папка
+        file_names = [f.name for f in self.files if f.name]
+        image_paths = pose_from_photo.list_sequence_images(self.directory, file_names)
+        if not image_paths:
+            self.report({'ERROR'}, "В выбранной папке нет изображений")
+            return {'CANCELLED'}
+
+        skeleton = skeleton_registry.get_active(context)
+        if skeleton is None:
+            self.report({'ERROR'}, "Не найден скелет Pose_Skeleton")
+            return {'CANCELLED'}
+        self._skeleton_name = skeleton.name
+
         try:
-            import cv2
-            from datetime import datetime
+            from . import deps_utils
+            missing = deps_utils.check_deps_quick()
+            if missing:
+                self.report({'ERROR'}, f"Установите зависимости: {', '.join(missing)}")
+                return {'CANCELLED'}
+        except ImportError:
+            self.report({'ERROR'}, "Не удалось проверить зависимости")
+            return {'CANCELLED'}
 
-            image = cv2.imread(image_path)
-            if image is None:
-                print("⚠️ Не удалось загрузить изображение для визуализации")
-                return
+        log.info(f"📂 Кадров: {len(image_paths)}")
+        self._progress = {"done": 0, "total": len(image_paths)}
+        self._cancel_event = threading.Event()
 
-            h, w = image.shape[:2]
-            overlay = image.copy()
-
-            # Рисуем точки
-            key_point_indices = [0, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
-            for idx in key_point_indices:
-                if idx < len(detection_result.pose_landmarks[0]):
-                    landmark = detection_result.pose_landmarks[0][idx]
-                    x = int(landmark.x * w)
-                    y = int(landmark.y * h)
-                    cv2.circle(overlay, (x, y), 6, (0, 0, 255), -1)
-
-            # Рисуем линии между точками
-            connections = [
-                (0, 1), (0, 2), (1, 3), (2, 4), (3, 5), (4, 6),
-                (1, 7), (2, 8), (7, 9), (8, 10), (9, 11), (10, 12), (7, 8)
-            ]
+        return self._start_job(
+            context, "Детекция кадров",
+            pose_from_photo.detect_pose_sequence, image_paths, self._progress, self._cancel_event,
+            self.model_variant
+        )
 
-            for i, j in connections:
-                if i < len(key_point_indices) and j < len(key_point_indices):
-                    idx1 = key_point_indices[i]
-                    idx2 = key_point_indices[j]
-                    if idx1 < len(detection_result.pose_landmarks[0]) and idx2 < len(
-                            detection_result.pose_landmarks[0]):
-                        x1 = int(detection_result.pose_landmarks[0][idx1].x * w)
-                        y1 = int(detection_result.pose_landmarks[0][idx1].y * h)
-                        x2 = int(detection_result.pose_landmarks[0][idx2].x * w)
-                        y2 = int(detection_result.pose_landmarks[0][idx2].y * h)
-                        cv2.line(overlay, (x1, y1), (x2, y2), (0, 255, 0), 2)
-
-            # Добавляем текст
-            view_type = "FRONT" if is_front_view else "SIDE"
-            text = f"MediaPipe Pose - {view_type} View"
-            cv2.putText(overlay, text, (20, 40),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
-
-            # Смешиваем
-            alpha = 0.6
-            result = cv2.addWeighted(image, 1 - alpha, overlay, alpha, 0)
-
-            # Сохраняем
-            original_dir = os.path.dirname(image_path)
-            original_name = os.path.basename(image_path)
-            name_without_ext = os.path.splitext(original_name)[0]
-
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_filename = f"{name_without_ext}_pose_{timestamp}.png"
-            output_path = os.path.join(original_dir, output_filename)
-
-            cv2.imwrite(output_path, result)
-            print(f"✅ Фото с скелетом сохранено: {output_path}")
+    def _finish_job(self, context, landmarks):
+        from . import pose_from_photo
 
-        except Exception as e:
-            print(f"⚠️ Ошибка при сохранении визуализации: {e}")
+        skeleton = bpy.data.objects.get(self._skeleton_name)
+        if skeleton is None:
+            self.report({'ERROR'}, "Скелет был удален во время детекции")
+            return {'CANCELLED'}
+
+        keyed_frames, keyed_bones = pose_from_photo.apply_pose_sequence(
+            skeleton, landmarks, self.frame_start, self.frame_step
+        )
+        if keyed_frames == 0:
+            self.report({'ERROR'}, "Поза не найдена ни на одном фото")
+            return {'CANCELLED'}
+
+        scene = context.scene
+        last_frame = self.frame_start + (len(landmarks) - 1) * self.frame_step
+        if scene.frame_end < last_frame:
+            scene.frame_end = last_frame
+
+        skipped = len(landmarks) - keyed_frames
+        message = f"✅ Ключи записаны: {keyed_frames} кадров, {keyed_bones} костей"
+        if skipped:
+            message += f" (без позы: {skipped})"
+        escalated = self._progress.get("escalated")
+        if escalated:
+            message += f", повторено на точной модели: {len(escalated)}"
+        self.report({'INFO'}, message)
+        return {'FINISHED'}
+
+
+class VIEW3D_OT_import_pose_video(BackgroundJobMixin, Operator):
+    """Import a video file as pose keyframes (MediaPipe VIDEO mode with tracking)"""
+    bl_idname = "view3d.import_pose_video"
+    bl_label = "Анимация из видео"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filepath: StringProperty(
+        name="Путь к видео",
+        description="Путь к видеофайлу",
+        maxlen=1024,
+        default="",
+        subtype='FILE_PATH'
+    )
+
+    filter_glob: StringProperty(
+        default="*.mp4;*.mov;*.avi;*.mkv;*.webm",
+        options={'HIDDEN'}
+    )
+
+    frame_start: IntProperty(
+        name="Начальный кадр",
+        description="Кадр таймлайна, соответствующий первому обработанному кадру видео",
+        default=1
+    )
+
+    video_start: IntProperty(
+        name="С кадра видео",
+        description="Первый кадр видео (с нуля)",
+        default=0,
+        min=0
+    )
+
+    video_end: IntProperty(
+        name="По кадр видео",
+        description="Последний кадр видео включительно (-1 - до конца)",
+        default=-1,
+        min=-1
+    )
+
+    video_step: IntProperty(
+        name="Шаг",
+        description="Обрабатывать каждый N-й кадр видео",
+        default=1,
+        min=1
+    )
+
+    model_variant: EnumProperty(
+        name="Модель",
+        description="Вариант модели MediaPipe Pose",
+        items=MODEL_VARIANT_ITEMS,
+        default='AUTO'
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return (skeleton_registry.has_skeleton() and context.area and context.area.type == 'VIEW_3D'
+                and not cls._is_running())
+
+    def invoke(self, context, event):
+        self.frame_start = context.scene.frame_current
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        import threading
+        from . import video_import
+
+        log.info("🎬 Импорт позы из видео...")
+
+        if not self.filepath or not os.path.exists(self.filepath):
+            self.report({'ERROR'}, "Видеофайл не выбран")
+            return {'CANCELLED'}
+
+        skeleton = skeleton_registry.get_active(context)
+        if skeleton is None:
+            self.report({'ERROR'}, "Не найден скелет Pose_Skeleton")
+            return {'CANCELLED'}
+        self._skeleton_name = skeleton.name
+
+        try:
+            from . import deps_utils
+            # Видео трекается в процессе Blender: сервер детекции его не заменяет
+            missing = deps_utils.check_deps_quick(local_detection=True)
+            if missing:
+                self.report({'ERROR'}, f"Установите зависимости: {', '.join(missing)}")
+                return {'CANCELLED'}
+        except ImportError:
+            self.report({'ERROR'}, "Не удалось проверить зависимости")
+            return {'CANCELLED'}
+
+        from . import model_registry
+        model_path = model_registry.resolve(self.model_variant, purpose='FINAL')
+        if model_path is None:
+            self.report({'ERROR'}, model_registry.missing_message())
+            return {'CANCELLED'}
+
+        info, error = video_import.probe_video(self.filepath)
+        if error:
+            self.report({'ERROR'}, error)
+            return {'CANCELLED'}
+
+        log.info(f"🎞️ {os.path.basename(self.filepath)}: {info['frame_count']} кадров, "
+                 f"{info['fps']:.2f} fps, {info['width']}x{info['height']}")
+
+        self._progress = {"done": 0, "total": 0}
+        self._cancel_event = threading.Event()
+
+        return self._start_job(
+            context, "Детекция кадров видео",
+            video_import.detect_video_landmarks, self.filepath, model_path,
+            self.video_start, self.video_end, self.video_step,
+            self._progress, self._cancel_event
+        )
+
+    def _finish_job(self, context, result):
+        from . import pose_from_photo
+
+        landmarks, error = result
+        if error:
+            self.report({'ERROR'}, error)
+            return {'CANCELLED'}
+
+        skeleton = bpy.data.objects.get(self._skeleton_name)
+        if skeleton is None:
+            self.report({'ERROR'}, "Скелет был удален во время детекции")
+            return {'CANCELLED'}
+
+        # Шаг по видео сохраняется на таймлайне: тайминг движения не меняется
+        keyed_frames, keyed_bones = pose_from_photo.apply_pose_sequence(
+            skeleton, landmarks, self.frame_start, self.video_step
+        )
+        if keyed_frames == 0:
+            self.report({'ERROR'}, "Поза не найдена ни на одном кадре видео")
+            return {'CANCELLED'}
+
+        scene = context.scene
+        last_frame = self.frame_start + (len(landmarks) - 1) * self.video_step
+        if scene.frame_end < last_frame:
+            scene.frame_end = last_frame
+
+        skipped = len(landmarks) - keyed_frames
+        message = f"✅ Ключи записаны: {keyed_frames} кадров, {keyed_bones} костей"
+        if skipped:
+            message += f" (без позы: {skipped})"
+        self.report({'INFO'}, message)
+        return {'FINISHED'}
+
+
+class VIEW3D_OT_toggle_pose_stream(Operator):
+    """Start or stop live pose streaming from a local socket"""
+    bl_idname = "view3d.toggle_pose_stream"
+    bl_label = "Живой поток позы"
+    bl_options = {'REGISTER'}
+
+    port: IntProperty(
+        name="Порт",
+        description="Локальный порт для приема кадров или точек",
+        default=8766,
+        min=1024,
+        max=65535
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return skeleton_registry.has_skeleton()
+
+    def execute(self, context):
+        from . import stream_ingest
+
+        if stream_ingest.is_running():
+            stream_ingest.stop()
+            self.report({'INFO'}, "Поток позы остановлен")
+            return {'FINISHED'}
+
+        skeleton = skeleton_registry.get_active(context)
+        if skeleton is None:
+            self.report({'ERROR'}, "Не найден скелет Pose_Skeleton")
+            return {'CANCELLED'}
+
+        # Модель нужна только для сырых кадров; готовые точки применяются без нее.
+        # Живой поток - превью, поэтому по умолчанию быстрая модель
+        from . import model_registry
+        model_path = model_registry.resolve(purpose='PREVIEW')
+        if model_path is None:
+            log.warning("⚠️ Модель не найдена - поток примет только готовые точки")
+        else:
+            # Сырые кадры потока детектируются в процессе Blender, без сервера
+            from . import deps_utils
+            if not deps_utils.is_available('mediapipe'):
+                log.warning("⚠️ mediapipe не установлен - поток примет только готовые точки")
+                model_path = None
+
+        error = stream_ingest.start(skeleton.name, model_path, port=self.port)
+        if error:
+            self.report({'ERROR'}, error)
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"📡 Поток позы запущен на порту {self.port}")
+        return {'FINISHED'}
 
-    def draw(self, context):
-        layout = self.layout
-        layout.prop(self, "view_type")
 
 class VIEW3D_OT_reset_skeleton_pose(Operator):
     """Reset skeleton pose to default T-pose"""
@@ -626,28 +1029,16 @@ class VIEW3D_OT_reset_skeleton_pose(Operator):
 
     @classmethod
     def poll(cls, context):
-        skeletons = [
-            obj for obj in bpy.data.objects
-            if obj.type == 'ARMATURE' and obj.name.startswith("Pose_Skeleton")
-        ]
-        return len(skeletons) > 0 and context.area and context.area.type == 'VIEW_3D'
+        return skeleton_registry.has_skeleton() and context.area and context.area.type == 'VIEW_3D'
 
     def execute(self, context):
-        print("\n" + "=" * 60)
-        print("🔄 Photo Tool Pro: Сброс позы скелета...")
-        print("=" * 60)
-
-        skeletons = [
-            obj for obj in bpy.data.objects
-            if obj.type == 'ARMATURE' and obj.name.startswith("Pose_Skeleton")
-        ]
+        log.info("🔄 Сброс позы скелета...")
 
-        if not skeletons:
+        skeleton = skeleton_registry.get_active(context)
+        if skeleton is None:
             self.report({'ERROR'}, "Не найден скелет Pose_Skeleton")
             return {'CANCELLED'}
 
-        skeleton = skeletons[0]
-
         if bpy.context.mode != 'POSE':
             bpy.ops.object.mode_set(mode='OBJECT')
             bpy.ops.object.select_all(action='DESELECT')
@@ -657,7 +1048,7 @@ class VIEW3D_OT_reset_skeleton_pose(Operator):
 
         try:
             for bone in skeleton.pose.bones:
-                bone.rotation_quaternion = Quaternion()
+                bone.rotation_quaternion = (1.0, 0.0, 0.0, 0.0)
                 bone.location = (0, 0, 0)
                 bone.scale = (1, 1, 1)
 
@@ -668,6 +1059,77 @@ class VIEW3D_OT_reset_skeleton_pose(Operator):
             return {'CANCELLED'}
 
 
+class VIEW3D_OT_export_timing_trace(Operator):
+    """Export recorded pipeline stage timings as a Chrome trace JSON"""
+    bl_idname = "view3d.export_timing_trace"
+    bl_label = "Экспорт замеров (Chrome trace)"
+    bl_options = {'REGISTER'}
+
+    filepath: StringProperty(
+        name="Путь к файлу",
+        description="JSON для chrome://tracing или Perfetto",
+        subtype='FILE_PATH',
+        maxlen=1024,
+        default=""
+    )
+
+    filter_glob: StringProperty(
+        default="*.json",
+        options={'HIDDEN'}
+    )
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = "photo_tool_pro_trace.json"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        path = bpy.path.ensure_ext(self.filepath, ".json")
+        try:
+            count = timing.export_trace(path)
+        except OSError as e:
+            self.report({'ERROR'}, f"Не удалось сохранить замеры: {e}")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"✅ Сохранено событий: {count} ({os.path.basename(path)})")
+        return {'FINISHED'}
+
+
+class VIEW3D_OT_set_log_level(Operator):
+    """Set how verbose the add-on log is (console and panel)"""
+    bl_idname = "view3d.set_log_level"
+    bl_label = "Уровень журнала"
+    bl_options = {'REGISTER'}
+
+    level: EnumProperty(
+        name="Уровень",
+        items=[
+            ('DEBUG', "Отладка", "Все сообщения, включая дампы координат"),
+            ('INFO', "Информация", "Ход выполнения операций"),
+            ('WARNING', "Предупреждения", "Только предупреждения и ошибки (по умолчанию)"),
+            ('ERROR', "Ошибки", "Только ошибки"),
+        ],
+        default='WARNING'
+    )
+
+    def execute(self, context):
+        log_utils.set_level(self.level)
+        self.report({'INFO'}, f"Уровень журнала: {self.level}")
+        return {'FINISHED'}
+
+
+class VIEW3D_OT_clear_log(Operator):
+    """Clear the add-on log shown in the panel"""
+    bl_idname = "view3d.clear_log"
+    bl_label = "Очистить журнал"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        log_utils.clear()
+        return {'FINISHED'}
+
+
 classes = [
     VIEW3D_OT_create_skeleton,
     VIEW3D_OT_create_skeleton_with_screenshot,
@@ -677,7 +1139,15 @@ classes = [
     VIEW3D_OT_clear_skeletons,
     VIEW3D_OT_check_dependencies,
     VIEW3D_OT_apply_pose_from_photo,
-    VIEW3D_OT_reset_skeleton_pose
+    VIEW3D_OT_reset_skeleton_pose,
+    VIEW3D_OT_create_skeleton_async,
+    VIEW3D_OT_apply_pose_from_photo_async,
+    VIEW3D_OT_import_pose_sequence,
+    VIEW3D_OT_import_pose_video,
+    VIEW3D_OT_toggle_pose_stream,
+    VIEW3D_OT_export_timing_trace,
+    VIEW3D_OT_set_log_level,
+    VIEW3D_OT_clear_log
 ]
 
 
@@ -685,9 +1155,9 @@ def register():
     for cls in classes:
         try:
             bpy.utils.register_class(cls)
-            print(f"✅ Зарегистрирован оператор: {cls.__name__}")
+            log.debug("✅ Зарегистрирован оператор: %s", cls.__name__)
         except Exception as e:
-            print(f"⚠️ Ошибка регистрации оператора {cls.__name__}: {e}")
+            log.warning(f"⚠️ Ошибка регистрации оператора {cls.__name__}: {e}")
 
 
 def unregister():
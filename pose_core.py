@@ -0,0 +1,405 @@
+"""
+Векторизованная математика точек MediaPipe (без bpy)
+
+Точки хранятся в массивах NumPy формы (33, 4) - x, y, z, visibility -
+или (F, 33, 4) для пакета кадров. Выборка 13 ключевых точек делается одним
+индексированием, а перевод в координаты Blender - одним умножением на
+заранее посчитанную аффинную матрицу вида (FRONT/SIDE).
+"""
+import numpy as np
+
+# Индексы MediaPipe для 13 ключевых точек, которые использует аддон
+# 0=нос, 11/12=плечи, 13/14=локти, 15/16=запястья,
+# 23/24=бедра, 25/26=колени, 27/28=лодыжки
+KEY_POINT_INDICES = np.array([0, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28], dtype=np.intp)
+
+KEY_POINT_NAMES = [
+    "Нос", "Левое плечо", "Правое плечо", "Левый локоть", "Правый локоть",
+    "Левое запястье", "Правое запястье", "Левое бедро", "Правое бедро",
+    "Левое колено", "Правое колено", "Левая лодыжка", "Правая лодыжка",
+]
+
+
+def gather_key_points(landmarks):
+    """(..., 33, 4) -> (..., 13, 4): выборка ключевых точек одним индексированием"""
+    return np.asarray(landmarks)[..., KEY_POINT_INDICES, :]
+
+
+def apply_affine(points, matrix):
+    """
+    Применяет аффинную матрицу (3, 4) к точкам (..., N, >=3).
+    Используются только первые три столбца (x, y, z).
+    """
+    points = np.asarray(points, dtype=np.float64)
+    return points[..., :3] @ matrix[:, :3].T + matrix[:, 3]
+
+
+def view_affine(width, height, is_front_view, scale, depth_factor, vertical_offset=0.0):
+    """
+    Матрица (3, 4): нормализованные точки MediaPipe (x, y, z) -> координаты Blender.
+    В Blender: X - вправо, Z - вверх, Y - глубина (вперед/назад).
+
+    Эквивалентна прежнему поточечному переводу через пиксели:
+    центр кадра (w // 2, h // 2), Y инвертируется, глубина z уменьшается depth_factor.
+    """
+    w, h = float(width), float(height)
+    center_x, center_y = width // 2, height // 2
+
+    # Горизонталь кадра: x * w * scale - center_x * scale
+    horizontal = (w * scale, 0.0, 0.0, -center_x * scale)
+    # Вертикаль кадра (инвертирована): -(y * h - center_y) * scale + смещение
+    vertical = (0.0, -h * scale, 0.0, center_y * scale + vertical_offset)
+    # Глубина MediaPipe
+    depth = (0.0, 0.0, -w * scale * depth_factor, 0.0)
+
+    if is_front_view:
+        # Front вид: X - горизонталь, Z - вертикаль, Y - глубина
+        rows = (horizontal, depth, vertical)
+    else:
+        # Side вид: Y - горизонталь, Z - вертикаль, X - глубина
+        rows = (depth, horizontal, vertical)
+
+    return np.array(rows, dtype=np.float64)
+
+
+def photo_plane_affine(is_front_view):
+    """
+    Матрица (3, 4) для 2D метода: точки лежат в плоскости фото, глубина игнорируется.
+    x, y из [0, 1] переводятся в [-0.5, 0.5], Y кадра инвертируется в Z Blender.
+    """
+    if is_front_view:
+        # X фото -> X Blender, Y фото -> Z Blender, Y Blender = 0
+        rows = ((1.0, 0.0, 0.0, -0.5), (0.0, 0.0, 0.0, 0.0), (0.0, -1.0, 0.0, 0.5))
+    else:
+        # X фото -> Y Blender, Y фото -> Z Blender, X Blender = 0
+        rows = ((0.0, 0.0, 0.0, 0.0), (1.0, 0.0, 0.0, -0.5), (0.0, -1.0, 0.0, 0.5))
+    return np.array(rows, dtype=np.float64)
+
+
+def landmarks_to_blender(landmarks, width, height, is_front_view, scale, depth_factor,
+                         vertical_offset=0.0):
+    """(..., 33, 4) -> (..., 13, 3): ключевые точки в координатах Blender"""
+    matrix = view_affine(width, height, is_front_view, scale, depth_factor, vertical_offset)
+    return apply_affine(gather_key_points(landmarks), matrix)
+
+
+def landmarks_to_pixels(landmarks, width, height):
+    """(..., 33, 4) -> (..., 13, 2): ключевые точки в пикселях кадра"""
+    key_points = gather_key_points(landmarks)
+    return key_points[..., :2].astype(np.float64) * (float(width), float(height))
+
+
+# --- Прямой решатель позы -------------------------------------------------
+
+# Масштаб и ослабление глубины при переводе нормализованных точек MediaPipe
+# в пространство арматуры (как у прежнего временного скелета)
+POSE_SPACE_SCALE = 5.0
+POSE_DEPTH_FACTOR = 0.1
+
+# Кость -> (точки начала, точки конца) в индексах 13 ключевых точек.
+# Если точек несколько, берется их среднее (позвоночник: центр таза -> центр плеч).
+POSE_BONE_SEGMENTS = {
+    'spine': ((7, 8), (1, 2)),
+    'upper_arm.L': ((1,), (3,)),
+    'forearm.L': ((3,), (5,)),
+    'upper_arm.R': ((2,), (4,)),
+    'forearm.R': ((4,), (6,)),
+    'thigh.L': ((7,), (9,)),
+    'shin.L': ((9,), (11,)),
+    'thigh.R': ((8,), (10,)),
+    'shin.R': ((10,), (12,)),
+}
+
+
+def mediapipe_to_pose_space(key_points):
+    """
+    (..., 13, >=3) нормализованные x, y, z -> координаты пространства арматуры:
+    X - горизонталь кадра, Z - вверх (Y кадра инвертирован), Y - ослабленная глубина.
+    """
+    key_points = np.asarray(key_points, dtype=np.float64)
+    x = key_points[..., 0] - 0.5
+    y = key_points[..., 1] - 0.5
+    z = key_points[..., 2] * POSE_DEPTH_FACTOR
+    return np.stack((x, z, -y), axis=-1) * POSE_SPACE_SCALE
+
+
+def segment_directions(points, bone_names, segments=POSE_BONE_SEGMENTS):
+    """
+    Единичные направления костей (..., B, 3) из точек (..., 13, 3).
+    Для костей без сегмента или с вырожденной длиной возвращается NaN.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    directions = np.full(points.shape[:-2] + (len(bone_names), 3), np.nan)
+
+    for b, name in enumerate(bone_names):
+        segment = segments.get(name)
+        if segment is None:
+            continue
+        start_idx, end_idx = segment
+        start = points[..., list(start_idx), :].mean(axis=-2)
+        end = points[..., list(end_idx), :].mean(axis=-2)
+        directions[..., b, :] = end - start
+
+    lengths = np.linalg.norm(directions, axis=-1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        directions = np.where(lengths > 1e-6, directions / lengths, np.nan)
+    return directions
+
+
+def quaternion_to_matrix(quats):
+    """(..., 4) кватернионы (w, x, y, z) -> (..., 3, 3) матрицы поворота"""
+    quats = np.asarray(quats, dtype=np.float64)
+    norm = np.linalg.norm(quats, axis=-1, keepdims=True)
+    w, x, y, z = np.moveaxis(quats / np.where(norm > 0, norm, 1.0), -1, 0)
+
+    return np.stack((
+        np.stack((1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)), axis=-1),
+        np.stack((2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)), axis=-1),
+        np.stack((2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)), axis=-1),
+    ), axis=-2)
+
+
+def quaternion_from_y_axis(directions):
+    """
+    Кратчайший поворот оси Y кости в направления (..., 3) -> кватернионы (..., 4).
+    Для направления, противоположного Y, используется поворот на 180° вокруг X.
+    """
+    v = np.asarray(directions, dtype=np.float64)
+    w = 1.0 + v[..., 1]
+    quats = np.stack((w, v[..., 2], np.zeros_like(w), -v[..., 0]), axis=-1)
+
+    opposite = w < 1e-6
+    quats[opposite] = (0.0, 1.0, 0.0, 0.0)
+
+    return quats / np.linalg.norm(quats, axis=-1, keepdims=True)
+
+
+def bone_depths(parent_indices):
+    """Глубина каждой кости в иерархии (корни - 0)"""
+    depths = np.zeros(len(parent_indices), dtype=np.intp)
+    for b in range(len(parent_indices)):
+        depth, parent = 0, parent_indices[b]
+        while parent >= 0:
+            depth += 1
+            parent = parent_indices[parent]
+        depths[b] = depth
+    return depths
+
+
+def solve_pose_quaternions(rest_matrices, parent_indices, directions, current_quats=None):
+    """
+    Локальные кватернионы поз-костей по направлениям костей.
+
+    rest_matrices  - (B, 3, 3) поворот покоя каждой кости в пространстве арматуры
+                     (bone.matrix_local)
+    parent_indices - (B,) индекс родителя или -1
+    directions     - (B, 3) или (F, B, 3) целевые направления в пространстве
+                     арматуры; NaN - кость не трогаем
+    current_quats  - (B, 4) текущие кватернионы для костей без направления
+
+    Кости обрабатываются уровнями иерархии (родители раньше детей), каждый
+    уровень - одной векторной операцией для всех кадров сразу.
+    Возвращает (B, 4) или (F, B, 4) кватернионы (w, x, y, z).
+    """
+    rest = np.asarray(rest_matrices, dtype=np.float64)
+    parents = np.asarray(parent_indices, dtype=np.intp)
+    directions = np.asarray(directions, dtype=np.float64)
+
+    single = directions.ndim == 2
+    if single:
+        directions = directions[np.newaxis]
+    frames, bones = directions.shape[:2]
+
+    if current_quats is None:
+        current_quats = np.tile((1.0, 0.0, 0.0, 0.0), (bones, 1))
+    current_quats = np.asarray(current_quats, dtype=np.float64)
+
+    # Поворот покоя относительно родителя: parent_rest^T @ rest
+    rest_relative = rest.copy()
+    has_parent = parents >= 0
+    rest_relative[has_parent] = np.swapaxes(rest[parents[has_parent]], -1, -2) @ rest[has_parent]
+
+    quats = np.broadcast_to(current_quats, (frames, bones, 4)).copy()
+    posed = np.empty((frames, bones, 3, 3))
+    depths = bone_depths(parents)
+
+    for depth in range(int(depths.max()) + 1 if bones else 0):
+        level = np.nonzero(depths == depth)[0]
+        level_parents = parents[level]
+
+        # Базис кости до ее собственного поворота: pose(parent) @ rest_relative
+        basis = np.broadcast_to(rest_relative[level], (frames, len(level), 3, 3)).copy()
+        rooted = level_parents >= 0
+        if rooted.any():
+            basis[:, rooted] = posed[:, level_parents[rooted]] @ rest_relative[level[rooted]]
+
+        target = directions[:, level]
+        valid = ~np.isnan(target).any(axis=-1)
+        if valid.any():
+            # Направление в локальных осях кости и поворот оси Y в него
+            local = np.einsum('fbji,fbj->fbi', basis, np.nan_to_num(target))
+            solved = quaternion_from_y_axis(local)
+            level_quats = quats[:, level]
+            level_quats[valid] = solved[valid]
+            quats[:, level] = level_quats
+
+        posed[:, level] = basis @ quaternion_to_matrix(quats[:, level])
+
+    return quats[0] if single else quats
+
+
+def make_quaternions_continuous(quats):
+    """
+    (F, ..., 4) -> (F, ..., 4): меняет знак кватернионов так, чтобы соседние
+    кадры были в одной полусфере (q и -q - один поворот, но интерполяция
+    ключей между ними идет "длинным путем").
+    """
+    quats = np.array(quats, dtype=np.float64)
+    if len(quats) < 2:
+        return quats
+
+    dots = np.sum(quats[1:] * quats[:-1], axis=-1)
+    flips = np.where(dots < 0.0, -1.0, 1.0)
+    # Знак кадра - произведение всех смен знака до него
+    signs = np.concatenate((np.ones_like(flips[:1]), np.cumprod(flips, axis=0)), axis=0)
+    return quats * signs[..., np.newaxis]
+
+
+# --- Объединение видов ------------------------------------------------------
+
+def fuse_views(front_3d=None, side_3d=None):
+    """
+    Объединяет координаты Blender (..., 13, 3) с FRONT и SIDE видов:
+    X берется из FRONT, Y (глубина) - из SIDE, Z усредняется.
+    Если есть только один вид, возвращается он. Без видов - None.
+    """
+    if front_3d is None:
+        return None if side_3d is None else np.asarray(side_3d, dtype=np.float64)
+    if side_3d is None:
+        return np.asarray(front_3d, dtype=np.float64)
+
+    front_3d = np.asarray(front_3d, dtype=np.float64)
+    side_3d = np.asarray(side_3d, dtype=np.float64)
+    return np.stack((
+        front_3d[..., 0],
+        side_3d[..., 1],
+        (front_3d[..., 2] + side_3d[..., 2]) / 2,
+    ), axis=-1)
+
+
+# --- Раскладка костей Pose_Skeleton ----------------------------------------
+
+# На сколько опускается хвост кости таза относительно ее головы
+PELVIS_TAIL_DROP = 0.05
+
+# (кость, голова, хвост, родитель, use_connect); голова и хвост - индексы
+# 13 ключевых точек, несколько индексов усредняются. Родители раньше детей.
+SKELETON_BONES = (
+    ('pelvis', (7, 8), None, None, False),
+    ('thigh.L', (7,), (9,), 'pelvis', False),
+    ('shin.L', (9,), (11,), 'thigh.L', True),
+    ('thigh.R', (8,), (10,), 'pelvis', False),
+    ('shin.R', (10,), (12,), 'thigh.R', True),
+    ('spine', (7, 8), (1, 2), 'pelvis', True),
+    ('shoulder.L', (1, 2), (1,), 'spine', False),
+    ('upper_arm.L', (1,), (3,), 'shoulder.L', True),
+    ('forearm.L', (3,), (5,), 'upper_arm.L', True),
+    ('shoulder.R', (1, 2), (2,), 'spine', False),
+    ('upper_arm.R', (2,), (4,), 'shoulder.R', True),
+    ('forearm.R', (4,), (6,), 'upper_arm.R', True),
+    ('neck', (1, 2), (0,), 'spine', True),
+)
+
+
+def skeleton_center(points):
+    """Центр скелета: середина между центром таза и центром плеч"""
+    points = np.asarray(points, dtype=np.float64)
+    pelvis_center = points[[7, 8]].mean(axis=0)
+    shoulders_center = points[[1, 2]].mean(axis=0)
+    return (pelvis_center + shoulders_center) / 2
+
+
+def skeleton_bone_layout(coordinates, scale=1.0):
+    """
+    Головы и хвосты костей Pose_Skeleton из координат (13, 3).
+    Точки масштабируются и смещаются так, чтобы центр скелета был в (0, 0, 0).
+    Возвращает (center, heads (B, 3), tails (B, 3)) в порядке SKELETON_BONES;
+    center - центр скелета до смещения.
+    """
+    points = np.asarray(coordinates, dtype=np.float64).reshape(-1, 3)[:13] * scale
+    center = skeleton_center(points)
+    offsets = points - center
+
+    heads = np.empty((len(SKELETON_BONES), 3))
+    tails = np.empty((len(SKELETON_BONES), 3))
+    for b, (_name, head, tail, _parent, _connect) in enumerate(SKELETON_BONES):
+        heads[b] = offsets[list(head)].mean(axis=0)
+        if tail is None:
+            tails[b] = heads[b] - (0.0, 0.0, PELVIS_TAIL_DROP)
+        else:
+            tails[b] = offsets[list(tail)].mean(axis=0)
+
+    return center, heads, tails
+
+
+# --- Углы 2D метода (поза по одному фото) -----------------------------------
+
+# Сегменты конечностей в индексах 13 ключевых точек
+PHOTO_LIMB_SEGMENTS = (
+    ((1, 3), 'upper_arm.L'),
+    ((3, 5), 'forearm.L'),
+    ((2, 4), 'upper_arm.R'),
+    ((4, 6), 'forearm.R'),
+    ((7, 9), 'thigh.L'),
+    ((9, 11), 'shin.L'),
+    ((8, 10), 'thigh.R'),
+    ((10, 12), 'shin.R'),
+)
+
+
+def photo_pose_angles(points_2d, is_front_view):
+    """
+    Углы Эйлера костей по точкам в плоскости фото (13, 3) - 2D метод,
+    глубина игнорируется. Возвращает список (кость, ось XYZ 0..2, угол).
+    """
+    points_2d = np.asarray(points_2d, dtype=np.float64)
+    angles = []
+
+    # Позвоночник: от центра бедер к центру плеч, угол ослаблен вдвое
+    if len(points_2d) > 8:
+        spine_dir = (points_2d[1] + points_2d[2]) * 0.5 - (points_2d[7] + points_2d[8]) * 0.5
+        if is_front_view:
+            # Наклон вперед/назад (ось X)
+            angles.append(('spine', 0, np.arctan2(spine_dir[2], abs(spine_dir[0])) * 0.5))
+        else:
+            # Наклон вбок (ось Z)
+            angles.append(('spine', 2, np.arctan2(spine_dir[2], abs(spine_dir[1])) * 0.5))
+
+    # Направления всех конечностей - одной операцией над массивом
+    segments = np.array([segment for segment, _name in PHOTO_LIMB_SEGMENTS])
+    in_range = (segments < len(points_2d)).all(axis=1)
+    directions = np.zeros((len(segments), 3))
+    directions[in_range] = points_2d[segments[in_range, 1]] - points_2d[segments[in_range, 0]]
+    lengths = np.linalg.norm(directions, axis=1)
+
+    for (_segment, bone_name), valid, direction, length in zip(
+            PHOTO_LIMB_SEGMENTS, in_range, directions, lengths):
+        if not valid or length < 0.001:
+            continue
+        direction = direction / length
+        is_arm = 'arm' in bone_name
+
+        if is_front_view:
+            # Руки поднимаются по оси Z, ноги движутся по оси X; угол в плоскости XZ
+            angle = np.arctan2(direction[2], direction[0])
+            if is_arm:
+                # Для правой руки угол инвертируется
+                angles.append((bone_name, 2, -angle if bone_name.endswith('.R') else angle))
+            else:
+                angles.append((bone_name, 0, angle))
+        else:
+            # Руки движутся по оси Y, ноги сгибаются по оси X; угол в плоскости YZ
+            angle = np.arctan2(direction[2], direction[1])
+            angles.append((bone_name, 1 if is_arm else 0, angle))
+
+    return angles
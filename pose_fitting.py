@@ -7,6 +7,10 @@ import bpy  # Импортируем bpy на верхнем уровне
 from bpy.types import Operator
 from bpy.props import StringProperty, EnumProperty
 
+from . import log_utils
+
+log = log_utils.get_logger(__name__)
+
 
 class VIEW3D_OT_edit_skeleton(Operator):
     """Select skeleton and enter edit mode"""
@@ -107,9 +111,7 @@ class VIEW3D_OT_create_skeleton(Operator):
     def execute(self, context):
         from . import model_utils
 
-        print("\n" + "=" * 60)
-        print("🎯 Photo Tool Pro: Создание скелета...")
-        print("=" * 60)
+        log.info("🎯 Создание скелета...")
 
         skeleton, debug_images, error = model_utils.create_skeleton_from_viewport(context, make_screenshot=False)
 
@@ -134,9 +136,7 @@ class VIEW3D_OT_create_skeleton_with_screenshot(Operator):
     def execute(self, context):
         from . import model_utils
 
-        print("\n" + "=" * 60)
-        print("🎯 Photo Tool Pro: Создание скелета + 2D скриншоты...")
-        print("=" * 60)
+        log.info("🎯 Создание скелета + 2D скриншоты...")
 
         skeleton, debug_images, error = model_utils.create_skeleton_from_viewport(context, make_screenshot=True)
 
@@ -300,9 +300,7 @@ class VIEW3D_OT_apply_pose_from_photo(Operator):
         return {'RUNNING_MODAL'}
 
     def execute(self, context):
-        print("\n" + "=" * 60)
-        print("📸 Photo Tool Pro: Выставление позы по фото...")
-        print("=" * 60)
+        log.info("📸 Выставление позы по фото...")
 
         if not self.filepath:
             self.report({'ERROR'}, "Файл не выбран")
@@ -327,7 +325,7 @@ class VIEW3D_OT_apply_pose_from_photo(Operator):
             context.view_layer.objects.active = skeleton
             # Переходим в режим позы
             bpy.ops.object.mode_set(mode='POSE')
-            print("✅ Автоматически переключились в Pose Mode")
+            log.info("✅ Автоматически переключились в Pose Mode")
 
         try:
             from . import deps_utils
@@ -352,7 +350,7 @@ class VIEW3D_OT_apply_pose_from_photo(Operator):
             )
         except ImportError:
             # Если pose_fitting не найден, используем старую функцию
-            print("⚠️  Модуль pose_fitting не найден, используем старую версию")
+            log.warning("⚠️  Модуль pose_fitting не найден, используем старую версию")
             try:
                 from . import pose_from_photo
                 is_front_view = (self.view_type == 'FRONT')
@@ -394,9 +392,7 @@ class VIEW3D_OT_reset_skeleton_pose(Operator):
     def execute(self, context):
         from mathutils import Quaternion
 
-        print("\n" + "=" * 60)
-        print("🔄 Photo Tool Pro: Сброс позы скелета...")
-        print("=" * 60)
+        log.info("🔄 Сброс позы скелета...")
 
         skeletons = [
             obj for obj in bpy.data.objects
@@ -448,9 +444,9 @@ def register():
     for cls in classes:
         try:
             bpy.utils.register_class(cls)
-            print(f"✅ Зарегистрирован оператор: {cls.__name__}")
+            log.info(f"✅ Зарегистрирован оператор: {cls.__name__}")
         except Exception as e:
-            print(f"⚠️ Ошибка регистрации оператора {cls.__name__}: {e}")
+            log.warning(f"⚠️ Ошибка регистрации оператора {cls.__name__}: {e}")
 
 
 def unregister():
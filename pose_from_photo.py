@@ -1,68 +1,44 @@
 """
-Утилиты для выставления позы по фото - МЕТОД КОПИРОВАНИЯ ИЗ ВРЕМЕННОГО СКЕЛЕТА
+Утилиты для выставления позы по фото - ПРЯМОЙ РАСЧЕТ ПОВОРОТОВ КОСТЕЙ
 """
 
 import os
-import sys
 import numpy as np
-from mathutils import Vector, Quaternion, Euler
 
-# Автоматическая настройка путей для Blender
-user_site = os.path.expanduser("~\\AppData\\Roaming\\Python\\Python311\\site-packages")
-if user_site not in sys.path:
-    sys.path.insert(0, user_site)
+from . import log_utils
+from . import pose_core
+from . import timing
 
+log = log_utils.get_logger(__name__)
 
-def _save_pose_visualization(image_path, landmarks_2d, view_type):
-    """Сохраняет фото с нарисованным поверх скелетом MediaPipe"""
+
+def save_pose_visualization(image, landmarks_2d, view_type):
+    """
+    Сохраняет фото с нарисованным поверх скелетом MediaPipe рядом с исходным файлом.
+    image        - путь к файлу или уже декодированный image_frame.DecodedFrame
+    landmarks_2d - 13 ключевых точек в пикселях кадра (pose_core.landmarks_to_pixels)
+    """
     try:
         import cv2
+        from . import image_frame
+        from . import screenshot_utils
 
-        # Загружаем изображение
-        image = cv2.imread(image_path)
-        if image is None:
-            print(f"⚠️ Не удалось загрузить изображение: {image_path}")
+        # Берем уже декодированный буфер (или декодируем файл)
+        frame, error = image_frame.load_frame(image)
+        if error:
+            log.warning(f"⚠️ {error}")
             return None
 
-        h, w = image.shape[:2]
-
-        # Создаем копию для рисования
-        overlay = image.copy()
-
-        # Определяем соединения между точками
-        connections = [
-            (0, 1), (0, 2), (1, 3), (2, 4), (3, 5), (4, 6),
-            (1, 7), (2, 8), (7, 9), (8, 10), (9, 11), (10, 12), (7, 8)
-        ]
-
-        # Рисуем линии между точками
-        for i, j in connections:
-            if i < len(landmarks_2d) and j < len(landmarks_2d):
-                x1, y1 = landmarks_2d[i]
-                x2, y2 = landmarks_2d[j]
-
-                pt1 = (int(x1), int(y1))
-                pt2 = (int(x2), int(y2))
-
-                cv2.line(overlay, pt1, pt2, (0, 255, 0), 3)
-
-        # Рисуем точки
-        for x, y in landmarks_2d:
-            cv2.circle(overlay, (int(x), int(y)), 6, (0, 0, 255), -1)
-
-        # Добавляем текст
-        text = f"MediaPipe Pose - {view_type} View"
-        cv2.putText(overlay, text, (20, 40),
-                   cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
-
-        # Смешиваем с оригиналом
-        alpha = 0.6
-        result = cv2.addWeighted(image, 1-alpha, overlay, alpha, 0)
+        result = screenshot_utils.render_2d_pose(frame.bgr, landmarks_2d, view_type)
 
         # Создаем путь для сохранения
-        original_dir = os.path.dirname(image_path)
-        original_name = os.path.basename(image_path)
-        name_without_ext = os.path.splitext(original_name)[0]
+        if frame.path:
+            original_dir = os.path.dirname(frame.path)
+            name_without_ext = os.path.splitext(os.path.basename(frame.path))[0]
+        else:
+            # Кадр захвачен из viewport в память - файла-источника нет
+            original_dir = screenshot_utils.get_screenshots_directory()
+            name_without_ext = "viewport"
 
         from datetime import datetime
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -73,78 +49,57 @@ def _save_pose_visualization(image_path, landmarks_2d, view_type):
 
         cv2.imwrite(output_path, result)
 
-        print(f"✅ Фото с скелетом сохранено: {output_path}")
+        log.info(f"✅ Фото с скелетом сохранено: {output_path}")
         return output_path
 
     except Exception as e:
-        print(f"⚠️ Ошибка при сохранении визуализации: {e}")
+        log.warning(f"⚠️ Ошибка при сохранении визуализации: {e}")
         return None
 
 
-def _detect_pose_in_image(image_path):
-    """Обнаруживает позу в изображении и возвращает 3D координаты MediaPipe"""
-    if not os.path.exists(image_path):
-        return None, None, f"Файл не существует: {image_path}"
-
+def _detect_pose_in_image(image, model_variant=None, report=None):
+    """
+    Обнаруживает позу в изображении и возвращает 3D координаты MediaPipe.
+    image         - путь к файлу или уже декодированный image_frame.DecodedFrame
+    model_variant - вариант модели (model_registry), detection.CASCADE - каскад
+                    LITE -> HEAVY, None - по назначению FINAL
+    report        - словарь, куда пишутся "confidence" (13,) ключевых точек
+                    и "escalated" (был ли повтор на точной модели)
+    """
     try:
-        import cv2
-        import mediapipe as mp
+        from . import detection
+        from . import image_frame
+        from . import model_registry
 
-        # Находим путь к модели
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        model_path = os.path.join(current_dir, "models", "pose_landmarker.task")
+        cascade = model_variant == detection.CASCADE
+        model_path = model_registry.resolve('LITE' if cascade else model_variant, purpose='FINAL')
+        if model_path is None and not detection.replay_active():
+            return None, None, model_registry.missing_message()
 
-        if not os.path.exists(model_path):
-            return None, None, "Файл модели pose_landmarker.task не найден в папке models"
-
-        image = cv2.imread(image_path)
-        if image is None:
-            return None, None, f"Не удалось загрузить изображение: {image_path}"
-
-        h, w = image.shape[:2]
+        frame, error = image_frame.load_frame(image)
+        if error:
+            return None, None, error
 
-        from mediapipe.tasks import python
-        from mediapipe.tasks.python import vision
+        h, w = frame.height, frame.width
 
-        # Создаем детектор
-        base_options = python.BaseOptions(model_asset_path=model_path)
-        options = vision.PoseLandmarkerOptions(
-            base_options=base_options,
-            output_segmentation_masks=False,
-            num_poses=1,
-            min_pose_detection_confidence=0.3,
-            min_pose_presence_confidence=0.3,
-            min_tracking_confidence=0.3
-        )
-        detector = vision.PoseLandmarker.create_from_options(options)
+        # Кэш точек или прогретый детектор из общего пула, кадр уже декодирован
+        escalated = False
+        if cascade:
+            detection_result, escalated = detection.detect_pose_cascade(frame, min_confidence=0.3)
+        else:
+            detection_result = detection.detect_pose(frame, model_path, min_confidence=0.3)
 
-        # Обрабатываем изображение
-        mp_image = mp.Image.create_from_file(image_path)
-        detection_result = detector.detect(mp_image)
+        if report is not None:
+            report["escalated"] = escalated
+            report["confidence"] = detection.key_point_confidence(detection_result)
 
-        if not detection_result.pose_landmarks:
-            detector.close()
+        if len(detection_result.normalized) == 0:
             return None, None, "Поза не обнаружена на изображении"
 
-        # Извлекаем 2D и 3D координаты
-        key_point_indices = [0, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
-        landmarks_2d = []  # 2D координаты в пикселях
-        landmarks_3d = []  # 3D нормализованные координаты
-
-        for landmark_idx in key_point_indices:
-            if landmark_idx < len(detection_result.pose_landmarks[0]):
-                landmark = detection_result.pose_landmarks[0][landmark_idx]
-                # 2D координаты в пикселях
-                x_px = landmark.x * w
-                y_px = landmark.y * h
-                landmarks_2d.append((x_px, y_px))
-                # 3D координаты (нормализованные)
-                landmarks_3d.append((landmark.x, landmark.y, landmark.z))
-            else:
-                landmarks_2d.append((0, 0))
-                landmarks_3d.append((0, 0, 0))
-
-        detector.close()
+        # Извлекаем 2D и 3D координаты ключевых точек одной выборкой из массива
+        key_points = pose_core.gather_key_points(detection_result.normalized[0])
+        landmarks_2d = pose_core.landmarks_to_pixels(detection_result.normalized[0], w, h)  # в пикселях
+        landmarks_3d = key_points[:, :3].astype(np.float64)  # нормализованные x, y, z
 
         return landmarks_2d, landmarks_3d, None
 
@@ -154,276 +109,169 @@ def _detect_pose_in_image(image_path):
         return None, None, f"Ошибка обработки изображения: {error_details}"
 
 
-def _create_temporary_skeleton_from_mediapipe(landmarks_3d, is_front_view=True):
-    """Создает временный скелет из координат MediaPipe"""
-    try:
-        import bpy
-
-        print("🦴 Создаем временный скелет из координат MediaPipe...")
-
-        # Применяем масштаб к координатам (как в skeleton_utils.py)
-        SCALE_MULTIPLIER = 5.0
-        scaled_coords = []
-
-        for x, y, z in landmarks_3d:
-            # Нормализуем координаты MediaPipe (0-1) в диапазон -0.5 до 0.5
-            norm_x = x - 0.5
-            norm_y = y - 0.5
-            norm_z = z * 0.1  # СИЛЬНО уменьшаем глубину
-
-            # Применяем масштаб
-            scaled_coords.append((
-                norm_x * SCALE_MULTIPLIER,
-                norm_z * SCALE_MULTIPLIER,  # Z в Blender - это вертикаль
-                -norm_y * SCALE_MULTIPLIER  # Y инвертируем для Blender
-            ))
-
-        # Создаем арматуру
-        bpy.ops.object.armature_add(enter_editmode=False, align='WORLD', location=(0, 0, 0))
-        temp_armature = bpy.context.active_object
-        temp_armature.name = "Temp_Pose_Skeleton"
-
-        # Переходим в режим редактирования
-        bpy.ops.object.mode_set(mode='EDIT')
-
-        # Получаем данные арматуры
-        armature_data = temp_armature.data
-
-        # Удаляем стандартную кость
-        for bone in armature_data.edit_bones:
-            armature_data.edit_bones.remove(bone)
-
-        # Создаем кости на основе координат
-        # 0: нос, 1: левое плечо, 2: правое плечо, 3: левый локоть, 4: правый локоть,
-        # 5: левое запястье, 6: правое запястье, 7: левое бедро, 8: правое бедро,
-        # 9: левое колено, 10: правое колено, 11: левая лодыжка, 12: правая лодыжка
-
-        # Создаем основные кости
-        bones_data = [
-            # Позвоночник: от таза к шее
-            ('spine', 7, 8, 1, 2, 0),  # от центра таза к центру плеч, затем к носу
-            # Левая рука
-            ('upper_arm.L', 1, 3),
-            ('forearm.L', 3, 5),
-            # Правая рука
-            ('upper_arm.R', 2, 4),
-            ('forearm.R', 4, 6),
-            # Левая нога
-            ('thigh.L', 7, 9),
-            ('shin.L', 9, 11),
-            # Правая нога
-            ('thigh.R', 8, 10),
-            ('shin.R', 10, 12),
-        ]
-
-        # Создаем кости
-        created_bones = {}
-
-        for bone_info in bones_data:
-            bone_name = bone_info[0]
-
-            if len(bone_info) == 6:  # spine
-                _, hip1_idx, hip2_idx, shoulder1_idx, shoulder2_idx, nose_idx = bone_info
-
-                # Центр таза
-                hip_center = (
-                    (scaled_coords[hip1_idx][0] + scaled_coords[hip2_idx][0]) / 2,
-                    (scaled_coords[hip1_idx][1] + scaled_coords[hip2_idx][1]) / 2,
-                    (scaled_coords[hip1_idx][2] + scaled_coords[hip2_idx][2]) / 2
-                )
-
-                # Центр плеч
-                shoulder_center = (
-                    (scaled_coords[shoulder1_idx][0] + scaled_coords[shoulder2_idx][0]) / 2,
-                    (scaled_coords[shoulder1_idx][1] + scaled_coords[shoulder2_idx][1]) / 2,
-                    (scaled_coords[shoulder1_idx][2] + scaled_coords[shoulder2_idx][2]) / 2
-                )
-
-                bone = armature_data.edit_bones.new(bone_name)
-                bone.head = hip_center
-                bone.tail = shoulder_center
-
-            else:  # обычные кости
-                _, start_idx, end_idx = bone_info
-
-                bone = armature_data.edit_bones.new(bone_name)
-                bone.head = scaled_coords[start_idx]
-                bone.tail = scaled_coords[end_idx]
-
-            created_bones[bone_name] = bone
-
-        # Настраиваем иерархию
-        # Позвоночник - корневая кость
-        if 'spine' in created_bones:
-            spine_bone = created_bones['spine']
+# Кэш данных покоя арматур: указатель armature.data -> (отпечаток matrix_local, данные)
+_rest_cache = {}
 
-            # Прикрепляем руки к позвоночнику
-            for bone_name in ['upper_arm.L', 'upper_arm.R']:
-                if bone_name in created_bones:
-                    created_bones[bone_name].parent = spine_bone
 
-            # Прикрепляем ноги к позвоночнику
-            for bone_name in ['thigh.L', 'thigh.R']:
-                if bone_name in created_bones:
-                    created_bones[bone_name].parent = spine_bone
-
-        # Прикрепляем предплечья к плечам
-        if 'upper_arm.L' in created_bones and 'forearm.L' in created_bones:
-            created_bones['forearm.L'].parent = created_bones['upper_arm.L']
-            created_bones['forearm.L'].use_connect = True
-
-        if 'upper_arm.R' in created_bones and 'forearm.R' in created_bones:
-            created_bones['forearm.R'].parent = created_bones['upper_arm.R']
-            created_bones['forearm.R'].use_connect = True
-
-        # Прикрепляем голени к бедрам
-        if 'thigh.L' in created_bones and 'shin.L' in created_bones:
-            created_bones['shin.L'].parent = created_bones['thigh.L']
-            created_bones['shin.L'].use_connect = True
+def get_rest_data(armature):
+    """
+    Данные покоя арматуры для решателя: имена костей, матрицы покоя (B, 3, 3)
+    и индексы родителей. Читается одним foreach_get и кэшируется, пока
+    matrix_local костей не изменились.
+    """
+    bones = armature.data.bones
+    count = len(bones)
 
-        if 'thigh.R' in created_bones and 'shin.R' in created_bones:
-            created_bones['shin.R'].parent = created_bones['thigh.R']
-            created_bones['shin.R'].use_connect = True
+    matrices = np.empty(count * 16, dtype=np.float32)
+    bones.foreach_get("matrix_local", matrices)
+    fingerprint = matrices.tobytes()
 
-        # Возвращаемся в объектный режим
-        bpy.ops.object.mode_set(mode='OBJECT')
+    cache_key = armature.data.as_pointer()
+    cached = _rest_cache.get(cache_key)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
 
-        print(f"✅ Временный скелет создан с {len(created_bones)} костями")
-        return temp_armature
+    # foreach_get отдает матрицы по столбцам - транспонируем в обычный вид
+    rest = matrices.reshape(count, 4, 4).transpose(0, 2, 1)[:, :3, :3].astype(np.float64)
 
-    except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"❌ Ошибка при создании временного скелета: {error_details}")
-        return None
+    names = bones.keys()
+    name_to_index = {name: i for i, name in enumerate(names)}
+    parents = np.array(
+        [name_to_index[bone.parent.name] if bone.parent else -1 for bone in bones],
+        dtype=np.intp
+    )
 
+    # Порядок pose.bones может отличаться от data.bones
+    pose_order = np.array([name_to_index[name] for name in armature.pose.bones.keys()], dtype=np.intp)
 
-def _copy_pose_between_armatures(source_armature, target_armature):
-    """Копирует позу из исходной арматуры в целевую"""
-    try:
-        import bpy
+    data = {"names": names, "rest": rest, "parents": parents, "pose_order": pose_order}
+    _rest_cache[cache_key] = (fingerprint, data)
+    return data
 
-        print(f"🔄 Копируем позу из {source_armature.name} в {target_armature.name}...")
 
-        # Убедимся, что целевая арматура в режиме позы
-        if bpy.context.mode != 'POSE':
-            bpy.ops.object.select_all(action='DESELECT')
-            target_armature.select_set(True)
-            bpy.context.view_layer.objects.active = target_armature
-            bpy.ops.object.mode_set(mode='POSE')
+def solve_pose_quaternions(armature, landmarks_3d):
+    """
+    Кватернионы (B, 4) или (F, B, 4) в порядке data.bones для нормализованных
+    точек MediaPipe (13, 3) или (F, 13, 3). Кости без соответствующих точек
+    сохраняют текущий поворот. Второе значение - маска костей, которые решены.
+    """
+    rest_data = get_rest_data(armature)
+    names = rest_data["names"]
 
-        # Копируем вращения для каждой кости
-        bones_copied = 0
+    points = pose_core.mediapipe_to_pose_space(landmarks_3d)
+    directions = pose_core.segment_directions(points, names)
 
-        for bone_name in source_armature.pose.bones.keys():
-            if bone_name in target_armature.pose.bones:
-                source_bone = source_armature.pose.bones[bone_name]
-                target_bone = target_armature.pose.bones[bone_name]
+    current = np.empty(len(names) * 4, dtype=np.float32)
+    armature.pose.bones.foreach_get("rotation_quaternion", current)
+    current = current.reshape(-1, 4)
+    # Переставляем текущие повороты из порядка pose.bones в порядок data.bones
+    current_by_bone = np.empty_like(current)
+    current_by_bone[rest_data["pose_order"]] = current
 
-                # Копируем вращение
-                target_bone.rotation_mode = source_bone.rotation_mode
+    quats = pose_core.solve_pose_quaternions(
+        rest_data["rest"], rest_data["parents"], directions, current_by_bone
+    )
+    solved_mask = np.array([name in pose_core.POSE_BONE_SEGMENTS for name in names])
+    return quats, solved_mask
 
-                if source_bone.rotation_mode == 'QUATERNION':
-                    target_bone.rotation_quaternion = source_bone.rotation_quaternion.copy()
-                else:
-                    target_bone.rotation_euler = source_bone.rotation_euler.copy()
 
-                bones_copied += 1
+def write_pose_quaternions(armature, quats, solved_mask=None):
+    """Записывает кватернионы (B, 4) в порядке data.bones одним foreach_set"""
+    rest_data = get_rest_data(armature)
+    pose_bones = armature.pose.bones
 
-        print(f"✅ Скопировано {bones_copied} костей")
-        return True
+    # Повороты применяются только в режиме QUATERNION
+    if solved_mask is not None:
+        for bone_index in np.nonzero(solved_mask)[0]:
+            pose_bone = pose_bones[rest_data["names"][bone_index]]
+            if pose_bone.rotation_mode != 'QUATERNION':
+                pose_bone.rotation_mode = 'QUATERNION'
 
-    except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"❌ Ошибка при копировании позы: {error_details}")
-        return False
+    ordered = np.asarray(quats, dtype=np.float32)[rest_data["pose_order"]]
+    pose_bones.foreach_set("rotation_quaternion", ordered.ravel())
+    armature.update_tag()
 
 
 def _align_skeleton_to_pose(armature, landmarks_3d, is_front_view=True):
-    """Выставляет позу скелета на основе координат MediaPipe"""
+    """
+    Выставляет позу скелета на основе координат MediaPipe.
+    Повороты считаются напрямую из матриц покоя арматуры, без временного
+    скелета, bpy.ops и переключения режимов.
+    """
     try:
-        import bpy
-
-        print("🎯 Выставляем позу скелета...")
+        log.info("🎯 Выставляем позу скелета...")
 
-        # 1. Создаем временный скелет из координат MediaPipe
-        temp_armature = _create_temporary_skeleton_from_mediapipe(landmarks_3d, is_front_view)
-        if not temp_armature:
-            return False, "Не удалось создать временный скелет"
+        quats, solved_mask = solve_pose_quaternions(armature, landmarks_3d)
+        write_pose_quaternions(armature, quats, solved_mask)
 
-        # 2. Копируем позу из временного скелета в основной
-        success = _copy_pose_between_armatures(temp_armature, armature)
-
-        # 3. Удаляем временный скелет
-        bpy.data.objects.remove(temp_armature)
-
-        if success:
-            return True, "Поза успешно скопирована из временного скелета"
-        else:
-            return False, "Не удалось скопировать позу"
+        log.info(f"✅ Выставлено {int(solved_mask.sum())} костей")
+        return True, "Поза успешно рассчитана по направлениям костей"
 
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
-        print(f"❌ Ошибка при выставлении позы: {error_details}")
+        log.error(f"❌ Ошибка при выставлении позы: {error_details}")
         return False, f"Ошибка при выставлении позы: {str(e)}"
 
 
-def apply_pose_from_photo(image_path, armature, is_front_view=True, save_visualization=True):
+def apply_pose_from_photo(image_path, armature, is_front_view=True, save_visualization=True,
+                          model_variant=None):
     """
     Выставление позы по фото - основной метод
     """
     try:
-        print(f"\n📸 Анализируем фото: {os.path.basename(image_path)}")
-        print(f"🔍 Тип вида: {'FRONT' if is_front_view else 'SIDE'}")
-        print(f"🎯 Метод: Создание временного скелета и копирование позы")
+        log.info(f"📸 Анализируем фото: {os.path.basename(image_path)}")
+        log.info(f"🔍 Тип вида: {'FRONT' if is_front_view else 'SIDE'}")
+        log.info("🎯 Метод: Прямой расчет поворотов костей")
 
         # 1. Проверяем файл
         if not os.path.exists(image_path):
             return False, f"Файл не существует: {image_path}"
 
-        # 2. Проверяем зависимости
-        try:
-            import cv2
-            import mediapipe
-        except ImportError:
+        # 2. Проверяем зависимости (с сервером детекции mediapipe не нужен)
+        from . import deps_utils
+        if deps_utils.check_deps_quick():
             return False, "Требуются библиотеки OpenCV и MediaPipe"
 
-        # 3. Проверяем режим арматуры - должно быть POSE!
+        # 3. Режим арматуры не важен: повороты пишутся напрямую в pose.bones
         import bpy
-        if bpy.context.mode != 'POSE':
-            return False, "Перейдите в режим позы скелета (Pose Mode)"
 
-        # 4. Обнаруживаем позу на фото
-        landmarks_2d, landmarks_3d, error = _detect_pose_in_image(image_path)
+        # 4. Декодируем фото один раз и обнаруживаем позу
+        from . import image_frame
+        frame, error = image_frame.load_frame(image_path)
+        if error:
+            return False, error
+
+        landmarks_2d, landmarks_3d, error = _detect_pose_in_image(frame, model_variant)
         if error:
             return False, error
 
-        if not landmarks_3d or len(landmarks_3d) < 13:
+        if landmarks_3d is None or len(landmarks_3d) < 13:
             return False, "Не удалось получить достаточно ключевых точек"
 
-        print(f"✅ Обнаружено {len(landmarks_3d)} ключевых точек")
+        log.info(f"✅ Обнаружено {len(landmarks_3d)} ключевых точек")
 
         # 5. Сохраняем фото с нарисованным скелетом
         visualization_path = None
-        if save_visualization and landmarks_2d:
+        if save_visualization and landmarks_2d is not None:
             view_type = 'FRONT' if is_front_view else 'SIDE'
-            visualization_path = _save_pose_visualization(
-                image_path,
-                landmarks_2d,
-                view_type
-            )
+            with timing.span("visualization"):
+                visualization_path = save_pose_visualization(
+                    frame,
+                    landmarks_2d,
+                    view_type
+                )
 
         # 6. Выставляем позу скелета
-        success, message = _align_skeleton_to_pose(armature, landmarks_3d, is_front_view)
+        with timing.span("solve"):
+            success, message = _align_skeleton_to_pose(armature, landmarks_3d, is_front_view)
 
         if success:
             # Обновляем viewport
             bpy.context.view_layer.update()
 
             # Формируем итоговое сообщение
-            final_message = "✅ Поза успешно применена (метод временного скелета)"
+            final_message = "✅ Поза успешно применена (прямой расчет поворотов)"
             if visualization_path:
                 final_message += f"\n📸 Фото с скелетом сохранено: {visualization_path}"
 
@@ -434,5 +282,340 @@ def apply_pose_from_photo(image_path, armature, is_front_view=True, save_visuali
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
-        print(f"❌ Ошибка при применении позы: {error_details}")
-        return False, f"Ошибка при применении позы: {str(e)}"
\ No newline at end of file
+        log.error(f"❌ Ошибка при применении позы: {error_details}")
+        return False, f"Ошибка при применении позы: {str(e)}"
+
+# --- Пакетный импорт последовательности фото в анимацию ---------------------
+
+# Расширения изображений, которые берутся из папки
+SEQUENCE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# Сколько кадров декодируется и детектируется одновременно (ограничивает память)
+SEQUENCE_PREFETCH = 4
+
+
+def _natural_sort_key(path):
+    """frame_2.png раньше frame_10.png"""
+    import re
+
+    name = os.path.basename(path).lower()
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+def list_sequence_images(directory, file_names=None):
+    """
+    Пути изображений последовательности в естественном порядке имен.
+    file_names - выбранные файлы; если пусто, берутся все изображения папки.
+    """
+    if not directory or not os.path.isdir(directory):
+        return []
+
+    if not file_names:
+        file_names = os.listdir(directory)
+
+    paths = [
+        os.path.join(directory, name) for name in file_names
+        if name.lower().endswith(SEQUENCE_EXTENSIONS)
+    ]
+    return sorted(paths, key=_natural_sort_key)
+
+
+def _detect_sequence_frame(image_path, model_variant=None):
+    """
+    (точки (13, 3), уверенность (13,)) одного кадра или (None, None);
+    декодированный кадр сразу освобождается
+    """
+    report = {}
+    _landmarks_2d, landmarks_3d, error = _detect_pose_in_image(image_path, model_variant, report)
+    if error:
+        log.warning(f"⚠️ {os.path.basename(image_path)}: {error.splitlines()[0]}")
+        return None, None
+    return landmarks_3d, report.get("confidence")
+
+
+def detect_pose_sequence(image_paths, progress=None, cancel_event=None, model_variant=None):
+    """
+    Детекция позы на каждом изображении последовательности. Не обращается к bpy.
+    Изображения идут потоком: одновременно в памяти не больше SEQUENCE_PREFETCH
+    кадров, от каждого остаются только 13 точек.
+
+    progress     - словарь {"done", "total"}, обновляется по мере работы;
+                   в режиме каскада туда же пишется "escalated" - номера кадров,
+                   повторенных на точной модели
+    cancel_event - threading.Event для досрочной остановки
+    model_variant - вариант модели (model_registry), None - по назначению FINAL.
+                   detection.CASCADE: все кадры на LITE, затем повтор на
+                   detection.CASCADE_ESCALATE_TO только неуверенных кадров
+    Возвращает массив (F, 13, 3) с NaN для кадров без позы.
+    """
+    from functools import partial
+    from . import detection
+    from . import worker_pool
+
+    cascade = model_variant == detection.CASCADE
+    first_variant = 'LITE' if cascade else model_variant
+
+    landmarks = np.full((len(image_paths), len(pose_core.KEY_POINT_INDICES), 3), np.nan)
+    confidence = np.full(landmarks.shape[:2], np.nan) if cascade else None
+    if progress is not None:
+        progress["total"] = len(image_paths)
+        progress["done"] = 0
+
+    results = None
+    if _use_process_pool(len(image_paths)):
+        try:
+            results = _detect_sequence_in_processes(image_paths, cancel_event, first_variant)
+        except Exception as e:
+            log.warning(f"⚠️ Пул процессов недоступен, детекция в потоках: {e}")
+
+    if results is None:
+        results = worker_pool.imap_bounded(
+            partial(_detect_sequence_frame, model_variant=first_variant), image_paths,
+            window=SEQUENCE_PREFETCH, cancel_event=cancel_event
+        )
+
+    for index, (points, point_confidence) in enumerate(results):
+        if points is not None:
+            landmarks[index] = points
+        if cascade and point_confidence is not None:
+            confidence[index] = point_confidence
+        if progress is not None:
+            progress["done"] = index + 1
+
+    if cascade and not (cancel_event is not None and cancel_event.is_set()):
+        _escalate_sequence(image_paths, landmarks, confidence, progress, cancel_event)
+
+    return landmarks
+
+
+def _escalate_sequence(image_paths, landmarks, confidence, progress=None, cancel_event=None):
+    """
+    Второй проход каскада: неуверенные кадры (и кадры без позы) детектируются
+    точной моделью. Обновляет landmarks на месте, возвращает номера кадров.
+    """
+    from functools import partial
+    from . import detection
+    from . import worker_pool
+
+    fast_path, accurate_path = detection.cascade_models()
+    if fast_path == accurate_path:
+        # Есть только одна модель - повторять нечем
+        return []
+
+    weak = [
+        index for index in range(len(image_paths))
+        if detection.needs_escalation(
+            None if np.isnan(landmarks[index]).any() else confidence[index]
+        )
+    ]
+    if progress is not None:
+        progress["escalated"] = weak
+        progress["total"] += len(weak)
+    if not weak:
+        return weak
+
+    with timing.span("cascade.escalate", frames=len(weak)):
+        results = worker_pool.imap_bounded(
+            partial(_detect_sequence_frame, model_variant=detection.CASCADE_ESCALATE_TO),
+            [image_paths[index] for index in weak],
+            window=SEQUENCE_PREFETCH, cancel_event=cancel_event
+        )
+        for index, (points, _confidence) in zip(weak, results):
+            # Точная модель позу не нашла - остается результат быстрой
+            if points is not None:
+                landmarks[index] = points
+            if progress is not None:
+                progress["done"] += 1
+
+    log.info(f"🔁 Каскад: {len(weak)} из {len(image_paths)} кадров повторены на "
+             f"{detection.CASCADE_ESCALATE_TO}")
+    return weak
+
+
+def _use_process_pool(frame_count):
+    from . import detection
+    from . import process_pool
+
+    # Процессы пула держат свой MediaPipe: при воспроизведении точек или
+    # сервере детекции (где mediapipe в Blender может не быть) пул не нужен
+    return (process_pool.ENABLED and frame_count >= process_pool.MIN_FRAMES
+            and detection.needs_mediapipe())
+
+
+def _prepare_sequence_frame(image_path, model_path):
+    """
+    Кадр для пула процессов - та же подготовка, что в detection.detect_pose:
+    сначала кэш точек, при промахе область человека и уменьшение
+    (detection.prepare_frame). Возвращает (ключ кэша, запись кэша, кадр для процесса):
+    запись есть - процесс не нужен; (None, None, None) - файл не читается.
+    """
+    from . import detection
+    from . import image_frame
+    from . import landmark_cache
+
+    frame, error = image_frame.load_frame(image_path)
+    if error:
+        log.warning(f"⚠️ {os.path.basename(image_path)}: {error}")
+        return None, None, None
+
+    key = None
+    if landmark_cache.CACHE_ENABLED:
+        key = detection.cache_key(frame, model_path, min_confidence=0.3)
+        arrays = landmark_cache.load(key)
+        if arrays is not None:
+            return key, arrays, None
+
+    return key, None, detection.prepare_frame(frame, min_confidence=0.3)
+
+
+def _sequence_result(arrays):
+    """(точки (13, 3), уверенность (13,)) из записи точек или (None, None), как _detect_sequence_frame"""
+    from . import detection
+
+    result = detection.PoseDetection.from_arrays(arrays)
+    if len(result.normalized) == 0:
+        return None, None
+    key_points = pose_core.gather_key_points(result.normalized[0])
+    return key_points[:, :3].astype(np.float64), detection.key_point_confidence(result)
+
+
+def _detect_sequence_in_processes(image_paths, cancel_event=None, model_variant=None):
+    """
+    Детекция длинной последовательности в пуле процессов: кадры декодируются
+    и готовятся в потоках (кэш точек, область человека, уменьшение - как у
+    потоков), процессам через общую память уходят только промахи кэша.
+    Генератор отдает (точки (13, 3), уверенность (13,)) или (None, None) в порядке image_paths.
+    """
+    from collections import deque
+    from functools import partial
+    from . import landmark_cache
+    from . import model_registry
+    from . import process_pool
+    from . import worker_pool
+
+    model_path = model_registry.resolve(model_variant, purpose='FINAL')
+    if model_path is None:
+        raise FileNotFoundError(model_registry.missing_message())
+
+    pool = process_pool.get_pool(model_path, min_confidence=0.3)
+    prepared = worker_pool.imap_bounded(
+        partial(_prepare_sequence_frame, model_path=model_path), image_paths,
+        window=SEQUENCE_PREFETCH, cancel_event=cancel_event
+    )
+
+    # Кадры в порядке image_paths: (ключ, запись, кадр). В процессы уходят
+    # только кадры без записи, остальные ждут своей очереди здесь
+    order = deque()
+
+    def frames():
+        for key, arrays, work in prepared:
+            order.append((key, arrays, work))
+            if work is not None:
+                yield work
+
+    detected = pool.map_frames(frames(), cancel_event=cancel_event)
+
+    def finished():
+        """Отдает кадры из начала очереди, которым процесс не нужен"""
+        while order and order[0][2] is None:
+            _key, arrays, _work = order.popleft()
+            yield (None, None) if arrays is None else _sequence_result(arrays)
+
+    def results():
+        for arrays in detected:
+            yield from finished()
+            key, _cached, work = order.popleft()
+            arrays["normalized"] = work.map_to_source(arrays["normalized"])
+            if key is not None:
+                try:
+                    landmark_cache.store(key, **arrays)
+                except Exception as e:
+                    log.warning(f"⚠️ Не удалось записать кэш точек: {e}")
+            yield _sequence_result(arrays)
+        # Кадры из кэша и нечитаемые в конце последовательности
+        yield from finished()
+
+    # Первый кадр запрашивается сразу: ошибка запуска процессов всплывет здесь,
+    # и вызывающий код перейдет на потоки
+    iterator = results()
+    first = next(iterator, None)
+
+    def chained():
+        if image_paths:
+            yield first
+        yield from iterator
+
+    return chained()
+
+
+def write_pose_keyframes(armature, quats, solved_mask, frame_numbers):
+    """
+    Записывает кватернионы (F, B, 4) в порядке data.bones ключами анимации
+    на кадрах frame_numbers. Каждая F-кривая заполняется одним foreach_set.
+    """
+    import bpy
+
+    rest_data = get_rest_data(armature)
+    pose_bones = armature.pose.bones
+    frame_numbers = np.asarray(frame_numbers, dtype=np.float32)
+    quats = pose_core.make_quaternions_continuous(quats)
+
+    animation_data = armature.animation_data or armature.animation_data_create()
+    action = animation_data.action
+    if action is None:
+        action = bpy.data.actions.new(f"{armature.name}_PhotoPose")
+        animation_data.action = action
+
+    first, last = float(frame_numbers.min()), float(frame_numbers.max())
+    keyed_bones = 0
+
+    for bone_index in np.nonzero(solved_mask)[0]:
+        name = rest_data["names"][bone_index]
+        pose_bone = pose_bones[name]
+        if pose_bone.rotation_mode != 'QUATERNION':
+            pose_bone.rotation_mode = 'QUATERNION'
+
+        data_path = pose_bone.path_from_id("rotation_quaternion")
+        for axis in range(4):
+            fcurve = action.fcurves.find(data_path, index=axis)
+            if fcurve is None:
+                fcurve = action.fcurves.new(data_path, index=axis, action_group=name)
+
+            # Старые ключи в диапазоне импорта заменяются новыми
+            for point in reversed(fcurve.keyframe_points):
+                if first <= point.co[0] <= last:
+                    fcurve.keyframe_points.remove(point, fast=True)
+
+            existing = len(fcurve.keyframe_points)
+            fcurve.keyframe_points.add(len(frame_numbers))
+            coords = np.empty((existing + len(frame_numbers)) * 2, dtype=np.float32)
+            fcurve.keyframe_points.foreach_get("co", coords)
+            coords = coords.reshape(-1, 2)
+            coords[existing:, 0] = frame_numbers
+            coords[existing:, 1] = quats[:, bone_index, axis]
+
+            fcurve.keyframe_points.foreach_set("co", coords.ravel())
+            fcurve.update()
+
+        keyed_bones += 1
+
+    armature.update_tag()
+    return keyed_bones
+
+
+def apply_pose_sequence(armature, landmarks, frame_start=1, frame_step=1):
+    """
+    Решает позы для всех кадров последовательности одной векторной операцией
+    и записывает ключи. landmarks - (F, 13, 3) из detect_pose_sequence.
+    Возвращает (число кадров с ключами, число костей).
+    """
+    valid = ~np.isnan(landmarks).any(axis=(1, 2))
+    if not valid.any():
+        return 0, 0
+
+    frame_numbers = frame_start + np.nonzero(valid)[0] * frame_step
+    with timing.span("solve", frames=int(valid.sum())):
+        quats, solved_mask = solve_pose_quaternions(armature, landmarks[valid])
+    with timing.span("keyframes"):
+        keyed_bones = write_pose_keyframes(armature, quats, solved_mask, frame_numbers)
+    return int(valid.sum()), keyed_bones
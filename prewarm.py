@@ -0,0 +1,217 @@
+"""
+Фоновый прогрев модели MediaPipe при регистрации аддона
+
+Импорт mediapipe/cv2, поиск файла модели и инициализация графа
+TFLite выполняются в отдельном потоке, чтобы первое нажатие
+"Создать скелет" оплачивало только сам инференс.
+"""
+import time
+import threading
+
+from . import log_utils
+
+log = log_utils.get_logger(__name__)
+
+# Пороги уверенности, которые используют операторы аддона
+# (0.5 - создание скелета, 0.3 - выставление позы по фото)
+PREWARM_CONFIDENCES = (0.5, 0.3)
+
+# Сколько детекторов прогревать для создания скелета: FRONT и SIDE
+# детектируются одновременно, каждому виду нужен свой экземпляр
+PREWARM_VIEW_DETECTORS = 2
+
+# Порог быстрой модели для поиска человека на больших фото
+# (detection.person_box, поза по фото - порог 0.3)
+PREWARM_ROI_CONFIDENCE = 0.3
+
+# Размер пустого кадра для пробного инференса
+DUMMY_IMAGE_SIZE = 256
+
+# Сколько ждать поток прогрева при отключении аддона (секунды):
+# текущий шаг (загрузка модели) прервать нельзя, только дождаться
+STOP_TIMEOUT = 10.0
+
+# Состояние прогрева: 'IDLE', 'RUNNING', 'READY', 'FAILED'
+STATE = 'IDLE'
+# Сколько секунд занял прогрев (столько экономит первый запрос)
+WARMUP_SECONDS = 0.0
+ERROR = None
+
+_thread = None
+_cancel_event = threading.Event()
+
+
+class _Cancelled(Exception):
+    """Прогрев остановлен при отключении аддона"""
+
+
+def _check_cancelled():
+    if _cancel_event.is_set():
+        raise _Cancelled()
+
+
+def _run_warmup():
+    """Выполняется в фоновом потоке. Не обращается к bpy."""
+    global STATE, WARMUP_SECONDS, ERROR
+
+    started = time.perf_counter()
+    try:
+        from . import detection
+        if detection.use_server():
+            # Детекторы прогреты на сервере - mediapipe в Blender не загружаем
+            WARMUP_SECONDS = time.perf_counter() - started
+            STATE = 'READY'
+            log.info("✅ Используется сервер детекции")
+            return
+
+        import numpy as np
+        import cv2  # noqa: F401 - прогреваем импорт
+        import mediapipe as mp
+
+        from . import detector_registry
+        from . import model_registry
+
+        # Прогревается модель итоговых операций (создание скелета, поза по фото)
+        model_path = model_registry.resolve(purpose='FINAL')
+        if model_path is None:
+            raise FileNotFoundError(model_registry.missing_message())
+
+        dummy = np.zeros((DUMMY_IMAGE_SIZE, DUMMY_IMAGE_SIZE, 3), dtype=np.uint8)
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=dummy)
+
+        for confidence in PREWARM_CONFIDENCES:
+            _check_cancelled()
+            with detector_registry.acquire(model_path, min_confidence=confidence) as detector:
+                detector.detect(mp_image)
+
+        # Экземпляры для одновременной детекции видов: держим их все сразу,
+        # чтобы реестр создал недостающие, а не вернул тот же прогретый.
+        # Взятые детекторы возвращаются и при ошибке, и при остановке
+        key = detector_registry.make_key(model_path, min_confidence=PREWARM_CONFIDENCES[0])
+        detectors = []
+        try:
+            for _ in range(PREWARM_VIEW_DETECTORS):
+                _check_cancelled()
+                detectors.append(detector_registry.checkout(key))
+            for detector in detectors:
+                _check_cancelled()
+                detector.detect(mp_image)
+        finally:
+            for detector in detectors:
+                detector_registry.checkin(key, detector)
+
+        # Быстрая модель поиска человека на больших фото: без прогрева первое
+        # такое фото загружало бы ее внутри замеряемой детекции
+        roi_path = model_registry.resolve('LITE')
+        if detection.ROI_ENABLED and roi_path is not None and (
+            roi_path != model_path or PREWARM_ROI_CONFIDENCE not in PREWARM_CONFIDENCES
+        ):
+            _check_cancelled()
+            with detector_registry.acquire(roi_path, min_confidence=PREWARM_ROI_CONFIDENCE) as detector:
+                detector.detect(mp_image)
+
+        WARMUP_SECONDS = time.perf_counter() - started
+        STATE = 'READY'
+        log.info(f"✅ Модель прогрета за {WARMUP_SECONDS:.2f} с")
+
+    except _Cancelled:
+        STATE = 'IDLE'
+        log.info("⏹️ Прогрев модели остановлен")
+
+    except Exception as e:
+        WARMUP_SECONDS = time.perf_counter() - started
+        ERROR = str(e)
+        STATE = 'FAILED'
+        log.warning(f"⚠️ Прогрев модели не удался: {e}")
+
+
+def _redraw_when_done():
+    """Таймер bpy.app.timers: перерисовывает панель, когда прогрев закончен"""
+    if STATE == 'RUNNING':
+        return 0.5
+
+    try:
+        import bpy
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type == 'VIEW_3D':
+                    area.tag_redraw()
+    except Exception:
+        pass
+
+    return None
+
+
+def start():
+    """Запускает прогрев в фоновом потоке (повторный вызов ничего не делает)"""
+    global STATE, ERROR, _thread
+
+    if _thread is not None and _thread.is_alive():
+        return False
+    if STATE == 'READY':
+        return False
+
+    STATE = 'RUNNING'
+    ERROR = None
+    _cancel_event.clear()
+    _thread = threading.Thread(target=_run_warmup, name="PhotoToolProPrewarm", daemon=True)
+    _thread.start()
+
+    try:
+        import bpy
+        bpy.app.timers.register(_redraw_when_done, first_interval=0.5)
+    except Exception:
+        pass
+
+    log.info("🔥 Запущен фоновый прогрев модели...")
+    return True
+
+
+def stop(timeout=STOP_TIMEOUT):
+    """
+    Останавливает прогрев и ждет поток, чтобы он не брал детекторы
+    из реестра после detector_registry.close_all(). True - поток завершен.
+    """
+    global _thread
+
+    thread = _thread
+    if thread is None:
+        return True
+
+    _cancel_event.set()
+    thread.join(timeout=timeout)
+    if thread.is_alive():
+        log.warning(f"⚠️ Поток прогрева не завершился за {timeout:.0f} с")
+        return False
+
+    _thread = None
+    return True
+
+
+def reset():
+    """Останавливает прогрев и сбрасывает состояние (при отключении аддона)"""
+    global STATE, WARMUP_SECONDS, ERROR
+
+    stop()
+
+    try:
+        import bpy
+        if bpy.app.timers.is_registered(_redraw_when_done):
+            bpy.app.timers.unregister(_redraw_when_done)
+    except Exception:
+        pass
+
+    STATE = 'IDLE'
+    WARMUP_SECONDS = 0.0
+    ERROR = None
+
+
+def get_status_text():
+    """Короткий текст состояния для панели"""
+    if STATE == 'READY':
+        return f"Модель готова (сэкономлено {WARMUP_SECONDS:.1f} с)"
+    if STATE == 'RUNNING':
+        return "Модель загружается..."
+    if STATE == 'FAILED':
+        return "Прогрев не удался"
+    return "Модель не загружена"
@@ -0,0 +1,318 @@
+"""
+Пул процессов для детекции длинных последовательностей кадров
+
+TFLite в одном процессе Python плохо загружает многоядерные машины.
+Каждый процесс пула один раз загружает свой PoseLandmarker в инициализаторе
+и ограничивает потоки cv2 одним. Число потоков TFLite/XNNPACK MediaPipe
+Tasks настроить не дает, поэтому процессов меньше, чем ядер (MAX_PROCESS_WORKERS).
+Декодированные кадры передаются через multiprocessing.shared_memory (без
+pickle пикселей), назад возвращаются компактные массивы точек (как
+detection_protocol.result_arrays) в порядке отправки.
+
+Одновременно живет один пул (для последней модели и порога). Через
+IDLE_TIMEOUT после последней пачки кадров его процессы останавливаются и
+освобождают память под модели.
+
+Модуль не обращается к bpy: процессы запускаются методом spawn и импортируют
+пакет аддона (__init__ без bpy, log_utils), этот модуль, detector_registry,
+timing и detection_protocol.
+"""
+import os
+import sys
+import threading
+from collections import deque
+
+import numpy as np
+
+from . import log_utils
+
+log = log_utils.get_logger(__name__)
+
+# Включить пул процессов для пакетной детекции
+ENABLED = True
+
+# Меньше кадров не окупают запуск процессов и загрузку модели в каждом
+MIN_FRAMES = 16
+
+# Процессов не больше ядер минус одно (главный поток Blender) и не больше 16
+# (каждый держит свою копию модели в памяти)
+MAX_PROCESS_WORKERS = max(1, min(16, (os.cpu_count() or 2) - 1))
+
+# Сколько кадров в работе на один процесс (ограничивает память под кадры)
+FRAMES_PER_WORKER = 2
+
+# Через сколько секунд после последней пачки кадров пул останавливается
+IDLE_TIMEOUT = 60.0
+
+# --- Сторона процесса-исполнителя -------------------------------------------
+
+_worker_landmarker = None
+
+
+def _worker_init(model_path, min_confidence):
+    """Инициализатор процесса: один поток cv2 и однократная загрузка модели"""
+    global _worker_landmarker
+
+    try:
+        import cv2
+        cv2.setNumThreads(1)
+    except ImportError:
+        pass
+
+    from . import detector_registry
+
+    key = detector_registry.make_key(model_path, 'IMAGE', min_confidence)
+    _worker_landmarker = detector_registry._create_landmarker(key)
+
+
+def _worker_detect(shm_name, shape):
+    """
+    Детекция кадра из общей памяти. Возвращает dict normalized/world/presence
+    (как запись кэша точек); без позы массивы пустые (0, 33, ...).
+    """
+    import mediapipe as mp
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        rgb = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        # mp.Image копирует пиксели, после этого общую память можно отпустить
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(rgb))
+        del rgb
+    finally:
+        shm.close()
+
+    from . import detection_protocol
+
+    result = _worker_landmarker.detect(mp_image)
+
+    normalized, world, presence = detection_protocol.result_arrays(result)
+    return {"normalized": normalized, "world": world, "presence": presence}
+
+
+# --- Сторона Blender ---------------------------------------------------------
+
+def _python_executable():
+    """
+    Интерпретатор для spawn. В Blender sys.executable обычно указывает на
+    встроенный Python, но в старых сборках - на сам blender.
+    """
+    executable = sys.executable
+    if os.path.basename(executable).lower().startswith("blender"):
+        base = getattr(sys, "_base_executable", None)
+        if base and not os.path.basename(base).lower().startswith("blender"):
+            return base
+
+        # Встроенный Python: <версия>/python/bin/python3.x рядом с blender
+        prefix = sys.prefix
+        for name in ("python.exe", f"python{sys.version_info.major}.{sys.version_info.minor}",
+                     f"python{sys.version_info.major}"):
+            candidate = os.path.join(prefix, "bin", name)
+            if os.path.exists(candidate):
+                return candidate
+    return executable
+
+
+class _SharedSlots:
+    """Переиспользуемые блоки общей памяти под кадры (по одному на кадр в работе)"""
+
+    def __init__(self):
+        self._free = []
+        self._all = []
+
+    def take(self, nbytes):
+        from multiprocessing import shared_memory
+
+        for i, shm in enumerate(self._free):
+            if shm.size >= nbytes:
+                return self._free.pop(i)
+
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._all.append(shm)
+        return shm
+
+    def give(self, shm):
+        self._free.append(shm)
+
+    def close(self):
+        for shm in self._all:
+            try:
+                shm.close()
+                shm.unlink()
+            except Exception:
+                pass
+        self._all = []
+        self._free = []
+
+
+class ProcessDetectionPool:
+    """Пул процессов с прогретыми детекторами для одного (модель, порог)"""
+
+    def __init__(self, model_path, min_confidence=0.5, workers=None):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.model_path = model_path
+        self.min_confidence = min_confidence
+        self.workers = workers or MAX_PROCESS_WORKERS
+
+        context = multiprocessing.get_context("spawn")
+        context.set_executable(_python_executable())
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_worker_init,
+            initargs=(model_path, min_confidence),
+        )
+        self._slots = _SharedSlots()
+        self._lock = threading.Lock()
+        # Сколько map_frames сейчас выполняется (под _pools_lock)
+        self.active = 0
+
+    def map_frames(self, frames, cancel_event=None):
+        """
+        Детекция кадров (RGB массивы HxWx3 uint8 или DecodedFrame) в процессах.
+        Генератор отдает dict массивов (_worker_detect) в порядке кадров; одновременно в
+        работе не больше workers * FRAMES_PER_WORKER кадров.
+        """
+        window = self.workers * FRAMES_PER_WORKER
+        pending = deque()
+        iterator = iter(frames)
+        _batch_started(self)
+
+        def submit(frame):
+            rgb = np.ascontiguousarray(getattr(frame, "rgb", frame), dtype=np.uint8)
+            with self._lock:
+                shm = self._slots.take(rgb.nbytes)
+            np.ndarray(rgb.shape, dtype=np.uint8, buffer=shm.buf)[...] = rgb
+            future = self._executor.submit(_worker_detect, shm.name, rgb.shape)
+            pending.append((future, shm))
+
+        def fill():
+            while len(pending) < window and not (cancel_event and cancel_event.is_set()):
+                try:
+                    frame = next(iterator)
+                except StopIteration:
+                    return
+                submit(frame)
+
+        try:
+            fill()
+            while pending:
+                future, shm = pending.popleft()
+                try:
+                    landmarks = future.result()
+                finally:
+                    with self._lock:
+                        self._slots.give(shm)
+                fill()
+                yield landmarks
+        finally:
+            for future, shm in pending:
+                future.cancel()
+            _batch_finished(self)
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._slots.close()
+
+
+_pool = None
+_pool_key = None
+_idle_timer = None
+_pools_lock = threading.Lock()
+
+
+def _cancel_idle_timer_locked():
+    global _idle_timer
+    if _idle_timer is not None:
+        _idle_timer.cancel()
+        _idle_timer = None
+
+
+def _close_quietly(pool):
+    try:
+        pool.close()
+    except Exception as e:
+        log.warning(f"⚠️ Ошибка остановки пула процессов: {e}")
+
+
+def _batch_started(pool):
+    with _pools_lock:
+        pool.active += 1
+        if pool is _pool:
+            _cancel_idle_timer_locked()
+
+
+def _batch_finished(pool):
+    """Пачка кадров закончилась: замененный пул закрывается, текущий - по таймеру простоя"""
+    global _idle_timer
+
+    with _pools_lock:
+        pool.active -= 1
+        if pool.active > 0:
+            return
+        retired = pool is not _pool
+        if not retired:
+            _cancel_idle_timer_locked()
+            _idle_timer = threading.Timer(IDLE_TIMEOUT, _close_if_idle, args=(pool,))
+            _idle_timer.daemon = True
+            _idle_timer.start()
+
+    if retired:
+        _close_quietly(pool)
+
+
+def _close_if_idle(pool):
+    global _pool, _pool_key, _idle_timer
+
+    with _pools_lock:
+        if pool is not _pool or pool.active > 0:
+            return
+        _pool = None
+        _pool_key = None
+        _idle_timer = None
+
+    _close_quietly(pool)
+    log.info("💤 Пул процессов детекции остановлен после простоя")
+
+
+def get_pool(model_path, min_confidence=0.5):
+    """
+    Пул процессов для модели и порога. Пул другой модели или порога
+    заменяется: его процессы останавливаются, как только он освободится.
+    """
+    global _pool, _pool_key
+
+    key = (os.path.normpath(model_path), round(float(min_confidence), 4))
+    retired = None
+    with _pools_lock:
+        _cancel_idle_timer_locked()
+        if _pool is not None and _pool_key != key:
+            if _pool.active == 0:
+                retired = _pool
+            _pool = None
+        if _pool is None:
+            _pool = ProcessDetectionPool(model_path, min_confidence)
+            _pool_key = key
+            log.info(f"🧵 Запущен пул процессов детекции: {_pool.workers}")
+        pool = _pool
+
+    if retired is not None:
+        _close_quietly(retired)
+    return pool
+
+
+def shutdown():
+    """Останавливает пул процессов (вызывается при отключении аддона)"""
+    global _pool, _pool_key
+
+    with _pools_lock:
+        _cancel_idle_timer_locked()
+        pool = _pool
+        _pool = None
+        _pool_key = None
+
+    if pool is not None:
+        _close_quietly(pool)
@@ -3,16 +3,21 @@
 """
 import os
 import math
+import contextvars
 import time
 from datetime import datetime
 
+from . import log_utils
+
+log = log_utils.get_logger(__name__)
+
 
 def get_screenshots_directory():
     """Возвращает путь к директории для скриншотов"""
     try:
         import bpy
     except ImportError:
-        print("❌ Модуль bpy не доступен. Функция работает только в Blender.")
+        log.error("❌ Модуль bpy не доступен. Функция работает только в Blender.")
         return ""
 
     if bpy.data.filepath:
@@ -26,16 +31,95 @@ def get_screenshots_directory():
     return screenshots_dir
 
 
-def take_photos_to_files(context, front_path, side_path):
-    """Делает скриншоты и сохраняет в указанные файлы"""
-    try:
+# Повороты вида для захвата: FRONT смотрит вдоль +Y, SIDE - вдоль -X
+FRONT_VIEW_EULER = (math.pi / 2, 0.0, 0.0)
+SIDE_VIEW_EULER = (math.pi / 2, 0.0, math.pi / 2)
+
+VIEW_EULERS = {
+    'FRONT': FRONT_VIEW_EULER,
+    'SIDE': SIDE_VIEW_EULER,
+}
+
+# Способ захвата кадров viewport:
+# 'REGION' - пиксели только региона 3D вида из фреймбуфера, сразу в память
+# 'FILE'   - bpy.ops.screen.screenshot всего окна через временный PNG (запасной)
+# 'STUB'   - синтетические кадры без окна Blender (тесты в фоне, blender -b)
+CAPTURE_BACKEND = 'REGION'
+
+# Большая сторона захваченного кадра (None - без уменьшения)
+CAPTURE_MAX_SIDE = 1024
+
+# Кадр для STUB: функция(имя вида) -> RGB массив (H, W, 3) uint8 или None
+STUB_FRAME_PROVIDER = None
+STUB_FRAME_SIZE = (512, 512)
+
+# Интервал опроса таймера, пока регион не перерисован
+CAPTURE_POLL_INTERVAL = 0.01
+
+# Защита от зависания: максимум принудительных перерисовок на один снимок
+MAX_REDRAWS_PER_SHOT = 10
+
+# Защита от зависания для run_async: сколько ждать перерисовки одного снимка (секунды).
+# Свернутое окно или скрытая область не перерисовываются, и таймер опрашивал бы их вечно
+MAX_REDRAW_WAIT = 5.0
+
+
+class ViewCaptureJob:
+    """
+    Машина состояний захвата видов 3D viewport без time.sleep().
+
+    Для каждого снимка: выставить поворот вида -> tag_redraw() -> дождаться,
+    пока обработчик отрисовки региона (POST_PIXEL) отметит, что регион
+    действительно перерисован -> забрать кадр -> следующий вид.
+    Снимок делается на первом же кадре после смены вида.
+
+    Результат - словарь имя -> image_frame.DecodedFrame (без файлов на диске
+    для REGION и STUB).
+
+    run_async() ведет машину через bpy.app.timers (интерфейс не блокируется),
+    run_blocking() - через принудительную перерисовку wm.redraw_timer
+    (для синхронных операторов).
+    """
+
+    def __init__(self, context, shots, on_finish=None, backend=None):
+        """
+        shots     - список (euler или None, имя); None - текущий вид
+        on_finish - функция(frames, error), вызывается после восстановления вида
+        backend   - 'REGION', 'FILE' или 'STUB' (по умолчанию CAPTURE_BACKEND)
+        """
+        self.window = context.window if context else None
+        self.area = context.area if context else None
+        self.region = None
+        self.shots = list(shots)
+        self.on_finish = on_finish
+        self.backend = backend or CAPTURE_BACKEND
+        self.state = 'IDLE'
+        self.error = None
+        self.frames = {}
+
+        self._index = 0
+        self._redraws = 0
+        self._pixels = None
+        self._handler = None
+        self._space = None
+        self._region_pointer = 0
+        self._original_rotation = None
+        self._wait_started = None
+        self._wait_deadline = None
+
+    @property
+    def active(self):
+        return self.state in ('WAIT_REDRAW', 'CAPTURE')
+
+    def _start(self):
+        if self.backend == 'STUB':
+            # Окно не нужно - кадры генерируются сразу
+            self.state = 'CAPTURE'
+            return None
+
         import bpy
-        from mathutils import Euler
-    except ImportError:
-        return "❌ Модуль bpy не доступен."
 
-    try:
-        area = context.area
+        area = self.area
         if not area or area.type != 'VIEW_3D':
             return "Нет активного 3D viewport"
 
@@ -43,102 +127,305 @@ def take_photos_to_files(context, front_path, side_path):
         if not space or not space.region_3d:
             return "Не найден 3D space"
 
-        # Сохраняем исходные настройки
-        original_rotation = space.region_3d.view_rotation.copy()
+        self.region = next((r for r in area.regions if r.type == 'WINDOW'), None)
+        if self.region is None:
+            return "Не найден регион 3D viewport"
+
+        self._space = space
+        self._region_pointer = self.region.as_pointer()
+        self._original_rotation = space.region_3d.view_rotation.copy()
+        self._handler = bpy.types.SpaceView3D.draw_handler_add(
+            self._on_draw, (), 'WINDOW', 'POST_PIXEL'
+        )
+        self._set_view()
+        return None
 
-        # 1. FRONT вид
-        space.region_3d.view_rotation = Euler((math.pi/2, 0.0, 0.0)).to_quaternion()
-        area.tag_redraw()
+    def _on_draw(self):
+        """Обработчик отрисовки: нужный регион перерисован - забираем пиксели"""
+        import bpy
 
-        # Ждем обновления
-        time.sleep(0.3)
+        region = bpy.context.region
+        if self.state != 'WAIT_REDRAW' or region is None \
+                or region.as_pointer() != self._region_pointer:
+            return
 
-        # Делаем скриншот
-        bpy.ops.screen.screenshot(filepath=front_path)
+        if self.backend == 'REGION':
+            self._pixels = self._read_region_pixels(region)
+        self.state = 'CAPTURE'
 
-        # 2. SIDE вид
-        space.region_3d.view_rotation = Euler((math.pi/2, 0.0, math.pi/2)).to_quaternion()
-        area.tag_redraw()
+    @staticmethod
+    def _read_region_pixels(region):
+        """RGBA пиксели региона из активного фреймбуфера (снизу вверх)"""
+        import gpu
+        import numpy as np
 
-        # Ждем обновления
-        time.sleep(0.3)
+        width, height = region.width, region.height
+        framebuffer = gpu.state.active_framebuffer_get()
+        buffer = framebuffer.read_color(0, 0, width, height, 4, 0, 'UBYTE')
+        buffer.dimensions = width * height * 4
+        return np.asarray(buffer, dtype=np.uint8).reshape(height, width, 4)
 
-        # Делаем скриншот
-        bpy.ops.screen.screenshot(filepath=side_path)
+    def _set_view(self):
+        """Выставляет вид текущего снимка и ждет перерисовки"""
+        from mathutils import Euler
 
-        # Восстанавливаем оригинальные настройки
-        space.region_3d.view_rotation = original_rotation
-        area.tag_redraw()
+        euler, _name = self.shots[self._index]
+        if euler is not None:
+            self._space.region_3d.view_rotation = Euler(euler).to_quaternion()
+
+        self._pixels = None
+        self._redraws = 0
+        self._wait_started = time.perf_counter()
+        self._wait_deadline = self._wait_started + MAX_REDRAW_WAIT
+        self.state = 'WAIT_REDRAW'
+        self.area.tag_redraw()
+
+    def _grab_frame(self, name):
+        """Кадр текущего снимка выбранным способом"""
+        from . import image_frame
+
+        if self.backend == 'STUB':
+            import numpy as np
+
+            rgb = STUB_FRAME_PROVIDER(name) if STUB_FRAME_PROVIDER else None
+            if rgb is None:
+                width, height = STUB_FRAME_SIZE
+                rgb = np.full((height, width, 3), 128, dtype=np.uint8)
+            return image_frame.DecodedFrame.from_rgb(rgb)
+
+        if self.backend == 'REGION':
+            # OpenGL хранит строки снизу вверх, альфа детектору не нужна
+            rgb = self._pixels[::-1, :, :3]
+            self._pixels = None
+            return image_frame.DecodedFrame.from_rgb(rgb)
+
+        # FILE: скриншот всего окна во временный PNG, декодируем и сразу удаляем
+        import bpy
+        import tempfile
+        import uuid
+
+        path = os.path.join(tempfile.gettempdir(), f"{name.lower()}_temp_{uuid.uuid4().hex[:8]}.png")
+        try:
+            with bpy.context.temp_override(window=self.window, area=self.area, region=self.region):
+                bpy.ops.screen.screenshot(filepath=path)
+            frame = image_frame.DecodedFrame.from_file(path)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+        if frame is None:
+            raise RuntimeError(f"Не удалось прочитать скриншот {name}")
+        # Временный файл удален - кэш точек должен хэшировать пиксели
+        frame.path = None
+        return frame
+
+    def _capture(self):
+        """Забирает кадр текущего снимка после перерисовки региона"""
+        from . import timing
+
+        _euler, name = self.shots[self._index]
+        if self._wait_started is not None:
+            # Ожидание перерисовки региона после смены вида
+            timing.record("capture.wait", time.perf_counter() - self._wait_started, self._wait_started)
+            self._wait_started = None
+
+        with timing.span("capture.grab", view=name):
+            self.frames[name] = self._grab_frame(name).downscaled(CAPTURE_MAX_SIDE)
+
+        self._index += 1
+        if self._index >= len(self.shots):
+            self._finish(None)
+        elif self.backend != 'STUB':
+            self._set_view()
+
+    def _finish(self, error):
+        import bpy
 
+        if self._handler is not None:
+            bpy.types.SpaceView3D.draw_handler_remove(self._handler, 'WINDOW')
+            self._handler = None
+
+        # Восстанавливаем исходный вид
+        if self._original_rotation is not None:
+            try:
+                self._space.region_3d.view_rotation = self._original_rotation
+                self.area.tag_redraw()
+            except ReferenceError:
+                pass
+
+        self.error = error
+        self.state = 'FAILED' if error else 'DONE'
+
+        if self.on_finish is not None:
+            self.on_finish(self.frames, error)
+
+    def step(self):
+        """Один шаг машины состояний. Возвращает True, пока захват не завершен."""
+        if self.state == 'CAPTURE':
+            try:
+                self._capture()
+            except Exception as e:
+                self._finish(f"Ошибка при создании скриншотов: {str(e)}")
+        return self.active
+
+    def cancel(self):
+        """Прерывает захват и восстанавливает вид"""
+        if self.active:
+            self._finish("Захват отменен")
+
+    def _tick(self):
+        try:
+            if self.state == 'WAIT_REDRAW' and time.perf_counter() > self._wait_deadline:
+                self._finish(f"3D viewport не перерисовывается (ожидание > {MAX_REDRAW_WAIT:.0f} с)")
+                return None
+            if self.step():
+                return CAPTURE_POLL_INTERVAL
+        except ReferenceError:
+            # Окно или область закрыты во время захвата
+            self._finish("3D viewport закрыт во время захвата")
         return None
 
-    except Exception as e:
-        return f"Ошибка при создании скриншотов: {str(e)}"
+    def run_async(self):
+        """Запускает захват по таймеру. Возвращает ошибку запуска или None."""
+        import bpy
 
+        error = self._start()
+        if error:
+            self.state = 'FAILED'
+            self.error = error
+            return error
 
-def draw_2d_pose_on_image(image_path, coordinates_2d, view_type):
-    """Рисует 2D скелет на изображении БЕЗ ПОДПИСЕЙ ТОЧЕК"""
+        # Замеры захвата идут в запуск операции, которая начала захват (timing)
+        context = contextvars.copy_context()
+        bpy.app.timers.register(lambda: context.run(self._tick), first_interval=0.0)
+        return None
+
+    def run_blocking(self):
+        """
+        Захват внутри текущего оператора: вместо ожидания перерисовка
+        региона вызывается принудительно, по одному кадру на снимок.
+        Возвращает ошибку или None.
+        """
+        error = self._start()
+        if error:
+            self.state = 'FAILED'
+            self.error = error
+            return error
+
+        while self.active:
+            if self.state == 'WAIT_REDRAW':
+                if self._redraws >= MAX_REDRAWS_PER_SHOT:
+                    self._finish("3D viewport не перерисовывается")
+                    break
+                self._redraws += 1
+                self._force_redraw()
+            self.step()
+
+        return self.error
+
+    def _force_redraw(self):
+        import bpy
+
+        with bpy.context.temp_override(window=self.window, area=self.area, region=self.region):
+            bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
+
+
+def capture_views(context, views=('FRONT', 'SIDE'), backend=None):
+    """
+    Захватывает виды viewport в память.
+    Возвращает (словарь имя -> DecodedFrame, error).
+    """
+    try:
+        job = ViewCaptureJob(context, [(VIEW_EULERS[view], view) for view in views], backend=backend)
+        error = job.run_blocking()
+        return job.frames, error
+
+    except Exception as e:
+        return {}, f"Ошибка при создании скриншотов: {str(e)}"
+
+
+def capture_views_async(context, on_finish, views=('FRONT', 'SIDE'), backend=None):
+    """
+    То же, что capture_views, но без блокировки интерфейса:
+    on_finish(frames, error) вызывается из таймера после последнего снимка.
+    Возвращает (job, error запуска).
+    """
+    job = ViewCaptureJob(context, [(VIEW_EULERS[view], view) for view in views],
+                         on_finish=on_finish, backend=backend)
+    error = job.run_async()
+    return job, error
+
+
+# Соединения 13 ключевых точек для рисования скелета
+POSE_2D_CONNECTIONS = (
+    (0, 1),   # нос -> левое плечо
+    (0, 2),   # нос -> правое плечо
+    (1, 3),   # левое плечо -> левый локоть
+    (2, 4),   # правое плечо -> правый локоть
+    (3, 5),   # левый локоть -> левое запястье
+    (4, 6),   # правый локоть -> правое запястье
+    (1, 7),   # левое плечо -> левое бедро
+    (2, 8),   # правое плечо -> правое бедро
+    (7, 9),   # левое бедро -> левое колено
+    (8, 10),  # правое бедро -> правое колено
+    (9, 11),  # левое колено -> левая лодыжка
+    (10, 12), # правое колено -> правая лодыжка
+    (7, 8),   # левое бедро -> правое бедро (таз)
+)
+
+
+def render_2d_pose(image, coordinates_2d, view_type):
+    """
+    Рисует 2D скелет поверх BGR кадра и возвращает новый кадр (без сохранения).
+    Не зависит от bpy, поэтому его же меряют бенчмарки.
+    """
+    import cv2
+
+    # Создаем копию для рисования
+    overlay = image.copy()
+
+    # Рисуем линии между точками
+    for i, j in POSE_2D_CONNECTIONS:
+        if i < len(coordinates_2d) and j < len(coordinates_2d):
+            x1, y1 = coordinates_2d[i]
+            x2, y2 = coordinates_2d[j]
+
+            # Рисуем линию (зеленая, толщина 3)
+            cv2.line(overlay, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 3)
+
+    # Рисуем точки (красные, радиус 6, без подписей)
+    for x, y in coordinates_2d:
+        cv2.circle(overlay, (int(x), int(y)), 6, (0, 0, 255), -1)
+
+    # Добавляем заголовок
+    cv2.putText(overlay, f"MediaPipe 2D Pose Detection - {view_type} View",
+               (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+
+    # Смешиваем с оригиналом
+    alpha = 0.7
+    return cv2.addWeighted(image, 1-alpha, overlay, alpha, 0)
+
+
+def draw_2d_pose_on_image(image, coordinates_2d, view_type):
+    """
+    Рисует 2D скелет на изображении БЕЗ ПОДПИСЕЙ ТОЧЕК.
+    image - путь к файлу или уже декодированный image_frame.DecodedFrame
+    """
     try:
         import cv2
-        import numpy as np
+        from . import image_frame
     except ImportError:
-        print("❌ OpenCV не установлен")
+        log.error("❌ OpenCV не установлен")
         return None
 
     try:
-        # Загружаем изображение
-        image = cv2.imread(image_path)
-        if image is None:
-            print(f"⚠️ Не удалось загрузить изображение: {image_path}")
+        # Берем уже декодированный буфер (или декодируем файл)
+        frame, error = image_frame.load_frame(image)
+        if error:
+            log.warning(f"⚠️ {error}")
             return None
 
-        h, w = image.shape[:2]
-
-        # Создаем копию для рисования
-        overlay = image.copy()
-
-        # Определяем соединения между точками (MediaPipe pose connections)
-        connections = [
-            (0, 1),   # нос -> левое плечо
-            (0, 2),   # нос -> правое плечо
-            (1, 3),   # левое плечо -> левый локоть
-            (2, 4),   # правое плечо -> правый локоть
-            (3, 5),   # левый локоть -> левое запястье
-            (4, 6),   # правый локоть -> правое запястье
-            (1, 7),   # левое плечо -> левое бедро
-            (2, 8),   # правое плечо -> правое бедро
-            (7, 9),   # левое бедро -> левое колено
-            (8, 10),  # правое бедро -> правое колено
-            (9, 11),  # левое колено -> левая лодыжка
-            (10, 12), # правое колено -> правая лодыжка
-            (7, 8),   # левое бедро -> правое бедро (таз)
-        ]
-
-        # Рисуем линии между точками
-        for i, j in connections:
-            if i < len(coordinates_2d) and j < len(coordinates_2d):
-                x1, y1 = coordinates_2d[i]
-                x2, y2 = coordinates_2d[j]
-
-                # Преобразуем в целые числа
-                pt1 = (int(x1), int(y1))
-                pt2 = (int(x2), int(y2))
-
-                # Рисуем линию (зеленая, толщина 3)
-                cv2.line(overlay, pt1, pt2, (0, 255, 0), 3)
-
-        # Рисуем точки (красные, без подписей)
-        for x, y in coordinates_2d:
-            # Рисуем точку (красная, радиус 6)
-            cv2.circle(overlay, (int(x), int(y)), 6, (0, 0, 255), -1)
-
-        # Добавляем заголовок
-        cv2.putText(overlay, f"MediaPipe 2D Pose Detection - {view_type} View",
-                   (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
-
-        # Смешиваем с оригиналом
-        alpha = 0.7
-        result = cv2.addWeighted(image, 1-alpha, overlay, alpha, 0)
+        result = render_2d_pose(frame.bgr, coordinates_2d, view_type)
 
         # Сохраняем результат
         save_dir = get_screenshots_directory()
@@ -147,13 +434,11 @@ def draw_2d_pose_on_image(image_path, coordinates_2d, view_type):
 
         cv2.imwrite(output_path, result)
 
-        print(f"✅ 2D скелет сохранен: {output_path}")
+        log.info(f"✅ 2D скелет сохранен: {output_path}")
         return output_path
 
     except Exception as e:
-        print(f"❌ Ошибка при рисовании 2D скелета: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception(f"❌ Ошибка при рисовании 2D скелета: {str(e)}")
         return None
 
 
@@ -162,18 +447,14 @@ def create_skeleton_3d_screenshot():
     try:
         import bpy
 
-        # Ищем скелет
-        skeletons = [
-            obj for obj in bpy.data.objects
-            if obj.type == 'ARMATURE' and obj.name.startswith("Pose_Skeleton")
-        ]
+        from . import skeleton_registry
 
-        if not skeletons:
-            print("⚠️  Скелет не найден")
+        # Ищем скелет
+        skeleton = skeleton_registry.get_active()
+        if skeleton is None:
+            log.warning("⚠️  Скелет не найден")
             return None
 
-        skeleton = skeletons[0]
-
         # Выбираем скелет
         bpy.ops.object.select_all(action='DESELECT')
         skeleton.select_set(True)
@@ -182,19 +463,23 @@ def create_skeleton_3d_screenshot():
         # Фокус на скелете
         bpy.ops.view3d.view_selected()
 
-        # Ждем обновления
-        time.sleep(0.5)
-
         save_dir = get_screenshots_directory()
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_path = os.path.join(save_dir, f"skeleton_3d_{timestamp}.png")
 
-        # Делаем скриншот
-        bpy.ops.screen.screenshot(filepath=output_path)
+        # Кадр после фактической перерисовки (текущий вид, без поворота)
+        job = ViewCaptureJob(bpy.context, [(None, 'SKELETON')])
+        error = job.run_blocking()
+        if error:
+            log.error(f"❌ Ошибка скриншота 3D скелета: {error}")
+            return None
+
+        import cv2
+        cv2.imwrite(output_path, job.frames['SKELETON'].bgr)
 
-        print(f"✅ 3D скриншот скелета сохранен: {output_path}")
+        log.info(f"✅ 3D скриншот скелета сохранен: {output_path}")
         return output_path
 
     except Exception as e:
-        print(f"❌ Ошибка скриншота 3D скелета: {str(e)}")
+        log.error(f"❌ Ошибка скриншота 3D скелета: {str(e)}")
         return None
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Тестовый источник для живого потока позы (stream_ingest.py)
+
+Читает видеофайл и отправляет его кадры в Blender с частотой видео, как
+это делала бы камера. С --landmarks детекция выполняется здесь, а в
+Blender уходят только точки.
+
+Запуск (в Python с opencv-python и numpy, для --landmarks еще mediapipe):
+    python scripts/stream_producer.py clip.mp4
+    python scripts/stream_producer.py clip.mp4 --port 8766 --loop --max-side 640
+    python scripts/stream_producer.py clip.mp4 --landmarks --model models/pose_landmarker.task
+"""
+import argparse
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import detection_protocol as protocol  # noqa: E402
+
+
+def _open_landmarker(model_path):
+    from mediapipe.tasks import python
+    from mediapipe.tasks.python import vision
+
+    options = vision.PoseLandmarkerOptions(
+        base_options=python.BaseOptions(model_asset_path=model_path),
+        running_mode=vision.RunningMode.VIDEO,
+        num_poses=1,
+    )
+    return vision.PoseLandmarker.create_from_options(options)
+
+
+def main(argv=None):
+    import cv2
+    import numpy as np
+
+    parser = argparse.ArgumentParser(description="Photo Tool Pro stream producer")
+    parser.add_argument("video")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--fps", type=float, default=0.0, help="частота отправки (0 - как в видео)")
+    parser.add_argument("--max-side", type=int, default=0, help="уменьшить кадр до этой стороны")
+    parser.add_argument("--loop", action="store_true", help="повторять видео по кругу")
+    parser.add_argument("--landmarks", action="store_true", help="отправлять точки вместо кадров")
+    parser.add_argument("--model", default=None, help="модель для --landmarks")
+    args = parser.parse_args(argv)
+
+    capture = cv2.VideoCapture(args.video)
+    if not capture.isOpened():
+        raise SystemExit(f"Не удалось открыть видео: {args.video}")
+
+    fps = args.fps or capture.get(cv2.CAP_PROP_FPS) or 30.0
+    interval = 1.0 / fps
+
+    landmarker = None
+    if args.landmarks:
+        if not args.model:
+            raise SystemExit("Для --landmarks нужен --model")
+        import mediapipe as mp
+        landmarker = _open_landmarker(args.model)
+
+    sock = socket.create_connection((args.host, args.port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    print(f"📡 Отправка в {args.host}:{args.port} с частотой {fps:.1f} кадр/с")
+
+    sent = 0
+    started = time.monotonic()
+    next_time = started
+
+    try:
+        while True:
+            ok, bgr = capture.read()
+            if not ok:
+                if args.loop:
+                    capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                break
+
+            if args.max_side and max(bgr.shape[:2]) > args.max_side:
+                factor = args.max_side / float(max(bgr.shape[:2]))
+                bgr = cv2.resize(bgr, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+            rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+            capture_time = time.time()
+
+            if landmarker is not None:
+                timestamp = int((time.monotonic() - started) * 1000.0)
+                result = landmarker.detect_for_video(
+                    mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb), timestamp
+                )
+                if not result.pose_landmarks:
+                    continue
+                normalized = np.array(
+                    [(lm.x, lm.y, lm.z, lm.visibility or 0.0) for lm in result.pose_landmarks[0]],
+                    dtype=np.float32
+                )
+                protocol.send_message(sock, protocol.MSG_STREAM_LANDMARKS,
+                                      *protocol.encode_stream_landmarks(normalized, capture_time))
+            else:
+                protocol.send_message(sock, protocol.MSG_STREAM_FRAME,
+                                      *protocol.encode_stream_frame(rgb, capture_time))
+
+            sent += 1
+            next_time += interval
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Отстали - не пытаемся догонять пачкой кадров
+                next_time = time.monotonic()
+
+    except (BrokenPipeError, ConnectionResetError):
+        print("⚠️ Blender закрыл соединение")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+        capture.release()
+        if landmarker is not None:
+            landmarker.close()
+
+    elapsed = time.monotonic() - started
+    print(f"✅ Отправлено {sent} пакетов за {elapsed:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Реестр скелетов Pose_Skeleton
+
+poll() операторов и draw() панели вызываются на каждой перерисовке, поэтому
+не перебирают bpy.data.objects, а спрашивают реестр. Скелеты, созданные
+аддоном, помечаются свойством SKELETON_TAG; старые сцены без метки
+распознаются по имени при пересборке.
+
+Реестр пересобирается одним проходом по объектам только после событий,
+которые могут изменить набор скелетов: загрузка файла, undo/redo, а из
+depsgraph_update_post - изменение числа объектов, удаление скелета из
+реестра или обновленная арматура, которая стала или перестала быть
+скелетом либо была переименована. Поза и трансформации (в том числе живой
+поток 60 раз в секунду) набор скелетов не меняют и реестр не сбрасывают.
+Эти проверки делаются только при обновлении объектов (id_type_updated('OBJECT')),
+а "есть ли скелет" и "какой скелет активный" в poll() отвечают за O(1).
+"""
+import bpy
+from bpy.app.handlers import persistent
+
+from . import log_utils
+
+log = log_utils.get_logger(__name__)
+
+# Свойство объекта, которым помечаются скелеты аддона
+SKELETON_TAG = "photo_tool_pro_skeleton"
+
+# Префикс имени скелетов из сцен, сохраненных до появления метки
+SKELETON_NAME_PREFIX = "Pose_Skeleton"
+
+_skeletons = []
+# Указатель объекта -> имя для скелетов реестра (проверка обновлений арматур)
+_tracked = {}
+_dirty = True
+_object_count = -1
+
+
+def _is_skeleton(obj):
+    return obj.type == 'ARMATURE' and (
+        obj.get(SKELETON_TAG) is not None or obj.name.startswith(SKELETON_NAME_PREFIX)
+    )
+
+
+def _rebuild():
+    """Один проход по bpy.data.objects; порядок - как в bpy.data (по имени)"""
+    global _skeletons, _tracked, _dirty, _object_count
+
+    objects = bpy.data.objects
+    _skeletons = [obj for obj in objects if _is_skeleton(obj)]
+    _tracked = {obj.as_pointer(): obj.name for obj in _skeletons}
+    _object_count = len(objects)
+    _dirty = False
+    log.debug("🦴 Реестр скелетов пересобран: %d", len(_skeletons))
+
+
+def _cached_skeletons():
+    """Кэшированный список без проверки ссылок - для poll() и draw()"""
+    if _dirty:
+        _rebuild()
+    return _skeletons
+
+
+def _has_removed_skeleton():
+    try:
+        for obj in _skeletons:
+            obj.name
+    except ReferenceError:
+        return True
+    return False
+
+
+def invalidate():
+    """Пересобрать реестр при следующем обращении"""
+    global _dirty
+    _dirty = True
+
+
+def tag(obj):
+    """Помечает созданный аддоном скелет и добавляет его в реестр"""
+    obj[SKELETON_TAG] = True
+    if not _dirty and obj not in _skeletons:
+        _skeletons.append(obj)
+        _skeletons.sort(key=lambda skeleton: skeleton.name)
+        _tracked[obj.as_pointer()] = obj.name
+
+
+def get_skeletons():
+    """Все скелеты сцены (список не изменять); ссылки проверяются - O(k)"""
+    skeletons = _cached_skeletons()
+    if _has_removed_skeleton():
+        _rebuild()
+        skeletons = _skeletons
+    return skeletons
+
+
+def has_skeleton():
+    return bool(_cached_skeletons())
+
+
+def get_active(context=None):
+    """
+    Скелет, с которым работают операторы: активный объект, если это скелет,
+    иначе первый по имени (как раньше). None, если скелетов нет.
+    """
+    skeletons = _cached_skeletons()
+    if not skeletons:
+        return None
+
+    active = getattr(context or bpy.context, "active_object", None)
+    if active is not None and active.type == 'ARMATURE' and _is_skeleton(active):
+        return active
+
+    # Проверяется только возвращаемая ссылка, а не весь список
+    try:
+        skeletons[0].name
+    except ReferenceError:
+        _rebuild()
+        return _skeletons[0] if _skeletons else None
+    return skeletons[0]
+
+
+# --- Обработчики bpy.app.handlers --------------------------------------------
+
+@persistent
+def _on_file_or_undo(*_args):
+    # После загрузки и undo/redo все ссылки на объекты недействительны
+    invalidate()
+
+
+def _skeleton_set_changed(depsgraph):
+    """
+    Изменился ли набор скелетов по обновленным арматурам: арматура стала
+    скелетом (метка, имя), перестала им быть или скелет переименован
+    (порядок по имени). Обновления позы и трансформаций сюда тоже попадают,
+    но для них ответ - нет.
+    """
+    for update in depsgraph.updates:
+        obj = update.id
+        if not isinstance(obj, bpy.types.Object) or obj.type != 'ARMATURE':
+            continue
+        obj = obj.original
+        tracked_name = _tracked.get(obj.as_pointer())
+        if _is_skeleton(obj):
+            if tracked_name != obj.name:
+                return True
+        elif tracked_name is not None:
+            return True
+    return False
+
+
+@persistent
+def _on_depsgraph_update(_scene, depsgraph=None):
+    if _dirty:
+        return
+    if depsgraph is not None and not depsgraph.id_type_updated('OBJECT'):
+        return
+    # Добавление/удаление объектов меняет их число; метка, снятие метки или
+    # переименование арматуры видны в ее обновлении; удаление скелета вместе с
+    # добавлением другого объекта - по недействительной ссылке в реестре
+    if (len(bpy.data.objects) != _object_count
+            or depsgraph is None
+            or _skeleton_set_changed(depsgraph)
+            or _has_removed_skeleton()):
+        invalidate()
+
+
+_HANDLERS = (
+    ("load_post", _on_file_or_undo),
+    ("undo_post", _on_file_or_undo),
+    ("redo_post", _on_file_or_undo),
+    ("depsgraph_update_post", _on_depsgraph_update),
+)
+
+
+def register():
+    for name, handler in _HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if handler not in handlers:
+            handlers.append(handler)
+    invalidate()
+
+
+def unregister():
+    for name, handler in _HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if handler in handlers:
+            handlers.remove(handler)
+    invalidate()
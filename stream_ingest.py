@@ -0,0 +1,334 @@
+"""
+Потоковый ввод позы через локальный сокет (живой ретаргетинг)
+
+Внешний процесс захвата (камера, другая машина, scripts/stream_producer.py)
+присылает либо сырые кадры, либо готовые точки MediaPipe по протоколу
+detection_protocol. Очереди нет: в каждой стадии хранится только самый
+свежий пакет, старый выбрасывается (drop-oldest), поэтому задержка не
+копится, даже если Blender не успевает.
+
+  сокет -> [последний кадр] -> поток детекции -> [последние точки] -> таймер bpy
+
+Таймер в главном потоке применяет к Pose_Skeleton только самые свежие точки.
+Для каждой стадии ведется статистика задержек.
+"""
+import socket
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from . import detection_protocol as protocol
+from . import log_utils
+
+log = log_utils.get_logger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766
+
+# Частота таймера, применяющего позу
+APPLY_INTERVAL = 1.0 / 60.0
+
+# Порог детекции для потока (VIDEO режим с трекингом)
+STREAM_MIN_CONFIDENCE = 0.5
+
+# Сколько последних измерений хранить для статистики
+STATS_WINDOW = 120
+
+# Стадии статистики задержек (мс)
+STAGES = ("transport", "detect", "wait", "apply", "total")
+
+
+class LatestSlot:
+    """Ячейка на один пакет: новый пакет вытесняет непрочитанный старый"""
+
+    def __init__(self):
+        self._item = None
+        self._condition = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._condition:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._condition.notify()
+
+    def take(self, timeout=None):
+        """Забирает пакет; ждет до timeout секунд (None - не ждать)"""
+        with self._condition:
+            if self._item is None and timeout:
+                self._condition.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def clear(self):
+        with self._condition:
+            self._item = None
+
+
+class _Packet:
+    """Пакет на пути по стадиям: точки (33, 4) и отметки времени"""
+
+    __slots__ = ("rgb", "landmarks", "capture_time", "received", "detected")
+
+    def __init__(self, capture_time, received, rgb=None, landmarks=None):
+        self.rgb = rgb
+        self.landmarks = landmarks
+        self.capture_time = capture_time
+        self.received = received
+        self.detected = received
+
+
+# Состояние потока
+_frames = LatestSlot()
+_landmarks = LatestSlot()
+_stop_event = threading.Event()
+_threads = []
+_server_socket = None
+_skeleton_name = None
+_stats = {stage: deque(maxlen=STATS_WINDOW) for stage in STAGES}
+_counters = {"received": 0, "applied": 0}
+_stats_lock = threading.Lock()
+_model_path = None
+
+
+def _record(stage, milliseconds):
+    with _stats_lock:
+        _stats[stage].append(milliseconds)
+
+
+def _handle_connection(conn):
+    """Поток соединения: читает пакеты и кладет последний в ячейку"""
+    with conn:
+        conn.settimeout(0.5)
+        while not _stop_event.is_set():
+            try:
+                message_type, payload = protocol.recv_message(conn)
+            except socket.timeout:
+                continue
+            except (protocol.ProtocolError, OSError):
+                return
+
+            received = time.time()
+            with _stats_lock:
+                _counters["received"] += 1
+
+            try:
+                if message_type == protocol.MSG_STREAM_FRAME:
+                    rgb, capture_time = protocol.decode_stream_frame(payload)
+                    _frames.put(_Packet(capture_time, received, rgb=rgb))
+                elif message_type == protocol.MSG_STREAM_LANDMARKS:
+                    normalized, capture_time = protocol.decode_stream_landmarks(payload)
+                    if len(normalized):
+                        _landmarks.put(_Packet(capture_time, received, landmarks=normalized[0]))
+                else:
+                    continue
+            except protocol.ProtocolError as e:
+                log.warning(f"⚠️ Поток: неверный пакет: {e}")
+                continue
+
+            # Время от захвата до приема (имеет смысл при синхронных часах)
+            _record("transport", max(0.0, (received - capture_time) * 1000.0))
+
+
+def _accept_loop(server):
+    server.settimeout(0.5)
+    while not _stop_event.is_set():
+        try:
+            conn, _address = server.accept()
+        except socket.timeout:
+            continue
+        except OSError:
+            return
+        thread = threading.Thread(target=_handle_connection, args=(conn,),
+                                  name="PhotoToolProStreamConn", daemon=True)
+        thread.start()
+
+
+def _detect_loop():
+    try:
+        _run_detection()
+    except Exception as e:
+        log.error(f"❌ Поток детекции остановлен: {e}")
+
+
+def _run_detection():
+    """Поток детекции: берет только последний кадр, отдает точки дальше"""
+    import mediapipe as mp
+    from . import detector_registry
+
+    timestamp = None
+    with detector_registry.acquire(_model_path, running_mode='VIDEO',
+                                   min_confidence=STREAM_MIN_CONFIDENCE) as detector:
+        # Метки времени VIDEO режима должны расти на всем времени жизни детектора
+        clock_start = time.monotonic()
+        offset = detector_registry.timeline_offset(detector, 0)
+
+        while not _stop_event.is_set():
+            packet = _frames.take(timeout=0.1)
+            if packet is None:
+                continue
+
+            started = time.time()
+            timestamp = int((time.monotonic() - clock_start) * 1000.0) + offset
+            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(packet.rgb))
+            result = detector.detect_for_video(mp_image, timestamp)
+            packet.rgb = None
+
+            packet.detected = time.time()
+            _record("detect", (packet.detected - started) * 1000.0)
+
+            normalized, _world, _presence = protocol.result_arrays(result)
+            if len(normalized):
+                packet.landmarks = normalized[0]
+                _landmarks.put(packet)
+
+        if timestamp is not None:
+            detector_registry.record_timestamp(detector, timestamp)
+
+
+def _apply_latest():
+    """Таймер bpy.app.timers: применяет к скелету только самые свежие точки"""
+    if _stop_event.is_set():
+        return None
+
+    packet = _landmarks.take()
+    if packet is None:
+        return APPLY_INTERVAL
+
+    import bpy
+    from . import pose_core
+    from . import pose_from_photo
+
+    armature = bpy.data.objects.get(_skeleton_name) if _skeleton_name else None
+    if armature is None:
+        return APPLY_INTERVAL
+
+    started = time.time()
+    _record("wait", (started - packet.detected) * 1000.0)
+
+    try:
+        key_points = pose_core.gather_key_points(packet.landmarks)[:, :3].astype(np.float64)
+        quats, solved_mask = pose_from_photo.solve_pose_quaternions(armature, key_points)
+        pose_from_photo.write_pose_quaternions(armature, quats, solved_mask)
+    except Exception as e:
+        log.warning(f"⚠️ Поток: не удалось применить позу: {e}")
+        return APPLY_INTERVAL
+
+    finished = time.time()
+    _record("apply", (finished - started) * 1000.0)
+    _record("total", (finished - packet.received) * 1000.0)
+    with _stats_lock:
+        _counters["applied"] += 1
+        applied = _counters["applied"]
+
+    # Панель со статистикой обновляем примерно раз в полсекунды
+    if applied % 30 == 0:
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type == 'VIEW_3D':
+                    area.tag_redraw()
+
+    return APPLY_INTERVAL
+
+
+def is_running():
+    return _server_socket is not None
+
+
+def start(skeleton_name, model_path=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """
+    Открывает сокет и запускает потоки приема/детекции и таймер применения.
+    model_path нужен только для сырых кадров. Возвращает ошибку или None.
+    """
+    global _server_socket, _skeleton_name, _model_path
+
+    if is_running():
+        return "Поток уже запущен"
+
+    try:
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((host, port))
+        server.listen()
+    except OSError as e:
+        return f"Не удалось открыть порт {port}: {e}"
+
+    _stop_event.clear()
+    _frames.clear()
+    _landmarks.clear()
+    reset_stats()
+
+    _server_socket = server
+    _skeleton_name = skeleton_name
+    _model_path = model_path
+
+    _threads.clear()
+    _threads.append(threading.Thread(target=_accept_loop, args=(server,),
+                                     name="PhotoToolProStreamAccept", daemon=True))
+    if model_path:
+        _threads.append(threading.Thread(target=_detect_loop,
+                                         name="PhotoToolProStreamDetect", daemon=True))
+    for thread in _threads:
+        thread.start()
+
+    # persistent: поток и сокет переживают загрузку .blend, значит и таймер применения
+    # тоже (скелет ищется по имени, в новом файле без него кадры просто пропускаются)
+    import bpy
+    bpy.app.timers.register(_apply_latest, first_interval=APPLY_INTERVAL, persistent=True)
+
+    log.info(f"📡 Поток позы: {host}:{port}")
+    return None
+
+
+def stop():
+    """Останавливает прием и применение"""
+    global _server_socket
+
+    _stop_event.set()
+    if _server_socket is not None:
+        try:
+            _server_socket.close()
+        except OSError:
+            pass
+        _server_socket = None
+
+    for thread in _threads:
+        thread.join(timeout=1.0)
+    _threads.clear()
+
+    try:
+        import bpy
+        if bpy.app.timers.is_registered(_apply_latest):
+            bpy.app.timers.unregister(_apply_latest)
+    except ImportError:
+        pass
+
+
+def reset_stats():
+    with _stats_lock:
+        for values in _stats.values():
+            values.clear()
+        _counters["received"] = 0
+        _counters["applied"] = 0
+    _frames.dropped = 0
+    _landmarks.dropped = 0
+
+
+def get_stats():
+    """
+    Статистика по стадиям: {стадия: (p50, p95) мс} + счетчики пакетов,
+    выброшенных кадров (не успела детекция) и точек (не успел Blender).
+    """
+    with _stats_lock:
+        stages = {
+            stage: (float(np.percentile(values, 50)), float(np.percentile(values, 95)))
+            for stage, values in _stats.items() if values
+        }
+        counters = dict(_counters)
+
+    counters["dropped_frames"] = _frames.dropped
+    counters["dropped_landmarks"] = _landmarks.dropped
+    return {"stages": stages, "counters": counters}
@@ -0,0 +1,115 @@
+"""
+Общие помощники тестов (без bpy, mediapipe и файлов моделей)
+
+- import_addon_module - импорт модулей аддона вне Blender
+- synthetic_landmarks - позы MediaPipe (F, 33, 4) с небольшим шумом
+- synthetic_rest      - данные покоя Pose_Skeleton, как get_rest_data()
+- synthetic_world     - мировые точки для synthetic_landmarks
+- fake_result         - результат в формате PoseLandmarkerResult
+"""
+import importlib
+import os
+import sys
+import types
+from types import SimpleNamespace
+
+import numpy as np
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Имя, под которым папка аддона импортируется как пакет (относительные импорты)
+ADDON_PACKAGE = "photo_tool_pro"
+
+# Поза покоя: 13 ключевых точек в долях кадра (x, y, z)
+BASE_KEY_POINTS = np.array([
+    (0.50, 0.15, -0.05),  # нос
+    (0.42, 0.28, 0.00),   # левое плечо
+    (0.58, 0.28, 0.00),   # правое плечо
+    (0.36, 0.42, 0.02),   # левый локоть
+    (0.64, 0.42, 0.02),   # правый локоть
+    (0.33, 0.55, 0.00),   # левое запястье
+    (0.67, 0.55, 0.00),   # правое запястье
+    (0.45, 0.55, 0.00),   # левое бедро
+    (0.55, 0.55, 0.00),   # правое бедро
+    (0.45, 0.72, 0.02),   # левое колено
+    (0.55, 0.72, 0.02),   # правое колено
+    (0.45, 0.90, 0.00),   # левая лодыжка
+    (0.55, 0.90, 0.00),   # правая лодыжка
+])
+
+# Индекс MediaPipe -> индекс ключевой точки, чье положение он повторяет
+# (лицо - нос, кисти - запястья, стопы - лодыжки)
+_LANDMARK_SOURCE = np.array([
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,  # 0-10: нос и лицо
+    1, 2, 3, 4, 5, 6,                 # 11-16: руки
+    5, 6, 5, 6, 5, 6,                 # 17-22: кисти
+    7, 8, 9, 10, 11, 12,              # 23-28: ноги
+    11, 12, 11, 12,                   # 29-32: стопы
+], dtype=np.intp)
+
+
+def import_addon_module(name):
+    """
+    Импортирует модуль аддона без регистрации в Blender: папка аддона
+    регистрируется как пакет без выполнения __init__.py.
+    """
+    if ADDON_PACKAGE not in sys.modules:
+        package = types.ModuleType(ADDON_PACKAGE)
+        package.__path__ = [ADDON_DIR]
+        sys.modules[ADDON_PACKAGE] = package
+    return importlib.import_module(f"{ADDON_PACKAGE}.{name}")
+
+
+def synthetic_landmarks(frames, seed=0, noise=0.01):
+    """(F, 33, 4) float32: x, y, z, visibility; каждый кадр - поза покоя с шумом"""
+    rng = np.random.default_rng(seed)
+    key_points = BASE_KEY_POINTS + rng.normal(0.0, noise, (frames, 13, 3))
+
+    landmarks = np.empty((frames, 33, 4), dtype=np.float32)
+    landmarks[..., :3] = key_points[:, _LANDMARK_SOURCE]
+    landmarks[..., 3] = rng.uniform(0.85, 1.0, (frames, 33))
+    return landmarks
+
+
+def synthetic_rest():
+    """
+    Данные покоя Pose_Skeleton в формате get_rest_data(): имена костей,
+    матрицы покоя (B, 3, 3) с осью Y вдоль кости и индексы родителей.
+    """
+    pose_core = import_addon_module("pose_core")
+
+    _center, heads, tails = pose_core.skeleton_bone_layout(
+        pose_core.mediapipe_to_pose_space(BASE_KEY_POINTS)
+    )
+    names = [bone[0] for bone in pose_core.SKELETON_BONES]
+    name_to_index = {name: i for i, name in enumerate(names)}
+    parents = np.array(
+        [name_to_index[parent] if parent else -1 for _n, _h, _t, parent, _c in pose_core.SKELETON_BONES],
+        dtype=np.intp
+    )
+
+    axes = tails - heads
+    axes /= np.linalg.norm(axes, axis=1, keepdims=True)
+    rest = pose_core.quaternion_to_matrix(pose_core.quaternion_from_y_axis(axes))
+
+    return {"names": names, "rest": rest, "parents": parents}
+
+
+def synthetic_world(landmarks):
+    """Мировые точки (F, 33, 4) в метрах: центр между бедрами, рост ~1.7 м"""
+    world = np.array(landmarks, dtype=np.float32, copy=True)
+    hips = world[:, [23, 24], :3].mean(axis=1, keepdims=True)
+    world[..., :3] = (world[..., :3] - hips) * 1.7
+    return world
+
+
+def fake_result(landmarks):
+    """PoseLandmarkerResult-подобный объект (pose_landmarks с .x/.y/.z/...) для (F, 33, 4)"""
+    def points(frame):
+        return [SimpleNamespace(x=float(x), y=float(y), z=float(z), visibility=float(v), presence=1.0)
+                for x, y, z, v in frame]
+
+    return SimpleNamespace(
+        pose_landmarks=[points(frame) for frame in landmarks],
+        pose_world_landmarks=[points(frame) for frame in synthetic_world(landmarks)],
+    )
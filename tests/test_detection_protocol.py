@@ -0,0 +1,100 @@
+import socket
+
+import numpy as np
+import pytest
+
+import helpers
+
+protocol = helpers.import_addon_module("detection_protocol")
+
+
+def _roundtrip(message_type, chunks):
+    """send_message -> recv_message через пару сокетов"""
+    left, right = socket.socketpair()
+    try:
+        protocol.send_message(left, message_type, *chunks)
+        return protocol.recv_message(right)
+    finally:
+        left.close()
+        right.close()
+
+
+def test_detect_request_roundtrip():
+    rgb = np.random.default_rng(0).integers(0, 255, (12, 16, 3), dtype=np.uint8)
+    chunks = protocol.encode_detect_request(rgb, "/models/pose_landmarker_lite.task", 0.3, 2)
+
+    message_type, payload = _roundtrip(protocol.MSG_DETECT, chunks)
+    decoded, model_path, min_confidence, num_poses = protocol.decode_detect_request(payload)
+
+    assert message_type == protocol.MSG_DETECT
+    np.testing.assert_array_equal(decoded, rgb)
+    assert model_path == "/models/pose_landmarker_lite.task"
+    assert min_confidence == pytest.approx(0.3)
+    assert num_poses == 2
+
+
+@pytest.mark.parametrize("poses", [0, 1, 2])
+def test_result_roundtrip(poses):
+    rng = np.random.default_rng(poses)
+    normalized = rng.random((poses, 33, 4), dtype=np.float32)
+    world = rng.random((poses, 33, 4), dtype=np.float32)
+    presence = rng.random((poses, 33), dtype=np.float32)
+
+    message_type, payload = _roundtrip(protocol.MSG_RESULT,
+                                       protocol.encode_result(normalized, world, presence))
+    arrays = protocol.decode_result(payload)
+
+    assert message_type == protocol.MSG_RESULT
+    np.testing.assert_array_equal(arrays["normalized"], normalized)
+    np.testing.assert_array_equal(arrays["world"], world)
+    np.testing.assert_array_equal(arrays["presence"], presence)
+
+
+def test_stream_messages_roundtrip():
+    rgb = np.zeros((4, 6, 3), dtype=np.uint8)
+    rgb[1, 2] = (10, 20, 30)
+    decoded, capture_time = protocol.decode_stream_frame(
+        _roundtrip(protocol.MSG_STREAM_FRAME, protocol.encode_stream_frame(rgb, 12.5))[1]
+    )
+    np.testing.assert_array_equal(decoded, rgb)
+    assert capture_time == 12.5
+
+    landmarks = helpers.synthetic_landmarks(1)[0]
+    decoded, capture_time = protocol.decode_stream_landmarks(
+        _roundtrip(protocol.MSG_STREAM_LANDMARKS, protocol.encode_stream_landmarks(landmarks, 3.0))[1]
+    )
+    np.testing.assert_array_equal(decoded, landmarks[np.newaxis])
+    assert capture_time == 3.0
+
+
+def test_truncated_frame_is_rejected():
+    header, path, pixels = protocol.encode_detect_request(
+        np.zeros((4, 4, 3), dtype=np.uint8), "model.task", 0.5, 1
+    )
+    payload = bytes(header) + bytes(path) + bytes(pixels)[:-1]
+
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode_detect_request(payload)
+
+
+def test_bad_magic_is_rejected():
+    left, right = socket.socketpair()
+    try:
+        left.sendall(protocol.HEADER.pack(b"XXXX", protocol.MSG_PING, 0))
+        with pytest.raises(protocol.ProtocolError):
+            protocol.recv_message(right)
+    finally:
+        left.close()
+        right.close()
+
+
+def test_result_arrays_from_mediapipe_result():
+    landmarks = helpers.synthetic_landmarks(1)
+    result = helpers.fake_result(landmarks)
+
+    normalized, world, presence = protocol.result_arrays(result)
+
+    assert normalized.shape == (1, 33, 4) and world.shape == (1, 33, 4)
+    np.testing.assert_allclose(normalized[0], landmarks[0], rtol=1e-6)
+    np.testing.assert_allclose(world[0], helpers.synthetic_world(landmarks)[0], rtol=1e-6)
+    np.testing.assert_array_equal(presence, np.ones((1, 33), dtype=np.float32))
@@ -0,0 +1,35 @@
+import pytest
+
+import helpers
+
+detection_server = helpers.import_addon_module("detection_server")
+
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    """Папка моделей сервера с одной моделью и файлом рядом"""
+    models = tmp_path / "models"
+    models.mkdir()
+    (models / "pose_landmarker_lite.task").write_bytes(b"model")
+    (tmp_path / "secret.task").write_bytes(b"secret")
+    (models / "notes.txt").write_bytes(b"text")
+    monkeypatch.setattr(detection_server, "MODEL_DIRS", [str(models)])
+    return models
+
+
+def test_resolve_model_uses_server_copy(models_dir):
+    expected = str(models_dir / "pose_landmarker_lite.task")
+
+    assert detection_server.resolve_model("/client/models/pose_landmarker_lite.task") == expected
+    assert detection_server.resolve_model("C:\\Users\\me\\pose_landmarker_lite.task") == expected
+
+
+@pytest.mark.parametrize("requested", [
+    "../secret.task",
+    "/etc/passwd",
+    "notes.txt",
+    "",
+])
+def test_resolve_model_rejects_paths_outside_model_dirs(models_dir, requested):
+    with pytest.raises((ValueError, FileNotFoundError)):
+        detection_server.resolve_model(requested)
@@ -0,0 +1,92 @@
+import struct
+
+import numpy as np
+import pytest
+
+import helpers
+
+image_frame = helpers.import_addon_module("image_frame")
+
+
+def _frame(width=600, height=400):
+    return image_frame.DecodedFrame(np.zeros((height, width, 3), dtype=np.uint8))
+
+
+def _jpeg_header(width, height):
+    """Начало JPEG: SOI, APP0 и SOF0 с размером (без данных изображения)"""
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + bytes(9)
+    sof0 = b"\xff\xc0" + struct.pack(">HBHHB", 17, 8, height, width, 3) + bytes(9)
+    return b"\xff\xd8" + app0 + sof0 + b"\xff\xda"
+
+
+def test_crop_sets_roi_in_source_fractions():
+    crop = _frame().crop((0.25, 0.5, 0.75, 1.0))
+
+    assert crop.shape[:2] == (200, 300)
+    assert crop.roi == pytest.approx((0.25, 0.5, 0.75, 1.0))
+    assert crop.source_shape == (400, 600, 3)
+
+
+def test_map_to_source_after_nested_crop():
+    frame = _frame()
+    crop = frame.crop((0.25, 0.5, 0.75, 1.0)).crop((0.5, 0.75, 0.75, 1.0))
+    points = np.array([[0.5, 0.5, 0.1, 0.9]], dtype=np.float32)
+
+    mapped = crop.map_to_source(points)
+
+    # Центр вложенной области в долях всего кадра; z - в масштабе ширины области
+    np.testing.assert_allclose(mapped, [[0.625, 0.875, 0.025, 0.9]], atol=1e-6)
+
+
+def test_map_to_source_matches_pixels_of_full_frame():
+    frame = _frame(640, 480)
+    crop = frame.crop((0.1, 0.2, 0.6, 0.9))
+    points = np.array([[0.3, 0.4, 0.0, 1.0], [1.0, 1.0, 0.0, 1.0]], dtype=np.float32)
+
+    mapped = crop.map_to_source(points)
+
+    # Пиксель внутри области + ее смещение = пиксель всего кадра
+    left, top = 0.1 * 640, 0.2 * 480
+    expected_x = left + points[:, 0] * crop.width
+    expected_y = top + points[:, 1] * crop.height
+    np.testing.assert_allclose(mapped[:, 0] * 640, expected_x, atol=1e-3)
+    np.testing.assert_allclose(mapped[:, 1] * 480, expected_y, atol=1e-3)
+
+
+def test_map_to_source_full_frame_is_identity():
+    points = np.random.default_rng(0).random((2, 33, 4), dtype=np.float32)
+    assert _frame().map_to_source(points) is points
+
+
+def test_downscaled_keeps_roi_and_source_shape():
+    pytest.importorskip("cv2")
+    crop = _frame(4000, 3000).crop((0.2, 0.1, 0.7, 0.9))
+
+    small = crop.downscaled(500)
+
+    assert max(small.width, small.height) == 500
+    assert small.roi == crop.roi
+    assert small.source_shape == (3000, 4000, 3)
+    points = np.array([[0.5, 0.5, 0.2, 1.0]], dtype=np.float32)
+    np.testing.assert_allclose(small.map_to_source(points), crop.map_to_source(points))
+
+
+def test_jpeg_size_from_header(tmp_path):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(_jpeg_header(6000, 4000))
+    not_jpeg = tmp_path / "photo.png"
+    not_jpeg.write_bytes(b"\x89PNG\r\n\x1a\n")
+
+    assert image_frame._jpeg_size(str(path)) == (6000, 4000)
+    assert image_frame._jpeg_size(str(not_jpeg)) is None
+
+
+@pytest.mark.parametrize("size, expected", [
+    ((6000, 4000), 2),
+    ((16384, 8000), 8),
+    ((8192, 5000), 4),
+    ((2048, 1500), 1),
+    (None, 1),
+])
+def test_reduced_factor_keeps_long_side(size, expected):
+    assert image_frame._reduced_factor(size, 2048) == expected
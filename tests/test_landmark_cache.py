@@ -0,0 +1,113 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+import helpers
+
+landmark_cache = helpers.import_addon_module("landmark_cache")
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Пустой кэш во временной папке"""
+    monkeypatch.setattr(landmark_cache, "CACHE_DIR", str(tmp_path / "landmarks"))
+    monkeypatch.setattr(landmark_cache, "CACHE_ENABLED", True)
+    monkeypatch.setattr(landmark_cache, "_index", None)
+    monkeypatch.setattr(landmark_cache, "_index_bytes", 0)
+    monkeypatch.setattr(landmark_cache, "_file_hashes", OrderedDict())
+    return landmark_cache
+
+
+def _arrays(value=0.5):
+    return {
+        "normalized": np.full((1, 33, 4), value, dtype=np.float32),
+        "world": np.zeros((1, 33, 4), dtype=np.float32),
+        "presence": np.ones((1, 33), dtype=np.float32),
+    }
+
+
+def test_make_key_depends_on_image_model_and_options(cache):
+    key = cache.make_key("image", "model", ('IMAGE', 0.3))
+
+    assert key == cache.make_key("image", "model", ('IMAGE', 0.3))
+    assert key != cache.make_key("other", "model", ('IMAGE', 0.3))
+    assert key != cache.make_key("image", "other", ('IMAGE', 0.3))
+    assert key != cache.make_key("image", "model", ('IMAGE', 0.5))
+
+
+def test_get_or_compute_stores_and_reuses(cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return _arrays()
+
+    key = cache.make_key("image", "model", ())
+    first, cached_first = cache.get_or_compute(key, compute)
+    second, cached_second = cache.get_or_compute(key, compute)
+
+    assert (cached_first, cached_second) == (False, True)
+    assert len(calls) == 1
+    np.testing.assert_array_equal(first["normalized"], second["normalized"])
+
+
+def test_get_or_compute_single_flight(cache):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5.0)
+        return _arrays()
+
+    key = cache.make_key("image", "model", ())
+    results = []
+
+    def worker():
+        results.append(cache.get_or_compute(key, compute))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    threads[0].start()
+    assert started.wait(5.0)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5.0)
+
+    assert len(calls) == 1
+    assert len(results) == 4
+    assert sorted(cached for _arrays_, cached in results) == [False, True, True, True]
+
+
+def test_store_evicts_least_recently_used(cache, monkeypatch):
+    cache.store("a" * 32, **_arrays(0.1))
+    size = cache.get_stats()["bytes"]
+    monkeypatch.setattr(cache, "MAX_CACHE_BYTES", int(size * 2.5))
+
+    cache.store("b" * 32, **_arrays(0.2))
+    assert cache.load("a" * 32) is not None  # "a" теперь недавний
+    cache.store("c" * 32, **_arrays(0.3))
+
+    assert cache.load("b" * 32) is None
+    assert cache.load("a" * 32) is not None
+    assert cache.get_stats()["entries"] == 2
+
+
+def test_hash_file_memo_is_bounded(cache, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "MAX_FILE_HASHES", 2)
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"frame_{index}.png"
+        path.write_bytes(bytes([index]) * 16)
+        paths.append(str(path))
+
+    hashes = [cache.hash_file(path) for path in paths]
+
+    assert len(set(hashes)) == 3
+    assert len(cache._file_hashes) == 2
+    assert cache.hash_file(paths[0]) == hashes[0]
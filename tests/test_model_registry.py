@@ -0,0 +1,75 @@
+import os
+from collections import OrderedDict
+
+import pytest
+
+import helpers
+
+model_registry = helpers.import_addon_module("model_registry")
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    """Реестр с одной папкой поиска и подсчетом сканирований"""
+    models = tmp_path / "models"
+    models.mkdir()
+    scans = []
+
+    def search_dirs():
+        scans.append(1)
+        return [str(models)]
+
+    monkeypatch.setattr(model_registry, "search_dirs", search_dirs)
+    monkeypatch.setattr(model_registry, "_found", None)
+    monkeypatch.setattr(model_registry, "_dirs_stamp", ())
+    monkeypatch.setattr(model_registry, "_hashes", OrderedDict())
+    return models, scans
+
+
+def _touch_later(path, data=b"model"):
+    """Создает файл и сдвигает mtime папки, даже если часы файловой системы грубые"""
+    path.write_bytes(data)
+    stat = os.stat(path.parent)
+    os.utime(path.parent, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_missing_model_is_cached_until_directory_changes(registry):
+    models, scans = registry
+
+    assert model_registry.resolve('HEAVY') is None
+    assert model_registry.resolve('HEAVY') is None
+    assert model_registry.resolve('LITE') is None
+    assert len(scans) == 1
+
+    _touch_later(models / "pose_landmarker_lite.task")
+
+    assert model_registry.resolve('HEAVY') == str(models / "pose_landmarker_lite.task")
+    assert len(scans) == 2
+
+
+def test_rescan_after_found_model_is_removed(registry):
+    models, scans = registry
+    _touch_later(models / "pose_landmarker_heavy.task")
+    _touch_later(models / "pose_landmarker_lite.task")
+
+    assert model_registry.resolve('HEAVY') == str(models / "pose_landmarker_heavy.task")
+    os.remove(models / "pose_landmarker_heavy.task")
+
+    assert model_registry.resolve('HEAVY') == str(models / "pose_landmarker_lite.task")
+    assert len(scans) == 2
+
+
+def test_model_hash_memo_is_bounded(registry, monkeypatch):
+    models, _scans = registry
+    monkeypatch.setattr(model_registry, "MAX_MODEL_HASHES", 2)
+    paths = []
+    for index in range(3):
+        path = models / f"model_{index}.task"
+        path.write_bytes(bytes([index]) * 16)
+        paths.append(str(path))
+
+    hashes = [model_registry.model_hash(path) for path in paths]
+
+    assert len(set(hashes)) == 3
+    assert len(model_registry._hashes) == 2
+    assert model_registry.model_hash(paths[0]) == hashes[0]
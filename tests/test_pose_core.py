@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+import helpers
+
+pose_core = helpers.import_addon_module("pose_core")
+
+
+def _pixels_to_blender_coords(x_px, y_px, z_norm, w, h, center_x, center_y, is_front_view,
+                              scale, depth_factor, vertical_offset):
+    """Прежний поточечный перевод из model_utils (до pose_core)"""
+    norm_x = (x_px - center_x) / w
+    norm_y = (y_px - center_y) / h
+
+    if is_front_view:
+        bx = norm_x * w * scale
+        bz = -norm_y * h * scale
+        by = -z_norm * w * scale * depth_factor
+    else:
+        bz = -norm_y * h * scale
+        by = norm_x * w * scale
+        bx = -z_norm * w * scale * depth_factor
+
+    bz += vertical_offset
+    return (bx, by, bz)
+
+
+@pytest.mark.parametrize("is_front_view", [True, False])
+@pytest.mark.parametrize("size", [(640, 480), (1081, 1921)])
+def test_landmarks_to_blender_matches_pixel_conversion(is_front_view, size):
+    width, height = size
+    scale, depth_factor, vertical_offset = 0.0015, 0.3, 0.25
+    landmarks = helpers.synthetic_landmarks(1)[0]
+
+    expected = [
+        _pixels_to_blender_coords(
+            lm[0] * width, lm[1] * height, lm[2], width, height,
+            width // 2, height // 2, is_front_view, scale, depth_factor, vertical_offset
+        )
+        for lm in landmarks[pose_core.KEY_POINT_INDICES].astype(np.float64)
+    ]
+
+    result = pose_core.landmarks_to_blender(landmarks, width, height, is_front_view,
+                                            scale, depth_factor, vertical_offset)
+    np.testing.assert_allclose(result, expected, atol=1e-9)
+
+
+def test_landmarks_to_blender_batches_frames():
+    landmarks = helpers.synthetic_landmarks(5)
+    batch = pose_core.landmarks_to_blender(landmarks, 640, 480, True, 0.0015, 0.3)
+
+    assert batch.shape == (5, 13, 3)
+    np.testing.assert_allclose(
+        batch[3], pose_core.landmarks_to_blender(landmarks[3], 640, 480, True, 0.0015, 0.3)
+    )
+
+
+def test_landmarks_to_pixels():
+    landmarks = helpers.synthetic_landmarks(1)[0]
+    pixels = pose_core.landmarks_to_pixels(landmarks, 200, 100)
+
+    key_points = landmarks[pose_core.KEY_POINT_INDICES]
+    np.testing.assert_allclose(pixels[:, 0], key_points[:, 0] * 200, rtol=1e-6)
+    np.testing.assert_allclose(pixels[:, 1], key_points[:, 1] * 100, rtol=1e-6)
+
+
+def _forward_kinematics(rest, parents, quats):
+    """Поворот каждой кости в пространстве арматуры после позы (F, B, 3, 3)"""
+    local = pose_core.quaternion_to_matrix(quats)
+    posed = np.empty(local.shape)
+    for b in np.argsort(pose_core.bone_depths(parents), kind="stable"):
+        parent = parents[b]
+        if parent < 0:
+            posed[:, b] = rest[b] @ local[:, b]
+        else:
+            posed[:, b] = posed[:, parent] @ (rest[parent].T @ rest[b]) @ local[:, b]
+    return posed
+
+
+def test_solve_pose_quaternions_points_bones_along_directions():
+    rest = helpers.synthetic_rest()
+    landmarks = helpers.synthetic_landmarks(8)
+    points = pose_core.mediapipe_to_pose_space(pose_core.gather_key_points(landmarks))
+    directions = pose_core.segment_directions(points, rest["names"])
+
+    quats = pose_core.solve_pose_quaternions(rest["rest"], rest["parents"], directions)
+    posed = _forward_kinematics(rest["rest"], rest["parents"], quats)
+
+    # Ось Y кости после позы совпадает с целевым направлением
+    valid = ~np.isnan(directions).any(axis=-1)
+    assert valid.any()
+    np.testing.assert_allclose(posed[..., :, 1][valid], directions[valid], atol=1e-6)
+
+
+def test_solve_pose_quaternions_keeps_bones_without_direction():
+    rest = helpers.synthetic_rest()
+    bones = len(rest["names"])
+    directions = np.full((bones, 3), np.nan)
+    current = np.tile((0.0, 1.0, 0.0, 0.0), (bones, 1))
+
+    quats = pose_core.solve_pose_quaternions(rest["rest"], rest["parents"], directions, current)
+    np.testing.assert_allclose(quats, current)
@@ -0,0 +1,205 @@
+"""
+Замеры стадий конвейера (spans)
+
+Стадии оборачиваются в span("имя") - это два вызова perf_counter и запись
+в кольцевой буфер, поэтому замеры включены всегда. Собирается:
+  - разбивка последнего запуска (run) по стадиям - показывается в панели.
+    У каждого запуска свой объект: стадия попадает в запуск, активный в
+    контексте ее потока (activate, worker_pool переносит контекст в задачи),
+    поэтому одновременные фоновые задачи не смешивают разбивку
+  - скользящие p50/p95 по каждой стадии за последние STATS_WINDOW замеров
+  - события для Chrome trace (chrome://tracing, Perfetto) - export_trace()
+
+Модуль не зависит от bpy и других модулей аддона (его импортирует и
+detector_registry, который работает в сервере детекции).
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+ENABLED = True
+
+# Сколько последних замеров каждой стадии хранить для p50/p95
+STATS_WINDOW = 100
+
+# Сколько последних событий хранить для Chrome trace
+TRACE_MAX_EVENTS = 50000
+
+_lock = threading.Lock()
+_stats = {}
+_trace = deque(maxlen=TRACE_MAX_EVENTS)
+_thread_names = {}
+_epoch = time.perf_counter()
+# Запуск, в который пишутся стадии текущего потока/задачи
+_active_run = contextvars.ContextVar("photo_tool_pro_timing_run", default=None)
+_last_run = None
+
+
+class _Run:
+    """Один запуск операции: суммарное время каждой стадии в порядке появления"""
+
+    __slots__ = ("name", "started", "total", "stages")
+
+    @property
+    def finished(self):
+        return self.total is not None
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.total = None
+        self.stages = {}
+
+
+def record(stage, seconds, started=None, args=None):
+    """Записывает готовый замер стадии (started - perf_counter начала)"""
+    if not ENABLED:
+        return
+
+    if started is None:
+        started = time.perf_counter() - seconds
+    thread = threading.current_thread()
+    run_ = _active_run.get()
+
+    with _lock:
+        window = _stats.get(stage)
+        if window is None:
+            window = _stats[stage] = deque(maxlen=STATS_WINDOW)
+        window.append(seconds * 1000.0)
+
+        # Стадии отмененной задачи, закончившиеся после end_run, не учитываются
+        if run_ is not None and not run_.finished:
+            run_.stages[stage] = run_.stages.get(stage, 0.0) + seconds
+
+        event = {
+            "name": stage,
+            "ph": "X",
+            "ts": (started - _epoch) * 1e6,
+            "dur": seconds * 1e6,
+            "pid": os.getpid(),
+            "tid": thread.ident,
+        }
+        if args:
+            event["args"] = args
+        _trace.append(event)
+        _thread_names[thread.ident] = thread.name
+
+
+@contextmanager
+def span(stage, **args):
+    """with span("inference"): ... - замер стадии"""
+    if not ENABLED:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - started, started, args)
+
+
+def begin_run(name):
+    """
+    Начинает запуск и возвращает его (токен для activate и end_run).
+    Сам по себе запуск никуда не подключается: стадии попадут в него
+    только внутри activate(токен).
+    """
+    return _Run(name)
+
+
+@contextmanager
+def activate(run_):
+    """with activate(токен): ... - стадии этого потока (и задач worker_pool из него) идут в запуск"""
+    reset_token = _active_run.set(run_)
+    try:
+        yield run_
+    finally:
+        _active_run.reset(reset_token)
+
+
+def bind(run_, fn):
+    """Функция, выполняющая fn внутри activate(run_) (для отправки в другой поток)"""
+    def bound(*args, **kwargs):
+        with activate(run_):
+            return fn(*args, **kwargs)
+    return bound
+
+
+def end_run(run_):
+    """Завершает запуск; он становится последним. Повторный вызов ничего не делает."""
+    global _last_run
+    if run_ is None:
+        return
+    with _lock:
+        if run_.finished:
+            return
+        run_.total = time.perf_counter() - run_.started
+        _last_run = run_
+
+    record(run_.name, run_.total, run_.started)
+
+
+@contextmanager
+def run(name):
+    """with run("create_skeleton"): ... - синхронный запуск"""
+    run_ = begin_run(name)
+    try:
+        with activate(run_):
+            yield run_
+    finally:
+        end_run(run_)
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def get_stats():
+    """{стадия: (p50 мс, p95 мс, число замеров)}"""
+    with _lock:
+        windows = {stage: sorted(values) for stage, values in _stats.items() if values}
+    return {
+        stage: (_percentile(values, 0.5), _percentile(values, 0.95), len(values))
+        for stage, values in windows.items()
+    }
+
+
+def get_last_run():
+    """Последний запуск: {"name", "total_ms", "stages": [(стадия, мс), ...]} или None"""
+    with _lock:
+        run_ = _last_run
+        if run_ is None:
+            return None
+        stages = [(stage, seconds * 1000.0) for stage, seconds in run_.stages.items()]
+    return {"name": run_.name, "total_ms": run_.total * 1000.0, "stages": stages}
+
+
+def export_trace(path):
+    """Пишет события в формате Chrome trace JSON. Возвращает число событий."""
+    with _lock:
+        events = list(_trace)
+        thread_names = dict(_thread_names)
+
+    pid = os.getpid()
+    metadata = [
+        {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+        for tid, name in thread_names.items()
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+    return len(events)
+
+
+def reset():
+    global _last_run
+    with _lock:
+        _stats.clear()
+        _trace.clear()
+        _thread_names.clear()
+        _last_run = None
@@ -5,6 +5,11 @@ UI панели для аддона Photo Tool Pro
 import bpy
 from bpy.types import Panel
 
+from . import skeleton_registry
+
+# Сколько последних сообщений журнала показывать в панели
+LOG_PANEL_LINES = 8
+
 
 class VIEW3D_PT_photo_tool_main(Panel):
     """Основная панель Photo Tool Pro"""
@@ -26,6 +31,45 @@ class VIEW3D_PT_photo_tool_main(Panel):
         box.label(text="🎯 Photo Tool Pro", icon='CAMERA_DATA')
         box.label(text="Версия 3.3.5", icon='INFO')
 
+        # Состояние фонового прогрева модели
+        from . import prewarm
+        status_icons = {
+            'READY': 'CHECKMARK',
+            'RUNNING': 'SORTTIME',
+            'FAILED': 'ERROR',
+        }
+        box.label(text=prewarm.get_status_text(), icon=status_icons.get(prewarm.STATE, 'BLANK1'))
+
+        # Разбивка последнего запуска по стадиям и скользящие p50/p95
+        from . import timing
+        last_run = timing.get_last_run()
+        if last_run:
+            stats = timing.get_stats()
+            col = box.column(align=True)
+            col.label(text=f"⏱️ {last_run['name']}: {last_run['total_ms']:.0f} мс", icon='TIME')
+            for stage, milliseconds in last_run["stages"]:
+                p50, p95, _count = stats.get(stage, (milliseconds, milliseconds, 1))
+                col.label(text=f"{stage}: {milliseconds:.1f} мс (p50 {p50:.1f}, p95 {p95:.1f})")
+            col.operator(
+                "view3d.export_timing_trace",
+                text="Экспорт замеров",
+                icon='EXPORT'
+            )
+
+        # Журнал: последние сообщения из буфера и уровень подробности
+        from . import log_utils
+        col = box.column(align=True)
+        row = col.row(align=True)
+        row.operator_menu_enum(
+            "view3d.set_log_level",
+            "level",
+            text=f"Журнал: {log_utils.get_level()}",
+            icon='TEXT'
+        )
+        row.operator("view3d.clear_log", text="", icon='X')
+        for record in reversed(log_utils.get_records(LOG_PANEL_LINES)):
+            col.label(text=log_utils.format_record(record))
+
         # Разделитель
         layout.separator()
 
@@ -47,17 +91,18 @@ class VIEW3D_PT_photo_tool_main(Panel):
             text="Скелет + скриншоты",
             icon='RENDER_STILL'
         )
+        row = col.row(align=True)
+        row.operator(
+            "view3d.create_skeleton_async",
+            text="Создать скелет (в фоне)",
+            icon='SORTTIME'
+        )
 
         # Разделитель
         layout.separator()
 
         # ⚙️ БЛОК 2: Режимы редактирования (только если есть скелет)
-        skeletons = [
-            obj for obj in bpy.data.objects
-            if obj.type == 'ARMATURE' and obj.name.startswith("Pose_Skeleton")
-        ]
-
-        if skeletons:
+        if skeleton_registry.has_skeleton():
             box = layout.box()
             box.label(text="2. Режимы редактирования", icon='EDITMODE_HLT')
 
@@ -106,6 +151,44 @@ class VIEW3D_PT_photo_tool_main(Panel):
                 text="Загрузить позу из фото",
                 icon='IMAGE_DATA'
             )
+            row = col.row(align=True)
+            row.operator(
+                "view3d.apply_pose_from_photo_async",
+                text="Загрузить позу из фото (в фоне)",
+                icon='SORTTIME'
+            )
+            row = col.row(align=True)
+            row.operator(
+                "view3d.import_pose_sequence",
+                text="Анимация из папки фото",
+                icon='SEQUENCE'
+            )
+            row = col.row(align=True)
+            row.operator(
+                "view3d.import_pose_video",
+                text="Анимация из видео",
+                icon='FILE_MOVIE'
+            )
+
+            # Живой поток позы: кнопка и задержки по стадиям
+            from . import stream_ingest
+            streaming = stream_ingest.is_running()
+            row = col.row(align=True)
+            row.operator(
+                "view3d.toggle_pose_stream",
+                text="Остановить поток" if streaming else "Живой поток позы",
+                icon='PAUSE' if streaming else 'PLAY'
+            )
+            if streaming:
+                stats = stream_ingest.get_stats()
+                counters = stats["counters"]
+                col.label(
+                    text=f"Пакетов: {counters['received']}, применено: {counters['applied']}, "
+                         f"выброшено: {counters['dropped_frames'] + counters['dropped_landmarks']}",
+                    icon='INFO'
+                )
+                for stage, (p50, p95) in stats["stages"].items():
+                    col.label(text=f"{stage}: p50 {p50:.1f} мс, p95 {p95:.1f} мс")
 
             row = col.row(align=True)
             row.operator(
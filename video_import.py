@@ -0,0 +1,193 @@
+"""
+Импорт позы из видеофайла (MediaPipe VIDEO режим с трекингом)
+
+В режиме IMAGE каждый кадр оплачивает полный поиск человека. В режиме VIDEO
+детектор переиспользует область предыдущего кадра (min_tracking_confidence),
+и полный поиск выполняется только при потере трекинга.
+
+Кадры читает отдельный поток-декодер через cv2.VideoCapture и складывает
+в ограниченную очередь, пока детектор обрабатывает предыдущие.
+Модуль не обращается к bpy: результат - массив точек, который запекается
+в action скелета в главном потоке (pose_from_photo.apply_pose_sequence).
+"""
+import queue
+import threading
+
+import numpy as np
+
+from . import detection
+from . import detector_registry
+from . import pose_core
+
+# Сколько декодированных кадров может ждать детектора
+VIDEO_PREFETCH = 8
+
+# Порог уверенности для видео (детекция, присутствие и трекинг)
+VIDEO_MIN_CONFIDENCE = 0.5
+
+# Маркер конца потока кадров
+_END = object()
+
+
+def probe_video(video_path):
+    """Параметры видео. Возвращает (info, error), info - словарь frame_count, fps, width, height."""
+    try:
+        import cv2
+    except ImportError:
+        return None, "Требуется OpenCV"
+
+    capture = cv2.VideoCapture(video_path)
+    try:
+        if not capture.isOpened():
+            return None, f"Не удалось открыть видео: {video_path}"
+
+        info = {
+            "frame_count": int(capture.get(cv2.CAP_PROP_FRAME_COUNT)),
+            "fps": capture.get(cv2.CAP_PROP_FPS) or 30.0,
+            "width": int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        }
+        return info, None
+    finally:
+        capture.release()
+
+
+def frame_range(frame_count, start=0, end=-1, step=1):
+    """Индексы кадров видео для обработки; end включительно, -1 - до конца"""
+    last = frame_count - 1 if end < 0 else min(end, frame_count - 1)
+    return range(max(0, start), last + 1, max(1, step))
+
+
+class _FrameReader(threading.Thread):
+    """
+    Поток-декодер: читает нужные кадры видео в очередь (индекс, RGB).
+    Пропущенные шагом кадры только захватываются (grab), без декодирования.
+    """
+
+    def __init__(self, video_path, indices, stop_event):
+        super().__init__(name="PhotoToolProVideoReader", daemon=True)
+        self.video_path = video_path
+        self.indices = indices
+        self.stop_event = stop_event
+        self.frames = queue.Queue(maxsize=VIDEO_PREFETCH)
+        self.error = None
+
+    def _put(self, item):
+        # Не висим на полной очереди, если детекцию остановили
+        while not self.stop_event.is_set():
+            try:
+                self.frames.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(self):
+        import cv2
+
+        capture = cv2.VideoCapture(self.video_path)
+        try:
+            if not capture.isOpened():
+                self.error = f"Не удалось открыть видео: {self.video_path}"
+                return
+
+            if not self.indices:
+                return
+
+            position = self.indices[0]
+            if position > 0:
+                capture.set(cv2.CAP_PROP_POS_FRAMES, position)
+
+            for index in self.indices:
+                # Пропускаем кадры между шагами без декодирования
+                while position < index:
+                    if not capture.grab():
+                        return
+                    position += 1
+
+                ok, bgr = capture.read()
+                position += 1
+                if not ok:
+                    return
+
+                rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+                if not self._put((index, rgb)):
+                    return
+
+        except Exception as e:
+            self.error = f"Ошибка чтения видео: {str(e)}"
+
+        finally:
+            capture.release()
+            self._put(_END)
+
+
+def detect_video_landmarks(video_path, model_path, start=0, end=-1, step=1,
+                           progress=None, cancel_event=None):
+    """
+    Детекция позы на кадрах видео start..end (включительно) с шагом step.
+    Кадры передаются в detect_for_video с монотонными метками времени по fps.
+
+    progress     - словарь {"done", "total"}, обновляется по мере работы
+    cancel_event - threading.Event для досрочной остановки
+    Возвращает (landmarks (F, 13, 3) с NaN для кадров без позы, error).
+    """
+    import mediapipe as mp
+
+    info, error = probe_video(video_path)
+    if error:
+        return None, error
+
+    indices = frame_range(info["frame_count"], start, end, step)
+    if len(indices) == 0:
+        return None, "Пустой диапазон кадров"
+
+    landmarks = np.full((len(indices), len(pose_core.KEY_POINT_INDICES), 3), np.nan)
+    if progress is not None:
+        progress["total"] = len(indices)
+        progress["done"] = 0
+
+    stop_event = threading.Event()
+    reader = _FrameReader(video_path, indices, stop_event)
+    reader.start()
+
+    ms_per_frame = 1000.0 / info["fps"]
+
+    try:
+        with detector_registry.acquire(model_path, running_mode='VIDEO',
+                                       min_confidence=VIDEO_MIN_CONFIDENCE) as detector:
+            offset = detector_registry.timeline_offset(detector, int(round(indices[0] * ms_per_frame)))
+            timestamp = None
+
+            for slot in range(len(indices)):
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+
+                item = reader.frames.get()
+                if item is _END:
+                    break
+                index, rgb = item
+
+                timestamp = int(round(index * ms_per_frame)) + offset
+                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+                result = detection.PoseDetection.from_mediapipe(
+                    detector.detect_for_video(mp_image, timestamp)
+                )
+
+                if len(result.normalized):
+                    landmarks[slot] = pose_core.gather_key_points(result.normalized[0])[:, :3]
+
+                if progress is not None:
+                    progress["done"] = slot + 1
+
+            if timestamp is not None:
+                detector_registry.record_timestamp(detector, timestamp)
+
+    finally:
+        stop_event.set()
+        reader.join(timeout=1.0)
+
+    if reader.error:
+        return None, reader.error
+
+    return landmarks, None
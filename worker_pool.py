@@ -0,0 +1,117 @@
+"""
+Общий пул фоновых потоков для декодирования и детекции
+
+Работа с MediaPipe и OpenCV не требует bpy, поэтому ее можно выполнять вне
+главного потока Blender, а результат применять к сцене уже в главном потоке
+(из модального оператора или bpy.app.timers).
+
+Задачи выполняются в копии контекста (contextvars) отправившего потока:
+так замеры timing попадают в запуск той операции, которая их отправила.
+"""
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Сколько фоновых задач выполняется одновременно
+MAX_WORKERS = max(2, min(4, (os.cpu_count() or 2) // 2))
+
+# Сколько видов детектируется одновременно внутри одной задачи
+MAX_DETECT_WORKERS = max(2, min(4, os.cpu_count() or 2))
+
+_executor = None
+# Отдельный пул для детекции видов: задачи из _executor ждут его результаты,
+# и общий пул мог бы заблокироваться сам на себя
+_detect_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    """Возвращает общий ThreadPoolExecutor (создается при первом обращении)"""
+    global _executor
+
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="PhotoToolPro")
+        return _executor
+
+
+def _submit_in_context(executor, fn, *args, **kwargs):
+    context = contextvars.copy_context()
+    return executor.submit(context.run, fn, *args, **kwargs)
+
+
+def submit(fn, *args, **kwargs):
+    """Отправляет задачу в общий пул и возвращает Future"""
+    return _submit_in_context(get_executor(), fn, *args, **kwargs)
+
+
+def _get_detect_executor():
+    global _detect_executor
+
+    with _lock:
+        if _detect_executor is None:
+            _detect_executor = ThreadPoolExecutor(
+                max_workers=MAX_DETECT_WORKERS, thread_name_prefix="PhotoToolProDetect"
+            )
+        return _detect_executor
+
+
+def map_concurrent(fn, items):
+    """
+    Выполняет fn(item) для всех элементов одновременно в пуле детекции
+    и возвращает результаты в порядке items. Исключение fn пробрасывается.
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+
+    executor = _get_detect_executor()
+    futures = [_submit_in_context(executor, fn, item) for item in items]
+    return [future.result() for future in futures]
+
+
+def imap_bounded(fn, items, window=None, cancel_event=None):
+    """
+    Потоковый аналог map_concurrent для длинных последовательностей:
+    одновременно выполняется не больше window задач, результаты отдаются
+    генератором в порядке items. Память ограничена окном, а не длиной списка.
+    cancel_event (threading.Event) прекращает отправку новых задач.
+    """
+    from collections import deque
+
+    window = window or MAX_DETECT_WORKERS
+    executor = _get_detect_executor()
+    pending = deque()
+    iterator = iter(items)
+
+    def fill():
+        while len(pending) < window and not (cancel_event and cancel_event.is_set()):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            pending.append(_submit_in_context(executor, fn, item))
+
+    try:
+        fill()
+        while pending:
+            result = pending.popleft().result()
+            fill()
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def shutdown(wait=False):
+    """Останавливает пулы (вызывается при отключении аддона)"""
+    global _executor, _detect_executor
+
+    with _lock:
+        executors = (_executor, _detect_executor)
+        _executor = _detect_executor = None
+
+    for executor in executors:
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)